@@ -0,0 +1,194 @@
+"""
+Measure the functions that run on every request, in operations per second and
+in memory allocated per call.
+
+Memory is traced with tracemalloc, which knows the memory and blocks alive, not
+how many allocations were made. A call is measured by its peak: the most memory
+it held at once, temporary objects included. Blocks still alive after many
+calls, divided by their number, are what a call retains, e.g. in a cache.
+Tracing slows calls down, so the two are measured in separate runs.
+
+Usage: ENVIRONMENT=test python -m benchmarks.hot_paths [--repeat 20000]
+    [--only schema] [--output hot_paths.json]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+
+import pydantic
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+
+from main import app
+from main.commons.exceptions import NotFound
+from main.middlewares.access_log import AccessLogFormatter, AccessLogMiddleware
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+from main.schemas.item import CachedItemSchema, ItemCreatePayloadSchema
+from main.utils.auth import (
+    clear_verified_tokens,
+    create_access_token_from_id,
+    get_id_from_access_token,
+)
+from main.utils.category import get_category_schema
+from main.utils.item import get_item_schema, get_plain_item_schema
+
+from .access_log import INFO, SCOPE
+
+CREATED_AT = datetime(2026, 10, 18, 13, 40, 22)
+
+ITEM = ItemModel(
+    id=1042,
+    name="Mechanical keyboard",
+    description="d" * 1000,
+    category_id=17,
+    creator_id=3,
+    created_at=CREATED_AT,
+    updated_at=CREATED_AT,
+)
+CATEGORY = CategoryModel(
+    id=17,
+    name="Keyboards",
+    description="d" * 1000,
+    creator_id=3,
+    item_count=120,
+    created_at=CREATED_AT,
+    updated_at=CREATED_AT,
+)
+CACHED_ITEM = CachedItemSchema(
+    id=1042,
+    name="Mechanical keyboard",
+    description="d" * 1000,
+    creator_id=3,
+    updated_at=CREATED_AT,
+)
+
+
+def validation_error() -> RequestValidationError:
+    """
+    :return: the error of a body with a missing and an empty field
+    """
+    try:
+        ItemCreatePayloadSchema.model_validate({"name": ""})
+    except pydantic.ValidationError as error:
+        return RequestValidationError(
+            [{**e, "loc": ("body", *e["loc"])} for e in error.errors()],
+        )
+    raise AssertionError("The payload should not be valid")
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    """
+    :return: a call of each function measured, by name
+    """
+    access_log = AccessLogFormatter.from_format(AccessLogMiddleware.DEFAULT_FORMAT)
+    access_log_json = AccessLogFormatter(AccessLogMiddleware.JSON_FIELDS.values())
+    x_forwarded_for = AccessLogFormatter(["x_forwarded_for"])
+    token = create_access_token_from_id(3)
+    handle_validation_error = app.exception_handlers[RequestValidationError]
+    # The handler only reads the error
+    request = Request({"type": "http"})
+    error = validation_error()
+
+    def format_access_log():
+        return AccessLogMiddleware.DEFAULT_FORMAT % access_log(SCOPE, INFO)
+
+    def verify_uncached_token():
+        clear_verified_tokens()
+        return get_id_from_access_token(token)
+
+    return {
+        "access log line": format_access_log,
+        "access log json atoms": lambda: access_log_json(SCOPE, INFO),
+        "x-forwarded-for": lambda: x_forwarded_for(SCOPE, INFO),
+        "verify token": lambda: get_id_from_access_token(token),
+        "verify token uncached": verify_uncached_token,
+        "create token": lambda: create_access_token_from_id(3),
+        "item schema": lambda: get_item_schema(ITEM, 3),
+        "plain item schema": lambda: get_plain_item_schema(CACHED_ITEM, 3),
+        "category schema": lambda: get_category_schema(CATEGORY, 3),
+        "error response": lambda: NotFound().to_response(),
+        "validation error": lambda: handle_validation_error(request, error),
+    }
+
+
+async def call(function: Callable[[], object]):
+    result = function()
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def measure_speed(function: Callable[[], object], repeat: int) -> float:
+    """
+    :return: calls per second
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await call(function)
+    return repeat / (time.perf_counter() - start)
+
+
+def traced_blocks() -> int:
+    return sum(
+        stat.count for stat in tracemalloc.take_snapshot().statistics("filename")
+    )
+
+
+async def measure_memory(
+    function: Callable[[], object],
+    repeat: int,
+) -> tuple[int, float]:
+    """
+    :return: the peak bytes of one call, and the blocks retained per call
+    """
+    tracemalloc.start()
+    try:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await call(function)
+        _, peak = tracemalloc.get_traced_memory()
+
+        blocks = traced_blocks()
+        for _ in range(repeat):
+            await call(function)
+        retained = (traced_blocks() - blocks) / repeat
+    finally:
+        tracemalloc.stop()
+
+    return peak - current, retained
+
+
+async def main(repeat: int, only: str | None, output: Path | None):
+    print(f"{'function':<24}{'ops/s':>12}{'peak B':>9}{'retained':>10}")
+
+    results = {}
+    for name, function in cases().items():
+        if only and only not in name:
+            continue
+
+        # Warm up caches and lazily built validators
+        for _ in range(100):
+            await call(function)
+
+        speed = await measure_speed(function, repeat)
+        peak, retained = await measure_memory(function, max(repeat // 10, 1))
+        results[name] = {"ops": round(speed), "peak": peak, "retained": retained}
+        print(f"{name:<24}{speed:>12,.0f}{peak:>9}{retained:>10.2f}")
+
+    if output:
+        output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--only", help="only the functions whose name has it")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat, args.only, args.output))
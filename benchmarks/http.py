@@ -0,0 +1,696 @@
+"""
+Measure the throughput and latency percentiles of every route of the API, and
+compare them with a stored baseline.
+
+Requests are sent to ``main.app`` in process through an ASGI transport, or with
+``--server`` to a uvicorn server started on localhost, which adds HTTP parsing
+and the network stack. Every scenario runs at each concurrency level, for
+``--requests`` requests after ``--warmup`` requests that are not measured, in
+``--rounds`` rounds of which the fastest is kept. The database is seeded with a
+user, categories and items, all of which are deleted at the end.
+
+Results are written as JSON. Against a baseline, a scenario is a regression
+when its p95 latency grew, or its throughput dropped, by more than
+``--tolerance``, or when any of its requests failed: the exit status is then 1.
+A baseline is only recorded when none of its requests failed.
+
+Failed requests are a regression whatever the baseline. Latencies and
+throughputs are only compared with a baseline of the same workload: transport,
+database, request counts and password hashing settings. Without one, nothing
+else is compared and the exit status is 3. A baseline recorded on another
+machine or Python version is still compared, with a warning, as its numbers are
+only as close as the two machines are. On SQLite, which runs one writer at a
+time, scenarios that write are only compared at a concurrency of 1. Scenarios
+that hash passwords only run at concurrencies the hashing pool admits, as it
+answers 503 to the calls beyond its workers and backlog.
+
+The committed baseline was recorded in the reference environment of ``make
+benchmark-http``: the ASGI transport, an SQLite file database, which needs
+aiosqlite, and 12 bcrypt rounds, with Python 3.11.7 on one x86_64 CPU. To record
+it again, run ``make benchmark-http-baseline`` there and commit
+``benchmarks/baselines/http.json``. To gate a change on another machine, record a
+baseline there from the commit before it, with ``--baseline`` pointing outside
+the tree, then run the change against it.
+
+Usage: ENVIRONMENT=test python -m benchmarks.http [--server]
+    [--concurrency 1,8,32] [--requests 200] [--rounds 3] [--routes items]
+    [--baseline benchmarks/baselines/http.json] [--update-baseline]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, insert, select
+
+from main import app, config, db
+from main.engines.users import hash_password
+from main.libs.log import log_pipeline
+from main.models.base import BaseModel
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+from main.models.user import UserModel
+from main.utils.auth import create_access_token_from_id
+
+BASELINE = Path(__file__).parent / "baselines" / "http.json"
+OUTPUT = Path(__file__).parent / "results" / "http.json"
+
+# Unique to a run, so that rows left by an interrupted run never collide
+PREFIX = f"benchmark-{uuid.uuid4().hex[:8]}"
+PASSWORD = "Benchmark password 1"
+SEEDED_ITEMS = 100
+
+EXIT_REGRESSION = 1
+EXIT_NOT_COMPARED = 3
+
+# Keys of the environment that only make the numbers faster or slower, a baseline
+# recorded with others is compared with a warning. The rest define the workload
+MACHINE_KEYS = ("python", "machine", "cpus")
+
+# Routes without a scenario, and why
+SKIPPED = {
+    "GET /admin/profiles": "only served with PROFILER_ENABLED",
+    "GET /admin/profiles/{name}": "only served with PROFILER_ENABLED",
+}
+
+# Method, URL and keyword arguments of httpx.AsyncClient.request
+Request = tuple[str, str, dict]
+
+
+class Seed:
+    def __init__(
+        self,
+        user_id: int,
+        category_id: int,
+        write_category_id: int,
+        item_id: int,
+    ):
+        self.user_id = user_id
+        # Read only, so that its cached pages stay valid
+        self.category_id = category_id
+        # Receives the items written
+        self.write_category_id = write_category_id
+        self.item_id = item_id
+        self.headers = {
+            "Authorization": f"Bearer {create_access_token_from_id(user_id)}",
+        }
+
+
+class Scenario:
+    def __init__(
+        self,
+        name: str,
+        route: str,
+        build: Callable[[Seed, int], Awaitable[list[Request]]],
+        enabled: Callable[[], bool] = lambda: True,
+        writes: bool = False,
+        max_concurrency: Callable[[], int | None] = lambda: None,
+    ):
+        """
+        :param route: method and path template, e.g. "GET /items/{item_id}"
+        :param build: returns the given number of requests, each may be sent once
+        :param enabled: whether the route is served with the current config
+        :param writes: whether requests write rows that others may wait on
+        :param max_concurrency: the highest concurrency served without shedding
+            requests, if any
+        """
+        self.name = name
+        self.route = route
+        self.build = build
+        self.enabled = enabled
+        self.writes = writes
+        self.max_concurrency = max_concurrency
+
+
+def repeated(method: str, url: Callable[[Seed], str], **kwargs):
+    """
+    Build the same request for every run.
+    """
+
+    async def build(seed: Seed, count: int) -> list[Request]:
+        request = (method, url(seed), {"headers": seed.headers, **kwargs})
+        return [request] * count
+
+    return build
+
+
+def numbered(method: str, url: Callable[[Seed], str], json: Callable[[str], dict]):
+    """
+    Build requests whose body holds a name never used before.
+    """
+
+    async def build(seed: Seed, count: int) -> list[Request]:
+        start = time.monotonic_ns()
+        return [
+            (
+                method,
+                url(seed),
+                {"headers": seed.headers, "json": json(f"{PREFIX} {start} {i}")},
+            )
+            for i in range(count)
+        ]
+
+    return build
+
+
+def password_hashing_capacity() -> int:
+    """
+    Calls the password hashing pool runs or queues, beyond which it answers 503.
+    """
+    return config.PASSWORD_HASH_WORKERS + config.PASSWORD_HASH_MAX_BACKLOG
+
+
+async def insert_rows(model, rows: list[dict], key: str = "name") -> list[int]:
+    """
+    :return: the ids of the rows, in order
+    """
+    async with db.scope():
+        await db.session.execute(insert(model), rows)
+        await db.session.commit()
+        # MySQL has no RETURNING, the rows are found by a unique column instead
+        column = getattr(model, key)
+        result = await db.session.execute(
+            select(model.id)
+            .where(column.in_([row[key] for row in rows]))
+            .order_by(model.id),
+        )
+        return list(result.scalars())
+
+
+async def delete_item_requests(seed: Seed, count: int) -> list[Request]:
+    start = time.monotonic_ns()
+    ids = await insert_rows(
+        ItemModel,
+        [
+            {
+                "name": f"{PREFIX} {start} deleted item {i}",
+                "description": "d" * 1000,
+                "category_id": seed.write_category_id,
+                "creator_id": seed.user_id,
+            }
+            for i in range(count)
+        ],
+    )
+    return [("DELETE", f"/items/{id}", {"headers": seed.headers}) for id in ids]
+
+
+async def delete_category_requests(seed: Seed, count: int) -> list[Request]:
+    start = time.monotonic_ns()
+    ids = await insert_rows(
+        CategoryModel,
+        [
+            {
+                "name": f"{PREFIX} {start} deleted category {i}",
+                "description": "d" * 1000,
+                "creator_id": seed.user_id,
+            }
+            for i in range(count)
+        ],
+    )
+    return [("DELETE", f"/categories/{id}", {"headers": seed.headers}) for id in ids]
+
+
+SCENARIOS = [
+    Scenario("ping", "GET /pings", repeated("GET", lambda _: "/pings")),
+    Scenario("ready", "GET /ready", repeated("GET", lambda _: "/ready")),
+    Scenario(
+        "metrics",
+        "GET /metrics",
+        repeated(
+            "GET",
+            lambda _: "/metrics",
+            headers={"Authorization": f"Bearer {config.METRICS_TOKEN}"},
+        ),
+        enabled=lambda: config.METRICS_ENABLED and bool(config.METRICS_TOKEN),
+    ),
+    Scenario(
+        "register",
+        "POST /register",
+        numbered(
+            "POST",
+            lambda _: "/register",
+            lambda name: {
+                "email": f"{name.replace(' ', '-')}@example.com",
+                "password": PASSWORD,
+            },
+        ),
+        max_concurrency=password_hashing_capacity,
+    ),
+    Scenario(
+        "login",
+        "POST /login",
+        repeated(
+            "POST",
+            lambda _: "/login",
+            json={"email": f"{PREFIX}@example.com", "password": PASSWORD},
+        ),
+        max_concurrency=password_hashing_capacity,
+    ),
+    Scenario(
+        "list categories",
+        "GET /categories",
+        repeated("GET", lambda _: "/categories", params={"number_per_page": 20}),
+    ),
+    Scenario(
+        "stream categories",
+        "GET /categories",
+        repeated("GET", lambda _: "/categories", params={"stream": True}),
+    ),
+    Scenario(
+        "get category",
+        "GET /categories/{category_id}",
+        repeated("GET", lambda seed: f"/categories/{seed.category_id}"),
+    ),
+    Scenario(
+        "add category",
+        "POST /categories",
+        numbered(
+            "POST",
+            lambda _: "/categories",
+            lambda name: {"name": name, "description": "d" * 1000},
+        ),
+        writes=True,
+    ),
+    Scenario(
+        "delete category",
+        "DELETE /categories/{category_id}",
+        delete_category_requests,
+        writes=True,
+    ),
+    Scenario(
+        "list items",
+        "GET /categories/{category_id}/items",
+        repeated("GET", lambda seed: f"/categories/{seed.category_id}/items"),
+    ),
+    Scenario(
+        "add item",
+        "POST /categories/{category_id}/items",
+        numbered(
+            "POST",
+            lambda seed: f"/categories/{seed.write_category_id}/items",
+            lambda name: {"name": name, "description": "d" * 1000},
+        ),
+        writes=True,
+    ),
+    Scenario(
+        "add items",
+        "POST /categories/{category_id}/items:batch",
+        numbered(
+            "POST",
+            lambda seed: f"/categories/{seed.write_category_id}/items:batch",
+            lambda name: {
+                "items": [
+                    {"name": f"{name} {i}", "description": "d" * 1000}
+                    for i in range(20)
+                ],
+            },
+        ),
+        writes=True,
+    ),
+    Scenario(
+        "get item",
+        "GET /items/{item_id}",
+        repeated("GET", lambda seed: f"/items/{seed.item_id}"),
+    ),
+    Scenario(
+        "update item",
+        "PUT /items/{item_id}",
+        repeated(
+            "PUT",
+            lambda seed: f"/items/{seed.item_id}",
+            json={"description": "u" * 1000},
+        ),
+        writes=True,
+    ),
+    Scenario(
+        "delete item",
+        "DELETE /items/{item_id}",
+        delete_item_requests,
+        writes=True,
+    ),
+]
+
+
+def check_coverage():
+    """
+    Exit if a route of the app has no scenario, nor a reason to be skipped.
+    """
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    covered = {scenario.route for scenario in SCENARIOS} | SKIPPED.keys()
+    if missing := sorted(routes - covered):
+        sys.exit(f"Routes without a benchmark scenario: {', '.join(missing)}")
+
+
+async def seed_database() -> Seed:
+    async with db.engine.begin() as connection:
+        await connection.run_sync(BaseModel.metadata.create_all)
+
+    (user_id,) = await insert_rows(
+        UserModel,
+        [
+            {
+                "email": f"{PREFIX}@example.com",
+                "hashed_password": await hash_password(PASSWORD),
+            },
+        ],
+        key="email",
+    )
+    category_id, write_category_id = await insert_rows(
+        CategoryModel,
+        [
+            {
+                "name": f"{PREFIX} {name}",
+                "description": "d" * 1000,
+                "creator_id": user_id,
+                "item_count": count,
+            }
+            for name, count in (("read", SEEDED_ITEMS), ("write", 1))
+        ],
+    )
+    item_id, *_ = await insert_rows(
+        ItemModel,
+        [
+            {
+                "name": f"{PREFIX} item {i}",
+                "description": "d" * 1000,
+                "category_id": category_id if i else write_category_id,
+                "creator_id": user_id,
+            }
+            for i in range(SEEDED_ITEMS + 1)
+        ],
+    )
+    return Seed(user_id, category_id, write_category_id, item_id)
+
+
+async def clean_database():
+    async with db.scope():
+        users = select(UserModel.id).where(UserModel.email.startswith(PREFIX))
+        categories = select(CategoryModel.id).where(CategoryModel.creator_id.in_(users))
+        await db.session.execute(
+            delete(ItemModel).where(ItemModel.category_id.in_(categories)),
+        )
+        await db.session.execute(
+            delete(CategoryModel).where(CategoryModel.creator_id.in_(users)),
+        )
+        await db.session.execute(
+            delete(UserModel).where(UserModel.email.startswith(PREFIX)),
+        )
+        await db.session.commit()
+
+
+async def send(
+    client: httpx.AsyncClient,
+    requests: list[Request],
+    concurrency: int,
+) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+    pending = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        # The iterator is shared, each request is sent by a single worker
+        for method, url, kwargs in pending:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            errors += not response.is_success
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50": round(percentiles[49] * 1000, 3),
+        "p95": round(percentiles[94] * 1000, 3),
+        "p99": round(percentiles[98] * 1000, 3),
+    }
+
+
+async def run_scenarios(
+    client: httpx.AsyncClient,
+    seed: Seed,
+    scenarios: list[Scenario],
+    levels: list[int],
+    count: int,
+    warmup: int,
+    rounds: int,
+) -> dict[str, dict[str, dict[str, float]]]:
+    print(
+        f"{'scenario':<20}{'conc':>5}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'errors':>8}",
+    )
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for scenario in scenarios:
+        max_concurrency = scenario.max_concurrency()
+        for level in levels:
+            if max_concurrency is not None and level > max_concurrency:
+                print(f"{scenario.name:<20}{level:>5}  skipped, beyond its capacity")
+                continue
+            measured = []
+            for _ in range(rounds):
+                requests = await scenario.build(seed, warmup + count)
+                await send(client, requests[:warmup], level)
+                measured.append(await send(client, requests[warmup:], level))
+            # Noise only slows a round down, so the fastest round is kept
+            result = max(measured, key=lambda round: round["throughput"])
+            results.setdefault(scenario.name, {})[str(level)] = result
+            print(
+                f"{scenario.name:<20}{level:>5}{result['throughput']:>10.1f}"
+                f"{result['p50']:>9.2f}{result['p95']:>9.2f}{result['p99']:>9.2f}"
+                f"{result['errors']:>8}",
+            )
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_server(port: int) -> subprocess.Popen:
+    # The server inherits the environment, so it uses the seeded database
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)]
+    server = subprocess.Popen(  # noqa: S603
+        command,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(f"http://127.0.0.1:{port}/pings")
+                return server
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+    server.terminate()
+    sys.exit("The uvicorn server did not start")
+
+
+def compare(
+    results: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    tolerance: float,
+    sequential_only: set[str],
+) -> list[str]:
+    """
+    :param sequential_only: scenarios only compared at a concurrency of 1
+    :return: a description of each regression
+    """
+    regressions = []
+    for name, levels in results.items():
+        for level, result in levels.items():
+            label = f"{name} at concurrency {level}"
+            # Failed requests are usually answered fast, so they are never
+            # traded for the throughput and latencies they bring
+            if result["errors"]:
+                regressions.append(f"{label}: {result['errors']} errors")
+
+            base = baseline.get(name, {}).get(level)
+            if base is None or (name in sequential_only and level != "1"):
+                continue
+
+            if result["p95"] > base["p95"] * (1 + tolerance):
+                regressions.append(
+                    f"{label}: p95 {base['p95']:.2f} -> {result['p95']:.2f} ms",
+                )
+            if result["throughput"] < base["throughput"] * (1 - tolerance):
+                regressions.append(
+                    f"{label}: throughput {base['throughput']:.1f} -> "
+                    f"{result['throughput']:.1f} req/s",
+                )
+    return regressions
+
+
+async def main(args: argparse.Namespace):
+    if config.ENVIRONMENT not in ("local", "test"):
+        sys.exit('The benchmark writes rows, run it with "ENVIRONMENT=test"')
+
+    check_coverage()
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if scenario.enabled()
+        and (not args.routes or args.routes in f"{scenario.name} {scenario.route}")
+    ]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    environment = {
+        "transport": "uvicorn" if args.server else "asgi",
+        "database": db.engine.dialect.name,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "requests": args.requests,
+        "rounds": args.rounds,
+        # Hashing dominates the time of register and login, and bounds their
+        # concurrency
+        "password_hash_rounds": config.PASSWORD_HASH_ROUNDS,
+        "password_hash_workers": config.PASSWORD_HASH_WORKERS,
+        "password_hash_max_backlog": config.PASSWORD_HASH_MAX_BACKLOG,
+    }
+
+    # Log lines are still formatted, but not written among the results
+    log_pipeline.stream = open(os.devnull, "w")
+    seed = await seed_database()
+    server = None
+    try:
+        if args.server:
+            port = free_port()
+            server = await start_server(port)
+            client = httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}",
+                limits=httpx.Limits(max_connections=None),
+            )
+        else:
+            await app.router.startup()
+            client = httpx.AsyncClient(
+                # Errors are counted, as over HTTP, rather than stopping the run
+                transport=httpx.ASGITransport(
+                    app=app,  # type: ignore[arg-type]
+                    raise_app_exceptions=False,
+                ),
+                base_url="http://benchmark",
+            )
+
+        async with client:
+            results = await run_scenarios(
+                client,
+                seed,
+                scenarios,
+                levels,
+                args.requests,
+                args.warmup,
+                args.rounds,
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        else:
+            await app.router.shutdown()
+        await clean_database()
+        await db.engine.dispose()
+
+    report = {"environment": environment, "results": results}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        if failed := [
+            f"{name} at concurrency {level}"
+            for name, levels in results.items()
+            for level, result in levels.items()
+            if result["errors"]
+        ]:
+            sys.exit(f"Requests failed, no baseline written: {', '.join(failed)}")
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    baseline_results = {}
+    if not args.baseline.is_file():
+        print(f"No baseline at {args.baseline}, only failed requests are checked")
+    else:
+        baseline = json.loads(args.baseline.read_text())
+        differences = {
+            key: (baseline["environment"].get(key), value)
+            for key, value in environment.items()
+            if baseline["environment"].get(key) != value
+        }
+        if workload := sorted(differences.keys() - MACHINE_KEYS):
+            print(
+                "The baseline was recorded with another workload, only failed "
+                f"requests are checked: {', '.join(workload)}",
+            )
+        else:
+            baseline_results = baseline["results"]
+            for key, (recorded, current) in differences.items():
+                print(
+                    f"Warning: the baseline was recorded with {key} {recorded}, "
+                    f"not {current}",
+                )
+
+    # SQLite runs one writer at a time and paces the others with the sleeps of
+    # its busy handler, so concurrent writes measure those more than the service
+    sequential_only = {
+        scenario.name
+        for scenario in scenarios
+        if scenario.writes and environment["database"] == "sqlite"
+    }
+    if sequential_only and baseline_results:
+        names = ", ".join(sorted(sequential_only))
+        print(f"Only compared at a concurrency of 1: {names}")
+
+    regressions = compare(results, baseline_results, args.tolerance, sequential_only)
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(EXIT_REGRESSION)
+    if not baseline_results:
+        print("No failed request")
+        sys.exit(EXIT_NOT_COMPARED)
+    print(f"No regression beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--server", action="store_true")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument(
+        "--routes",
+        help="only the scenarios whose name or route has it",
+    )
+    parser.add_argument("--output", type=Path, default=OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,168 @@
+"""
+Compare the ORM read path of the list endpoints with the column-projected one.
+
+The ORM path loads full instances and builds each schema from ``__dict__``, as the
+list endpoints used to. The projected path selects the listed columns only and
+validates every row of a page at once. Rows are inserted in a transaction that
+is rolled back, so the database is left as it was.
+
+Each comparison is repeated ``--rounds`` times, alternating both paths, and the
+range of the speedups is printed along with the median: a gain within that range
+is noise.
+
+Usage: ENVIRONMENT=test python -m benchmarks.read_path [--repeat 50] [--rounds 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import desc, insert, select
+
+from main import config, db
+from main.engines.categories import get_categories_after
+from main.engines.items import get_items
+from main.models.base import BaseModel
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+from main.models.user import UserModel
+from main.schemas.category import CategorySchema
+from main.schemas.item import CachedItemSchema
+from main.utils.category import get_category_list_schemas
+from main.utils.item import get_cached_item_schemas
+
+PAGE_SIZES = (20, 100, 1000)
+
+
+async def orm_items(category_id: int, limit: int):
+    result = await db.session.execute(
+        select(ItemModel)
+        .where(ItemModel.category_id == category_id)
+        .order_by(desc(ItemModel.created_at), desc(ItemModel.id))
+        .limit(limit),
+    )
+    return [CachedItemSchema(**item.__dict__) for item in result.scalars().all()]
+
+
+async def projected_items(category_id: int, limit: int):
+    return get_cached_item_schemas(await get_items(category_id, 0, limit))
+
+
+async def orm_categories(_: int, limit: int):
+    result = await db.session.execute(
+        select(CategoryModel).order_by(CategoryModel.id).limit(limit),
+    )
+    return [
+        CategorySchema(**category.__dict__, is_creator=False)
+        for category in result.scalars().all()
+    ]
+
+
+async def projected_categories(_: int, limit: int):
+    return get_category_list_schemas(await get_categories_after(0, limit), None)
+
+
+async def measure(
+    read: Callable[[int, int], Awaitable[list]],
+    category_id: int,
+    limit: int,
+    repeat: int,
+) -> float:
+    timings = []
+    for _ in range(repeat):
+        # Start from an empty identity map, as a new request would
+        db.session.expunge_all()
+        start = time.perf_counter()
+        page = await read(category_id, limit)
+        timings.append(time.perf_counter() - start)
+        assert len(page) == limit
+
+    return statistics.median(timings) * 1000
+
+
+async def prepare(count: int) -> int:
+    # No password can match, the user only owns the rows
+    user = UserModel(email="benchmark@example.com", hashed_password="-")  # noqa: S106
+    db.session.add(user)
+    await db.session.flush()
+
+    await db.session.execute(
+        insert(CategoryModel),
+        [
+            {
+                "name": f"Benchmark category {i}",
+                "description": "d" * 1000,
+                "creator_id": user.id,
+            }
+            for i in range(count)
+        ],
+    )
+    category_id = (
+        await db.session.execute(select(CategoryModel.id).limit(1))
+    ).scalar_one()
+    await db.session.execute(
+        insert(ItemModel),
+        [
+            {
+                "name": f"Benchmark item {i}",
+                "description": "d" * 1000,
+                "category_id": category_id,
+                "creator_id": user.id,
+            }
+            for i in range(count)
+        ],
+    )
+    return category_id
+
+
+async def main(repeat: int, rounds: int):
+    if config.ENVIRONMENT not in ("local", "test"):
+        sys.exit('The benchmark writes rows, run it with "ENVIRONMENT=test"')
+
+    connection = await db.engine.connect()
+    transaction = await connection.begin()
+    await connection.run_sync(BaseModel.metadata.create_all)
+    db.session_factory.configure(bind=connection)
+
+    try:
+        category_id = await prepare(max(PAGE_SIZES))
+
+        print(
+            f"{'listing':<12}{'rows':>6}{'orm ms':>10}{'projected ms':>14}"
+            f"{'x':>7}{'x range':>13}",
+        )
+        for listing, orm, projected in (
+            ("items", orm_items, projected_items),
+            ("categories", orm_categories, projected_categories),
+        ):
+            for limit in PAGE_SIZES:
+                befores, afters = [], []
+                for _ in range(rounds):
+                    befores.append(await measure(orm, category_id, limit, repeat))
+                    afters.append(
+                        await measure(projected, category_id, limit, repeat),
+                    )
+                before = statistics.median(befores)
+                after = statistics.median(afters)
+                ratios = [b / a for b, a in zip(befores, afters, strict=True)]
+                print(
+                    f"{listing:<12}{limit:>6}{before:>10.3f}{after:>14.3f}"
+                    f"{before / after:>7.2f}"
+                    f"{f'{min(ratios):.2f}-{max(ratios):.2f}':>13}",
+                )
+    finally:
+        await db.scoped_session.remove()
+        await transaction.rollback()
+        await connection.close()
+        await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat, args.rounds))
@@ -0,0 +1,101 @@
+"""
+Compare the CPU spent on serializing list responses by FastAPI's default path
+and by ``SchemaResponse``.
+
+The default path validates the returned schema against ``response_model``,
+encodes it with ``jsonable_encoder`` and renders it with ``json.dumps``.
+``SchemaResponse`` only dumps the already validated schema.
+
+Usage: python -m benchmarks.serialization [--repeat 2000]
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from main.commons.responses import SchemaResponse
+from main.schemas.category import CategoriesSchema, CategorySchema
+from main.schemas.item import CategoryItemsSchema, PlainItemSchema
+
+PAGE_SIZES = (20, 100)
+
+
+def items_page(size: int) -> CategoryItemsSchema:
+    return CategoryItemsSchema(
+        items=[
+            PlainItemSchema(
+                id=i,
+                name=f"Item {i}",
+                description="d" * 1000,
+                is_creator=i % 2 == 0,
+            )
+            for i in range(size)
+        ],
+        total=size * 10,
+        page=1,
+        number_per_page=size,
+        next_cursor="WyJuZXh0IiwiMjAyNi0xMC0xOFQxMzo0MDoyMiIsMjBd",
+    )
+
+
+def categories_page(size: int) -> CategoriesSchema:
+    return CategoriesSchema(
+        categories=[
+            CategorySchema(
+                id=i,
+                name=f"Category {i}",
+                description="d" * 1000,
+                is_creator=False,
+            )
+            for i in range(size)
+        ],
+        number_per_page=size,
+        next_cursor="WyJuZXh0IiwyMF0",
+    )
+
+
+async def measure(render: Callable[[], object], repeat: int) -> float:
+    """
+    :return: the CPU time of one rendering, in microseconds
+    """
+    start = time.process_time()
+    for _ in range(repeat):
+        result = render()
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.process_time() - start) / repeat * 1_000_000
+
+
+async def main(repeat: int):
+    print(f"{'response':<12}{'rows':>6}{'fastapi us':>12}{'schema us':>11}{'x':>7}")
+
+    for name, build in (("items", items_page), ("categories", categories_page)):
+        for size in PAGE_SIZES:
+            content: BaseModel = build(size)
+            field = create_response_field(name="response", type_=type(content))
+
+            async def render_default():
+                encoded = await serialize_response(
+                    field=field,
+                    response_content=content,
+                )
+                return JSONResponse(encoded)
+
+            before = await measure(render_default, repeat)
+            after = await measure(lambda: SchemaResponse(content), repeat)
+            print(
+                f"{name:<12}{size:>6}{before:>12.1f}{after:>11.1f}"
+                f"{before / after:>7.2f}",
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().repeat))
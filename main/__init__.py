@@ -16,5 +16,24 @@ def register_subpackages():
     app.include_router(router)
 
 
+def register_event_handlers():
+    from main.controllers.metrics import multiprocess_metrics
+    from main.engines.cache import (
+        category_items_cache,
+        entity_cache,
+        warn_about_unshared_caches,
+    )
+    from main.engines.users import password_hashing
+
+    app.add_event_handler("startup", warn_about_unshared_caches)
+    app.add_event_handler("startup", entity_cache.start)
+    app.add_event_handler("shutdown", entity_cache.stop)
+    app.add_event_handler("shutdown", category_items_cache.close)
+    app.add_event_handler("shutdown", password_hashing.shutdown)
+    app.add_event_handler("startup", multiprocess_metrics.start)
+    app.add_event_handler("shutdown", multiprocess_metrics.stop)
+
+
 register_subpackages()
+register_event_handlers()
 register_error_handlers(app)
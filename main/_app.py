@@ -5,6 +5,9 @@ from ._config import config
 from .middlewares import (
     AccessLogMiddleware,
     DBSessionMiddleware,
+    HTTPMetricsMiddleware,
+    ProfilerMiddleware,
+    ServerTimingMiddleware,
 )
 
 api_docs_enabled = config.ENVIRONMENT == "local"
@@ -22,5 +25,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Within the DB session, whose request id names the captures
+if config.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware, sample_rate=config.PROFILER_SAMPLE_RATE)
+
 app.add_middleware(DBSessionMiddleware)
-app.add_middleware(AccessLogMiddleware)
+app.add_middleware(
+    AccessLogMiddleware,
+    json_lines=config.ACCESS_LOG_FORMAT == "json",
+    sample_rate=config.ACCESS_LOG_SAMPLE_RATE,
+    sample_rates=config.ACCESS_LOG_SAMPLE_RATES,
+    slow_threshold=config.ACCESS_LOG_SLOW_THRESHOLD,
+)
+app.add_middleware(HTTPMetricsMiddleware)
+
+# Added last to be outermost, so that the time of every middleware is counted
+if config.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
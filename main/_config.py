@@ -1,18 +1,101 @@
 import logging
 import os
+from typing import Literal
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Config(BaseSettings):
     ENVIRONMENT: str
     LOGGING_LEVEL: int = logging.INFO
+    # Log records are written by a background thread. Once LOG_QUEUE_SIZE of
+    # them wait, new ones are dropped, or wait for room with the "block" policy
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_QUEUE_POLICY: Literal["drop", "block"] = "drop"
+    LOG_BATCH_SIZE: int = 512
+
+    # "text" lines follow AccessLogMiddleware.DEFAULT_FORMAT, "json" lines are
+    # objects of AccessLogMiddleware.JSON_FIELDS
+    ACCESS_LOG_FORMAT: Literal["text", "json"] = "text"
+    # Share of successful requests logged, by path. Errors are always logged
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SAMPLE_RATES: dict[str, float] = {"/pings": 0.01, "/ready": 0.01}
+    # Requests slower than this many seconds are always logged, marked as slow
+    ACCESS_LOG_SLOW_THRESHOLD: float = 1.0
+
+    # Serve /metrics, which exposes pool, cache, route and worker pool telemetry,
+    # to requests carrying "Authorization: Bearer <METRICS_TOKEN>". It is not
+    # served without a token
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str = ""
+    # Directory where each worker shares its metrics, so that /metrics covers
+    # them all. Empty it before the server starts. Unset with a single worker
+    METRICS_DIR: str = ""
+    # Seconds between the snapshots of a worker's metrics
+    METRICS_SNAPSHOT_INTERVAL: float = 5
+
+    # Profile requests carrying a token signed with PROFILER_SECRET, see
+    # main.commands.create_profiler_token, and a share of the others
+    PROFILER_ENABLED: bool = False
+    PROFILER_SECRET: str = ""
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_DIR: str = "profiles"
+    PROFILER_MAX_CAPTURES: int = 100
+
+    # Add a Server-Timing header breaking the time of each request down
+    SERVER_TIMING_ENABLED: bool = False
 
     SQLALCHEMY_DATABASE_URI: str
     SQLALCHEMY_ENGINE_OPTIONS: dict = {}
     SQLALCHEMY_ECHO: bool = False
+    # Read-only replicas, pure SELECTs are spread across them when configured
+    SQLALCHEMY_REPLICA_URIS: list[str] = []
+    # Seconds a replica is skipped for after a connection failure
+    SQLALCHEMY_REPLICA_COOLDOWN: int = 30
+    # Statements slower than this many seconds are logged and kept, 0 disables it
+    SLOW_QUERY_THRESHOLD: float = 0.5
+    SLOW_QUERY_LOG_SIZE: int = 100
+    # Whether bound parameters are kept and logged. Off by default, they hold
+    # personal data such as emails and password hashes
+    SLOW_QUERY_PARAMETERS: bool = False
+    # Run EXPLAIN for slow SELECTs, each at most once per interval in seconds
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_EXPLAIN_INTERVAL: float = 60
     JWT_LIFETIME: int = 31536000
     JWT_SECRET: str
+    # Verified access tokens kept until they expire, 0 entries disables it
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+
+    # bcrypt work factor of new password hashes, each step doubles the cost
+    PASSWORD_HASH_ROUNDS: int = 12
+    # Threads hashing passwords, and calls left waiting before answering 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_BACKLOG: int = 16
+
+    # Entity cache in front of category and item lookups, 0 entries disables it.
+    # Without a bus, a write on one worker leaves the other workers serving the
+    # old rows for up to ENTITY_CACHE_TTL seconds, so the cache is only on by
+    # default, with 10000 entries, when ENTITY_CACHE_BUS_URI is set
+    ENTITY_CACHE_SIZE: int = 0
+    ENTITY_CACHE_TTL: int = 300
+    # Where invalidations are broadcast to other workers, e.g. sqlite:///bus.db
+    ENTITY_CACHE_BUS_URI: str = ""
+    # File keeping the hottest keys across restarts, to warm the cache on startup
+    ENTITY_CACHE_WARM_FILE: str = ""
+    ENTITY_CACHE_WARM_SIZE: int = 100
+
+    # Cache of item listing pages: "" disables it, "memory://" keeps it in each
+    # worker, "redis://host:port/db" shares it between workers. Pages kept in a
+    # worker only follow the writes of the others through ENTITY_CACHE_BUS_URI,
+    # without it they are stale for up to RESPONSE_CACHE_TTL plus
+    # RESPONSE_CACHE_STALE_TTL seconds. Defaults to "memory://" when the bus is
+    # set
+    RESPONSE_CACHE_URI: str = ""
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_TTL: int = 30
+    # Seconds a page is still served while one request rebuilds it
+    RESPONSE_CACHE_STALE_TTL: int = 30
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
@@ -20,6 +103,14 @@ class Config(BaseSettings):
         extra="ignore",
     )
 
+    @model_validator(mode="before")
+    @classmethod
+    def _enable_caches_with_a_bus(cls, values: dict) -> dict:
+        if values.get("ENTITY_CACHE_BUS_URI"):
+            values.setdefault("ENTITY_CACHE_SIZE", 10000)
+            values.setdefault("RESPONSE_CACHE_URI", "memory://")
+        return values
+
 
 environment = os.environ.get("ENVIRONMENT", "local")
 config = Config(
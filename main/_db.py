@@ -1,27 +1,128 @@
+import itertools
 import secrets
+import time
 from collections.abc import Awaitable, Callable
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 from contextvars import ContextVar
 from functools import wraps
-from typing import ParamSpec, TypeVar
+from typing import Any, ParamSpec, TypeVar
 
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine, ExceptionContext
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session
 
 from ._config import config
+from .commons.exceptions import ErrorCode, ErrorMessage, InternalServerError
+from .libs.pool_metrics import get_pool_stats, instrument_engine, timed_pool_class
+from .libs.slow_queries import SKIP_OPTION, SlowQueryLog
 
 T = TypeVar("T")
 P = ParamSpec("P")
 
+# Set while pure reads go to the primary too, see Database.reading_primary
+_reading_primary: ContextVar[bool] = ContextVar("reading_primary", default=False)
+
 
 def generate_request_id() -> str:
     return secrets.token_hex()
 
 
+class ReplicaSet:
+    """
+    A round-robin pool of read replica engines.
+
+    A replica whose connection fails is left out for ``cooldown`` seconds. When
+    every replica is out, ``choose`` returns None and reads go to the primary.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], cooldown: float):
+        self.engines = engines
+        self.cooldown = cooldown
+        self._unhealthy_until: dict[AsyncEngine, float] = {}
+        self._counter = itertools.count()
+
+        for engine in engines:
+            event.listen(
+                engine.sync_engine,
+                "handle_error",
+                self._make_error_handler(engine),
+            )
+
+    def _make_error_handler(self, engine: AsyncEngine):
+        def handle_error(context: ExceptionContext):
+            # No connection means the error was raised while connecting
+            if context.is_disconnect or context.connection is None:
+                self.mark_unhealthy(engine)
+
+        return handle_error
+
+    def mark_unhealthy(self, engine: AsyncEngine):
+        self._unhealthy_until[engine] = time.monotonic() + self.cooldown
+
+    def choose(self) -> AsyncEngine | None:
+        now = time.monotonic()
+        healthy = [
+            engine
+            for engine in self.engines
+            if self._unhealthy_until.get(engine, 0) <= now
+        ]
+        if not healthy:
+            return None
+
+        return healthy[next(self._counter) % len(healthy)]
+
+
+class RoutingSession(Session):
+    """
+    Send pure SELECTs to a replica and everything else to the primary.
+
+    Once a session has written, it stays on the primary so that the rest of the
+    request reads its own writes. Sessions live for one request, so does this.
+    Reads made within ``Database.reading_primary`` go to the primary as well.
+    """
+
+    replica_set: ReplicaSet | None = None
+
+    def get_bind(self, mapper=None, *, clause=None, **kw: Any):
+        replica_set = self.replica_set
+        if replica_set and replica_set.engines and not self.info.get("sticky"):
+            if not self._flushing and _is_pure_read(clause):
+                replica = None if _reading_primary.get() else replica_set.choose()
+                if replica is not None:
+                    return replica.sync_engine
+            else:
+                self.info["sticky"] = True
+
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def _is_pure_read(clause) -> bool:
+    # SELECT ... FOR UPDATE takes locks, so it belongs on the primary
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class QueryStats:
+    """
+    SQL statements issued within a scope (request) and the time spent on them.
+    """
+
+    __slots__ = ("budget", "duration", "request", "statements")
+
+    def __init__(self, request: dict | None = None):
+        self.statements = 0
+        self.duration = 0.0
+        self.budget: int | None = None
+        # ASGI scope of the request, if the scope serves one
+        self.request = request
+
+
 class Database:
     """
     Set up and contain our database connections.
@@ -36,6 +137,13 @@ class Database:
     We only store a random string in the context var and let scoped session do
     the heavy lifting. This allows us to easily start a new session or get the
     existing one using the async_scoped_session mechanism.
+
+    When read replicas are configured, sessions route pure SELECTs to them and
+    everything else to the primary ``engine``, see ``RoutingSession``.
+
+    Every statement executed inside a scope is counted in that scope's
+    ``QueryStats``, see ``query_stats`` and ``query_budget``. The slow ones are
+    kept by ``slow_query_log``.
     """
 
     def __init__(self):
@@ -44,16 +152,34 @@ class Database:
             default="",
         )
 
-        self.engine = create_async_engine(
-            config.SQLALCHEMY_DATABASE_URI,
-            echo=config.SQLALCHEMY_ECHO,
-            pool_pre_ping=True,
-            **config.SQLALCHEMY_ENGINE_OPTIONS,
+        self.engine_names: list[str] = []
+        # Sync engine, as found on connections -> async engine and its name
+        self.engines: dict[Engine, tuple[AsyncEngine, str]] = {}
+        self.slow_query_log = SlowQueryLog(
+            threshold=config.SLOW_QUERY_THRESHOLD,
+            max_entries=config.SLOW_QUERY_LOG_SIZE,
+            parameters=config.SLOW_QUERY_PARAMETERS,
+            explain=config.SLOW_QUERY_EXPLAIN,
+            explain_interval=config.SLOW_QUERY_EXPLAIN_INTERVAL,
+        )
+        self.scope_query_stats: dict[str, QueryStats] = {}
+        self.query_budget_enabled = config.ENVIRONMENT in ("local", "test")
+        self.engine = self._create_engine(config.SQLALCHEMY_DATABASE_URI, "primary")
+        self.replica_set = ReplicaSet(
+            [
+                self._create_engine(uri, f"replica-{index}")
+                for index, uri in enumerate(config.SQLALCHEMY_REPLICA_URIS)
+            ],
+            config.SQLALCHEMY_REPLICA_COOLDOWN,
         )
 
+        class DatabaseRoutingSession(RoutingSession):
+            replica_set = self.replica_set
+
         self.session_factory = async_sessionmaker(
             bind=self.engine,
             class_=AsyncSession,
+            sync_session_class=DatabaseRoutingSession,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
@@ -64,6 +190,134 @@ class Database:
             self._scope_func,
         )
 
+    def _create_engine(self, uri: str, name: str) -> AsyncEngine:
+        engine = create_async_engine(
+            uri,
+            echo=config.SQLALCHEMY_ECHO,
+            pool_pre_ping=True,
+            **{"poolclass": timed_pool_class(name), **config.SQLALCHEMY_ENGINE_OPTIONS},
+        )
+        instrument_engine(engine, name)
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            self._before_cursor_execute,
+        )
+        event.listen(
+            engine.sync_engine,
+            "after_cursor_execute",
+            self._after_cursor_execute,
+        )
+        event.listen(engine.sync_engine, "handle_error", self._handle_error)
+        self.engine_names.append(name)
+        self.engines[engine.sync_engine] = (engine, name)
+
+        return engine
+
+    def pool_stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get the connection-pool telemetry of the primary and replica engines.
+        """
+        return {name: get_pool_stats(name) for name in self.engine_names}
+
+    def _before_cursor_execute(self, connection, *_: Any):
+        stats = self.query_stats()
+        if stats is None or connection.get_execution_options().get(SKIP_OPTION):
+            return
+
+        if stats.budget is not None and stats.statements >= stats.budget:
+            raise InternalServerError(
+                error_message=ErrorMessage.QUERY_BUDGET_EXCEEDED,
+                error_code=ErrorCode.QUERY_BUDGET_EXCEEDED,
+                error_data={"budget": stats.budget},
+            )
+
+        stats.statements += 1
+        # A connection runs one statement at a time
+        connection.info["query_start_time"] = time.perf_counter()
+
+    def _after_cursor_execute(
+        self,
+        connection,
+        cursor,
+        statement: str,
+        parameters: Any,
+        *_: Any,
+    ):
+        stats = self.query_stats()
+        if stats is None or connection.get_execution_options().get(SKIP_OPTION):
+            return
+
+        start_time = connection.info.pop("query_start_time", None)
+        if start_time is None:
+            return
+
+        duration = time.perf_counter() - start_time
+        stats.duration += duration
+
+        engine, name = self.engines[connection.engine]
+        route = getattr((stats.request or {}).get("route"), "path", None)
+        self.slow_query_log.record(
+            engine,
+            name,
+            statement,
+            parameters,
+            duration,
+            rows=cursor.rowcount if cursor.rowcount >= 0 else None,
+            request_id=self.request_id_context.get(),
+            route=route,
+        )
+
+    @staticmethod
+    def _handle_error(context: ExceptionContext):
+        # No after_cursor_execute follows a failed statement
+        if context.connection is not None:
+            context.connection.info.pop("query_start_time", None)
+
+    def query_stats(self) -> QueryStats | None:
+        """
+        Get the statistics of the current scope, None outside of any scope.
+        """
+        return self.scope_query_stats.get(self.request_id_context.get())
+
+    def query_budget(self, max_statements: int) -> Callable[[], Awaitable[None]]:
+        """
+        Build a route dependency capping the number of SQL statements the request
+        may run. Going over it fails the request, but only in local and test
+        environments, so that N+1 queries and extra round trips are caught early:
+
+            @router.get("/items", dependencies=[Depends(db.query_budget(2))])
+        """
+
+        async def set_query_budget():
+            stats = self.query_stats()
+            if stats is not None and self.query_budget_enabled:
+                stats.budget = max_statements
+
+        return set_query_budget
+
+    def extend_query_budget(self, statements: int):
+        """
+        Allow the current request more statements than its route's budget, for a
+        slow path whose statements grow with the input, e.g. a batch retried one
+        row at a time.
+        """
+        stats = self.query_stats()
+        if stats is not None and stats.budget is not None:
+            stats.budget += statements
+
+    @contextmanager
+    def reading_primary(self):
+        """
+        Send the pure reads made within to the primary, for those that must not
+        lag behind it, e.g. the rows filling a cache after an invalidation.
+        """
+        token = _reading_primary.set(True)
+        try:
+            yield
+        finally:
+            _reading_primary.reset(token)
+
     def _scope_func(self) -> str:
         return self.request_id_context.get()
 
@@ -72,22 +326,30 @@ class Database:
         return self.scoped_session()
 
     @asynccontextmanager
-    async def scope(self):
+    async def scope(self, request: dict | None = None):
         """
         Create a new database session (scope).
 
-        This creates a new database session to handle all the database connection
-        from a single scope (request). This method should typically only been called
-        in request middleware.
-        """
+        This opens a new scope to handle all the database connection from a single
+        scope (request). The session itself is created lazily, on the first access
+        to ``db.session``, so a scope that never touches the database costs neither
+        a session nor a pooled connection. This method should typically only been
+        called in request middleware.
 
-        token = self.request_id_context.set(generate_request_id())
-        self.scoped_session()
+        :param request: ASGI scope of the request served, if any
+        """
 
-        yield
+        request_id = generate_request_id()
+        token = self.request_id_context.set(request_id)
+        self.scope_query_stats[request_id] = QueryStats(request)
 
-        await self.scoped_session.remove()
-        self.request_id_context.reset(token)
+        try:
+            yield
+        finally:
+            if self.scoped_session.registry.has():
+                await self.scoped_session.remove()
+            del self.scope_query_stats[request_id]
+            self.request_id_context.reset(token)
 
     def with_scope(self, f: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
         @wraps(f)
@@ -0,0 +1,22 @@
+"""
+Create a token for the profiler: requests carrying it in the X-Profiler-Token
+header are profiled, and it grants access to the captures under /admin/profiles.
+
+Usage: python -m main.commands.create_profiler_token [--lifetime 3600]
+"""
+
+import argparse
+import sys
+
+from main import config
+from main.utils.profiler import create_profiler_token
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lifetime", type=int, default=3600, help="in seconds")
+    arguments = parser.parse_args()
+
+    if not config.PROFILER_SECRET:
+        sys.exit("Set PROFILER_SECRET to sign profiler tokens")
+
+    sys.stdout.write(create_profiler_token(arguments.lifetime) + "\n")
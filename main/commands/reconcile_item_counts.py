@@ -0,0 +1,32 @@
+"""
+Rebuild the denormalized ``category.item_count`` counters.
+
+The counters are maintained in the same transaction as every item write, so this
+is only needed after out-of-band changes to the ``item`` table (manual fixes,
+data imports, restored backups).
+
+Usage: python -m main.commands.reconcile_item_counts
+"""
+
+import asyncio
+
+from main import db
+from main.engines.categories import reconcile_item_counts
+from main.libs.log import get_logger
+
+logger = get_logger(__name__)
+
+
+@db.with_scope
+async def reconcile():
+    updated = await reconcile_item_counts()
+    logger.info("Reconciled category item counts", data={"updated": updated})
+
+
+async def main():
+    await reconcile()
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,6 +10,7 @@ class StatusCode:
     NOT_FOUND = 404
     METHOD_NOT_ALLOWED = 405
     INTERNAL_SERVER_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
 
 
 class ErrorCode:
@@ -18,6 +19,7 @@ class ErrorCode:
     CATEGORY_NAME_EXISTS = 400002
     ACCOUNT_ALREADY_REGISTERED = 400003
     ITEM_NAME_EXISTS = 400004
+    INVALID_CURSOR = 400005
 
     UNAUTHORIZED = 401000
 
@@ -28,6 +30,8 @@ class ErrorCode:
 
     METHOD_NOT_ALLOWED = 405000
     INTERNAL_SERVER_ERROR = 500000
+    QUERY_BUDGET_EXCEEDED = 500001
+    SERVICE_UNAVAILABLE = 503000
 
 
 class _ErrorMessage:
@@ -38,6 +42,7 @@ class _ErrorMessage:
     NOT_FOUND = "Not found."
     METHOD_NOT_ALLOWED = "Method not allowed."
     INTERNAL_SERVER_ERROR = "Internal server error."
+    SERVICE_UNAVAILABLE = "Service unavailable."
 
 
 class BaseError(Exception):
@@ -111,9 +116,18 @@ class InternalServerError(BaseError):
     error_code = ErrorCode.INTERNAL_SERVER_ERROR
 
 
+class ServiceUnavailable(BaseError):
+    status_code = StatusCode.SERVICE_UNAVAILABLE
+    error_message = _ErrorMessage.SERVICE_UNAVAILABLE
+    error_code = ErrorCode.SERVICE_UNAVAILABLE
+
+
 class ErrorMessage:
     ACCOUNT_ALREADY_REGISTERED = "Your email is already registered. Please log in."
     CATEGORY_NAME_EXISTS = "Category name already exists."
     ITEM_NAME_EXISTS = "Item name already exists."
     NOT_CREATOR = "Only the creator can perform the action."
+    INVALID_CURSOR = "Invalid pagination cursor."
+    QUERY_BUDGET_EXCEEDED = "The route ran more SQL statements than its budget."
     INVALID_LOGIN_CREDENTIALS = "Your login information is incorrect. Please try again."
+    PASSWORD_HASHING_BUSY = "Too many sign-ins at the moment. Please try again later."
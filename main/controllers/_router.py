@@ -2,11 +2,13 @@
 
 from fastapi import APIRouter
 
-from . import authentication, categories, items, probe
+from . import authentication, categories, items, metrics, probe, profiles
 
 router = APIRouter()
 
 router.include_router(probe.router, tags=["probe"])
+router.include_router(metrics.router, tags=["metrics"])
+router.include_router(profiles.router, tags=["admin"])
 router.include_router(items.router, tags=["items"])
 router.include_router(authentication.router, tags=["auth"])
 router.include_router(categories.router, tags=["categories"])
@@ -1,13 +1,21 @@
 from fastapi import APIRouter
 from sqlalchemy.exc import IntegrityError
 
+from main import db
 from main.commons import exceptions
-from main.commons.exceptions import ErrorCode, ErrorMessage, Unauthorized
+from main.commons.exceptions import (
+    ErrorCode,
+    ErrorMessage,
+    ServiceUnavailable,
+    Unauthorized,
+)
+from main.commons.responses import SchemaRoute
 from main.engines.users import add_user, get_user_by_email, verify_password
+from main.libs.worker_pool import WorkerPoolFull
 from main.schemas.authentication import AccessTokenSchema, LoginSchema, SignUpSchema
 from main.utils import auth
 
-router: APIRouter = APIRouter()
+router: APIRouter = APIRouter(route_class=SchemaRoute)
 
 
 @router.post("/register", response_model=AccessTokenSchema)
@@ -20,15 +28,28 @@ async def _add_user(user: SignUpSchema):
             error_message=ErrorMessage.ACCOUNT_ALREADY_REGISTERED,
             error_code=ErrorCode.ACCOUNT_ALREADY_REGISTERED,
         )
+    except WorkerPoolFull:
+        raise ServiceUnavailable(error_message=ErrorMessage.PASSWORD_HASHING_BUSY)
 
 
 @router.post("/login", response_model=AccessTokenSchema)
 async def _authenticate_user(user_data: LoginSchema):
     user = await get_user_by_email(user_data.email)
+    # Hand the connection back before waiting on the hashing pool, whose queue is
+    # longer than the database pool has connections
+    await db.session.commit()
 
-    if user and verify_password(user_data.password, user.hashed_password):
-        return AccessTokenSchema(
-            access_token=auth.create_access_token_from_id(user.id),
+    try:
+        verified = user is not None and await verify_password(
+            user_data.password,
+            user.hashed_password,
         )
+    except WorkerPoolFull:
+        raise ServiceUnavailable(error_message=ErrorMessage.PASSWORD_HASHING_BUSY)
+
+    if user is None or not verified:
+        raise Unauthorized(error_message=ErrorMessage.INVALID_LOGIN_CREDENTIALS)
 
-    raise Unauthorized(error_message=ErrorMessage.INVALID_LOGIN_CREDENTIALS)
+    return AccessTokenSchema(
+        access_token=auth.create_access_token_from_id(user.id),
+    )
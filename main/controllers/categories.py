@@ -1,67 +1,122 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 
+from main import db
+from main.commons.responses import SchemaRoute
 from main.engines.categories import (
     add_category,
     delete_category,
     get_categories,
 )
 from main.schemas.base import Empty
-from main.schemas.category import CategoryCreatePayloadSchema, CategorySchema
+from main.schemas.category import (
+    CategoriesSchema,
+    CategoryCreatePayloadSchema,
+    CategorySchema,
+)
 from main.utils.auth import RequestedUserId, require_authentication
 from main.utils.category import (
     RequestedCategory,
+    get_categories_page,
+    get_category_etag,
+    get_category_list_schemas,
     get_category_schema,
-    require_category_creator,
-    validate_category_name,
+    raise_category_write_error,
+    raise_on_duplicate_category_name,
+    stream_categories_json,
 )
 from main.utils.common import PositiveIntPath
+from main.utils.conditional import get_conditional_response
+
+router: APIRouter = APIRouter(route_class=SchemaRoute)
+
 
-router: APIRouter = APIRouter()
+DEFAULT_CATEGORIES_PER_PAGE = 20
 
 
 @router.get(
     "/categories",
-    response_model=list[CategorySchema],
+    response_model=list[CategorySchema] | CategoriesSchema,
+    dependencies=[Depends(db.query_budget(1))],
 )
-async def _get_categories(user_id: RequestedUserId):
-    return [
-        get_category_schema(category, user_id) for category in await get_categories()
-    ]
+async def _get_categories(
+    user_id: RequestedUserId,
+    number_per_page: Annotated[int | None, Query(ge=1)] = None,
+    cursor: str | None = None,
+    stream: bool = False,
+):
+    # Pages are only returned when asked for, every category is listed otherwise
+    if number_per_page is not None or cursor is not None:
+        number_per_page = number_per_page or DEFAULT_CATEGORIES_PER_PAGE
+        categories, next_cursor, prev_cursor = await get_categories_page(
+            number_per_page,
+            cursor=cursor,
+        )
+
+        return CategoriesSchema(
+            categories=get_category_list_schemas(categories, user_id),
+            number_per_page=number_per_page,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+        )
+
+    # The same array written in chunks, for clients that ask for it. An error
+    # after the first chunk can only cut the array short, the status is sent
+    if stream:
+        return StreamingResponse(
+            stream_categories_json(user_id),
+            media_type="application/json",
+        )
+
+    return get_category_list_schemas(await get_categories(), user_id)
 
 
 @router.post(
     "/categories",
     response_model=CategorySchema,
+    dependencies=[Depends(db.query_budget(1))],
 )
 async def _add_category(
     category: CategoryCreatePayloadSchema,
     user_id: Annotated[int, Depends(require_authentication)],
 ):
-    await validate_category_name(category.name)
-    return get_category_schema(
-        await add_category(**category.__dict__, creator_id=user_id),
-        user_id,
-    )
+    with raise_on_duplicate_category_name():
+        new_category = await add_category(**category.__dict__, creator_id=user_id)
+
+    return get_category_schema(new_category, user_id)
 
 
 @router.get(
     "/categories/{category_id}",
     response_model=CategorySchema,
+    dependencies=[Depends(db.query_budget(1))],
 )
-async def _get_category(category: RequestedCategory, user_id: RequestedUserId):
-    return get_category_schema(category, user_id)
+async def _get_category(
+    request: Request,
+    category: RequestedCategory,
+    user_id: RequestedUserId,
+):
+    return get_conditional_response(
+        request,
+        lambda: get_category_schema(category, user_id),
+        etag=get_category_etag(category, user_id),
+        last_modified=category.updated_at,
+    )
 
 
 @router.delete(
     "/categories/{category_id}",
     response_model=Empty,
-    dependencies=[Depends(require_category_creator)],
+    # One DELETE, plus one SELECT to tell 403 from 404 when nothing is deleted
+    dependencies=[Depends(db.query_budget(2))],
 )
 async def _delete_category(
     category_id: PositiveIntPath,
+    user_id: Annotated[int, Depends(require_authentication)],
 ):
-    await delete_category(category_id)
+    if not await delete_category(category_id, creator_id=user_id):
+        await raise_category_write_error(category_id)
 
     return Empty()
@@ -1,32 +1,43 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
+from main import db
+from main.commons.exceptions import ErrorCode, ErrorMessage, NotFound
+from main.commons.responses import SchemaRoute
+from main.engines.categories import category_exists
 from main.engines.items import (
     add_item,
-    count_items,
+    add_items,
     delete_item,
-    get_items,
     update_item,
 )
 from main.schemas.base import Empty
 from main.schemas.item import (
     CategoryItemsSchema,
+    ItemBatchCreatePayloadSchema,
+    ItemBatchResultSchema,
+    ItemBatchSchema,
     ItemCreatePayloadSchema,
     ItemSchema,
     ItemUpdatePayloadSchema,
 )
 from main.utils.auth import RequestedUserId, require_authentication
-from main.utils.category import get_category_from_request
 from main.utils.common import PositiveIntPath, PositiveIntQuery
+from main.utils.conditional import get_conditional_response
 from main.utils.item import (
     RequestedItem,
+    get_cached_category_items_page,
+    get_item_etag,
+    get_item_list_etag,
     get_item_schema,
-    require_item_creator,
-    validate_item_name,
+    get_plain_item_schema,
+    get_taken_item_names,
+    raise_item_write_error,
+    raise_on_duplicate_item_name,
 )
 
-router: APIRouter = APIRouter()
+router: APIRouter = APIRouter(route_class=SchemaRoute)
 
 
 DEFAULT_ITEMS_PER_PAGE = 20
@@ -35,82 +46,165 @@ DEFAULT_ITEMS_PER_PAGE = 20
 @router.get(
     "/categories/{category_id}/items",
     response_model=CategoryItemsSchema,
-    dependencies=[Depends(get_category_from_request)],
+    dependencies=[Depends(db.query_budget(2))],
 )
 async def _get_category_items(
+    request: Request,
     category_id: PositiveIntPath,
     user_id: RequestedUserId,
     page: PositiveIntQuery = 1,
     number_per_page: PositiveIntQuery = DEFAULT_ITEMS_PER_PAGE,
+    cursor: str | None = None,
+    with_total: bool = True,
 ):
-    items = await get_items(
+    items_page = await get_cached_category_items_page(
         category_id,
-        (page - 1) * number_per_page,
         number_per_page,
+        page=page,
+        cursor=cursor,
+        with_total=with_total,
     )
-    total = await count_items(category_id)
 
-    return CategoryItemsSchema(
-        items=[get_item_schema(item, user_id) for item in items],
-        total=total,
-        page=page,
-        number_per_page=number_per_page,
+    return get_conditional_response(
+        request,
+        lambda: CategoryItemsSchema(
+            items=[get_plain_item_schema(item, user_id) for item in items_page.items],
+            total=items_page.total,
+            page=items_page.page,
+            number_per_page=number_per_page,
+            next_cursor=items_page.next_cursor,
+            prev_cursor=items_page.prev_cursor,
+        ),
+        etag=get_item_list_etag(items_page, user_id),
     )
 
 
 @router.post(
     "/categories/{category_id}/items",
     response_model=ItemSchema,
-    dependencies=[Depends(get_category_from_request)],
+    dependencies=[Depends(db.query_budget(2))],
 )
 async def _add_category_items(
     category_id: PositiveIntPath,
     user_id: Annotated[int, Depends(require_authentication)],
     item_data: ItemCreatePayloadSchema,
 ):
-    await validate_item_name(item_data.name)
+    with raise_on_duplicate_item_name():
+        item = await add_item(
+            **item_data.model_dump(),
+            creator_id=user_id,
+            category_id=category_id,
+        )
 
-    item = await add_item(
-        **item_data.model_dump(),
-        creator_id=user_id,
-        category_id=category_id,
-    )
+    if not item:
+        raise NotFound()
 
     return get_item_schema(item, user_id)
 
 
-@router.get("/items/{item_id}", response_model=ItemSchema)
+@router.post(
+    "/categories/{category_id}/items:batch",
+    response_model=ItemBatchSchema,
+    dependencies=[Depends(db.query_budget(4))],
+)
+async def _add_category_items_batch(
+    category_id: PositiveIntPath,
+    user_id: Annotated[int, Depends(require_authentication)],
+    batch_data: ItemBatchCreatePayloadSchema,
+):
+    taken = await get_taken_item_names([item.name for item in batch_data.items])
+    new_items = [
+        item.model_dump()
+        for item, is_taken in zip(batch_data.items, taken, strict=True)
+        if not is_taken
+    ]
+
+    # Names the pre-check missed, e.g. equal to others only under the collation,
+    # are rejected by the unique index and come back as None
+    created_items = {}
+    if new_items:
+        items = await add_items(
+            new_items,
+            category_id=category_id,
+            creator_id=user_id,
+        )
+        if items is None:
+            raise NotFound()
+        created_items = {
+            new_item["name"]: item
+            for new_item, item in zip(new_items, items, strict=True)
+        }
+    elif not await category_exists(category_id):
+        raise NotFound()
+
+    results = []
+    for item, is_taken in zip(batch_data.items, taken, strict=True):
+        created_item = None if is_taken else created_items[item.name]
+        if created_item is None:
+            results.append(
+                ItemBatchResultSchema(
+                    error_message=ErrorMessage.ITEM_NAME_EXISTS,
+                    error_code=ErrorCode.ITEM_NAME_EXISTS,
+                ),
+            )
+        else:
+            results.append(
+                ItemBatchResultSchema(item=get_item_schema(created_item, user_id)),
+            )
+
+    return ItemBatchSchema(items=results)
+
+
+@router.get(
+    "/items/{item_id}",
+    response_model=ItemSchema,
+    dependencies=[Depends(db.query_budget(1))],
+)
 async def _get_item(
+    request: Request,
     item: RequestedItem,
     user_id: RequestedUserId,
 ):
-    return get_item_schema(item, user_id)
+    return get_conditional_response(
+        request,
+        lambda: get_item_schema(item, user_id),
+        etag=get_item_etag(item, user_id),
+        last_modified=item.updated_at,
+    )
 
 
 @router.put(
     "/items/{item_id}",
     response_model=ItemSchema,
+    # The item is read back after the UPDATE on MySQL, which has no RETURNING
+    dependencies=[Depends(db.query_budget(2))],
 )
 async def _update_item(
-    item: RequestedItem,
+    item_id: PositiveIntPath,
     item_data: ItemUpdatePayloadSchema,
-    user_id: Annotated[int, Depends(require_item_creator)],
+    user_id: Annotated[int, Depends(require_authentication)],
 ):
-    if item_data.name:
-        await validate_item_name(item_data.name)
+    with raise_on_duplicate_item_name():
+        item = await update_item(item_id, user_id, **item_data.model_dump())
 
-    updated_item = await update_item(item.id, **item_data.model_dump())
-    return get_item_schema(updated_item, user_id)
+    if not item:
+        await raise_item_write_error(item_id)
+
+    return get_item_schema(item, user_id)
 
 
 @router.delete(
     "/items/{item_id}",
     response_model=Empty,
-    dependencies=[Depends(require_item_creator)],
+    # The DELETE and the counter, plus the item's category read first on MySQL,
+    # which has no DELETE RETURNING
+    dependencies=[Depends(db.query_budget(3))],
 )
 async def _delete_item(
     item_id: PositiveIntPath,
+    user_id: Annotated[int, Depends(require_authentication)],
 ):
-    await delete_item(item_id)
+    if not await delete_item(item_id, creator_id=user_id):
+        await raise_item_write_error(item_id)
 
     return Empty()
@@ -0,0 +1,34 @@
+import asyncio
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from main import config
+from main.libs.metrics import registry
+from main.libs.multiprocess_metrics import MultiprocessMetrics
+from main.middlewares import no_db_session
+from main.utils.metrics import require_metrics_token
+
+router = APIRouter()
+
+multiprocess_metrics = MultiprocessMetrics(
+    registry,
+    directory=config.METRICS_DIR,
+    interval=config.METRICS_SNAPSHOT_INTERVAL,
+)
+
+
+class PrometheusResponse(PlainTextResponse):
+    media_type = "text/plain; version=0.0.4"
+
+
+@router.get(
+    "/metrics",
+    response_class=PrometheusResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_token)],
+)
+@no_db_session
+async def get_metrics():
+    # Reading the snapshots of the other workers blocks
+    return await asyncio.to_thread(multiprocess_metrics.render)
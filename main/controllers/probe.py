@@ -1,13 +1,17 @@
 from fastapi import APIRouter
 
+from main.middlewares import no_db_session
+
 router = APIRouter()
 
 
 @router.get("/pings")
+@no_db_session
 async def ping():
     return {}
 
 
 @router.get("/ready")
+@no_db_session
 async def is_ready():
     return {}
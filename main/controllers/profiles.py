@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse
+
+from main.commons.exceptions import NotFound
+from main.commons.responses import SchemaRoute
+from main.middlewares import no_db_session
+from main.schemas.profile import ProfilesSchema
+from main.utils.profiler import profiler, require_profiler_token
+
+router = APIRouter(
+    prefix="/admin/profiles",
+    route_class=SchemaRoute,
+    dependencies=[Depends(require_profiler_token)],
+)
+
+
+@router.get("", response_model=ProfilesSchema, include_in_schema=False)
+@no_db_session
+async def _get_profiles():
+    return ProfilesSchema(profiles=profiler.captures())
+
+
+@router.get("/{name}", include_in_schema=False)
+async def _get_profile(name: str):
+    path = profiler.path(name)
+    if path is None:
+        raise NotFound()
+
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
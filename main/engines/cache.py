@@ -0,0 +1,232 @@
+import json
+import os
+from collections.abc import Awaitable, Callable, Iterable
+from typing import TypeVar, cast
+
+from sqlalchemy import event, select
+
+from main import config, db
+from main._db import RoutingSession
+from main.libs.cache import LRUCache
+from main.libs.invalidation_bus import create_invalidation_bus
+from main.libs.log import get_logger
+from main.libs.response_cache import ResponseCache, create_response_cache_backend
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+
+logger = get_logger(__name__)
+
+Model = TypeVar("Model", CategoryModel, ItemModel)
+# Models with a cache each, typed so that mypy does not join them into the mixin
+CACHED_MODELS: tuple[type[CategoryModel] | type[ItemModel], ...] = (
+    CategoryModel,
+    ItemModel,
+)
+
+_PENDING_INVALIDATIONS = "entity_cache_invalidations"
+
+# Namespace of the invalidations of the item listing of a category
+CATEGORY_ITEMS = "category_items"
+
+
+def _column_values(instance: CategoryModel | ItemModel) -> dict:
+    return {
+        column.key: getattr(instance, column.key)
+        for column in instance.__mapper__.column_attrs
+    }
+
+
+class EntityCache:
+    """
+    Cache categories and items by primary key, in front of their lookups.
+
+    Entries hold column values and every hit builds a new transient instance, so
+    cached rows are never shared between sessions. The ``item_count`` of a cached
+    category may be stale, read the category from the database when it matters.
+
+    Writes register the rows they change with ``invalidate_on_commit``. Once the
+    transaction commits, the rows are dropped here and, through the invalidation
+    bus, on every other worker. Dropping a category also drops its items, which
+    the database deletes by cascade. Other caches ``subscribe`` to invalidations
+    to follow the same path.
+    """
+
+    def __init__(self):
+        self.caches = {
+            model.__tablename__: LRUCache(
+                model.__tablename__,
+                config.ENTITY_CACHE_SIZE,
+                config.ENTITY_CACHE_TTL,
+            )
+            for model in CACHED_MODELS
+        }
+        self.bus = create_invalidation_bus(config.ENTITY_CACHE_BUS_URI)
+        self._subscribers: dict[str, list[Callable[[int, bool], None]]] = {}
+
+        event.listen(RoutingSession, "after_commit", self._after_commit)
+        event.listen(RoutingSession, "after_rollback", self._after_rollback)
+
+    async def get(
+        self,
+        model: type[Model],
+        id: int,
+        load: Callable[[int], Awaitable[Model | None]],
+    ) -> Model | None:
+        cache = self.caches[model.__tablename__]
+
+        values = cache.get(id)
+        if values is not None:
+            return model(**values)
+
+        generation = cache.generation
+        # A replica lagging behind could put back a row just invalidated, to be
+        # served for the whole TTL
+        with db.reading_primary():
+            instance = await load(id)
+        if instance is not None:
+            cache.set(id, _column_values(instance), generation)
+
+        return instance
+
+    def invalidate_on_commit(self, model: type[Model], id: int):
+        self._invalidate_on_commit(f"{model.__tablename__}:{id}")
+
+    def invalidate_category_items_on_commit(self, category_id: int):
+        self._invalidate_on_commit(f"{CATEGORY_ITEMS}:{category_id}")
+
+    def _invalidate_on_commit(self, key: str):
+        db.session.info.setdefault(_PENDING_INVALIDATIONS, set()).add(key)
+
+    def subscribe(self, namespace: str, callback: Callable[[int, bool], None]):
+        """
+        Call ``callback`` with the id of each invalidated key of the namespace,
+        and whether another worker invalidated it. Those calls come from the
+        thread of the invalidation bus.
+        """
+        self._subscribers.setdefault(namespace, []).append(callback)
+
+    def invalidate(self, key: str, remote: bool = False):
+        namespace, id = key.split(":")
+
+        if namespace in self.caches:
+            self.caches[namespace].invalidate(int(id))
+
+        if namespace == CategoryModel.__tablename__:
+            self.caches[ItemModel.__tablename__].invalidate_matching(
+                lambda values: values["category_id"] == int(id),
+            )
+
+        for callback in self._subscribers.get(namespace, ()):
+            callback(int(id), remote)
+
+    def _invalidate_remote(self, key: str):
+        self.invalidate(key, remote=True)
+
+    def _after_commit(self, session):
+        for key in session.info.pop(_PENDING_INVALIDATIONS, ()):
+            self.invalidate(key)
+            self.bus.publish(key)
+
+    def _after_rollback(self, session):
+        session.info.pop(_PENDING_INVALIDATIONS, None)
+
+    def clear(self):
+        for cache in self.caches.values():
+            cache.clear()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {table: cache.stats() for table, cache in self.caches.items()}
+
+    async def start(self):
+        self.bus.start(self._invalidate_remote)
+
+        if config.ENTITY_CACHE_WARM_FILE:
+            await self._warm(config.ENTITY_CACHE_WARM_FILE)
+
+    async def stop(self):
+        if config.ENTITY_CACHE_WARM_FILE:
+            self._save_hottest(config.ENTITY_CACHE_WARM_FILE)
+
+        self.bus.stop()
+
+    @db.with_scope
+    async def _warm(self, path: str):
+        if not os.path.exists(path):
+            return
+
+        with open(path) as f:
+            hottest = json.load(f)
+
+        for model in CACHED_MODELS:
+            ids = hottest.get(model.__tablename__)
+            if not ids:
+                continue
+
+            statement = select(model).where(model.__table__.c.id.in_(ids))
+            result = await db.session.execute(statement)
+            cache = self.caches[model.__tablename__]
+            # Typed by mypy as their common base, the mixin
+            instances = cast(Iterable[CategoryModel | ItemModel], result.scalars())
+            for instance in instances:
+                cache.set(instance.id, _column_values(instance))
+
+        logger.info("Warmed the entity cache", data=self.stats())
+
+    def _save_hottest(self, path: str):
+        hottest = {
+            table: cache.hottest(config.ENTITY_CACHE_WARM_SIZE)
+            for table, cache in self.caches.items()
+        }
+        with open(path, "w") as f:
+            json.dump(hottest, f)
+
+
+entity_cache = EntityCache()
+
+
+category_items_cache = ResponseCache(
+    CATEGORY_ITEMS,
+    create_response_cache_backend(
+        config.RESPONSE_CACHE_URI,
+        config.RESPONSE_CACHE_MAX_BYTES,
+    ),
+    ttl=config.RESPONSE_CACHE_TTL,
+    stale_ttl=config.RESPONSE_CACHE_STALE_TTL,
+)
+
+
+def warn_about_unshared_caches():
+    """
+    Warn about the caches of this worker that writes on other workers cannot
+    invalidate, as there is no invalidation bus.
+    """
+    if config.ENTITY_CACHE_BUS_URI:
+        return
+
+    if config.ENTITY_CACHE_SIZE > 0:
+        logger.warning(
+            "Without ENTITY_CACHE_BUS_URI, other workers' writes leave cached "
+            "categories and items stale",
+            data={"max_stale_seconds": config.ENTITY_CACHE_TTL},
+        )
+    if config.RESPONSE_CACHE_URI and not category_items_cache.backend.shared:
+        logger.warning(
+            "Without ENTITY_CACHE_BUS_URI, other workers' writes leave cached "
+            "item pages stale",
+            data={
+                "max_stale_seconds": config.RESPONSE_CACHE_TTL
+                + config.RESPONSE_CACHE_STALE_TTL,
+            },
+        )
+
+
+# Pages are cached per category, a change of any item or of the category itself
+# drops every page of the category
+for namespace in (CategoryModel.__tablename__, CATEGORY_ITEMS):
+    entity_cache.subscribe(
+        namespace,
+        lambda category_id, remote: category_items_cache.invalidate(
+            str(category_id),
+            remote,
+        ),
+    )
@@ -1,15 +1,74 @@
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
+from typing import cast
 
-from sqlalchemy import delete, select
+from sqlalchemy import Row, asc, delete, desc, func, select, update
+from sqlalchemy.engine import CursorResult
 
 from main import db
+from main.engines.cache import entity_cache
 from main.models.category import CategoryModel
+from main.models.item import ItemModel
 
+# Columns of the category listing, selected as plain rows rather than ORM instances
+CATEGORY_LIST_COLUMNS = (
+    CategoryModel.id,
+    CategoryModel.name,
+    CategoryModel.description,
+    CategoryModel.creator_id,
+)
 
-async def get_categories() -> Sequence[CategoryModel]:
-    statement = select(CategoryModel)
+
+async def get_categories() -> Sequence[Row]:
+    """
+    Get every category in the listing order (by id).
+    """
+    statement = select(*CATEGORY_LIST_COLUMNS).order_by(asc(CategoryModel.id))
+    result = await db.session.execute(statement)
+    return result.all()
+
+
+async def get_categories_after(id: int, limit: int) -> Sequence[Row]:
+    """
+    Get the categories that come after ``id`` in the listing order (by id).
+    """
+    statement = (
+        select(*CATEGORY_LIST_COLUMNS)
+        .where(CategoryModel.id > id)
+        .order_by(asc(CategoryModel.id))
+        .limit(limit)
+    )
+    result = await db.session.execute(statement)
+    return result.all()
+
+
+async def get_categories_before(id: int, limit: int) -> Sequence[Row]:
+    """
+    Get the categories that come before ``id`` in the listing order.
+    Rows are returned nearest first, i.e. in reversed listing order.
+    """
+    statement = (
+        select(*CATEGORY_LIST_COLUMNS)
+        .where(CategoryModel.id < id)
+        .order_by(desc(CategoryModel.id))
+        .limit(limit)
+    )
     result = await db.session.execute(statement)
-    return result.scalars().all()
+    return result.all()
+
+
+async def stream_categories(batch_size: int = 500) -> AsyncIterator[Sequence[Row]]:
+    """
+    Iterate over every category in the listing order, in batches of
+    ``batch_size`` rows fetched through a server-side cursor.
+    """
+    statement = (
+        select(*CATEGORY_LIST_COLUMNS)
+        .order_by(asc(CategoryModel.id))
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.session.stream(statement)
+    async for rows in result.partitions():
+        yield rows
 
 
 async def add_category(
@@ -17,6 +76,9 @@ async def add_category(
     description: str,
     creator_id: int,
 ) -> CategoryModel:
+    """
+    Add a category, a duplicate name surfaces as an ``IntegrityError``.
+    """
     category = CategoryModel(name=name, description=description, creator_id=creator_id)
 
     db.session.add(category)
@@ -31,14 +93,56 @@ async def get_category_by_id(id: int) -> CategoryModel | None:
     return result.scalar()
 
 
-async def get_category_by_name(name: str) -> CategoryModel | None:
-    statement = select(CategoryModel).where(CategoryModel.name == name)
+async def get_cached_category_by_id(id: int) -> CategoryModel | None:
+    return await entity_cache.get(CategoryModel, id, get_category_by_id)
+
+
+async def category_exists(id: int) -> bool:
+    statement = select(CategoryModel.id).where(CategoryModel.id == id)
     result = await db.session.execute(statement)
-    return result.scalar()
+    return result.scalar() is not None
+
+
+async def delete_category(id: int, creator_id: int) -> bool:
+    """
+    Delete a category of the given creator.
+
+    :return: whether there was such a category of this creator
+    """
+    # Items are removed by the ON DELETE CASCADE, their counter goes with the row
+    statement = delete(CategoryModel).where(
+        CategoryModel.id == id,
+        CategoryModel.creator_id == creator_id,
+    )
+
+    result = cast(CursorResult, await db.session.execute(statement))
+    if result.rowcount:
+        entity_cache.invalidate_on_commit(CategoryModel, id)
+    await db.session.commit()
+
+    return result.rowcount > 0
 
 
-async def delete_category(id: int):
-    statement = delete(CategoryModel).where(CategoryModel.id == id)
+async def reconcile_item_counts() -> int:
+    """
+    Rebuild every category's ``item_count`` from the ``item`` table.
 
-    await db.session.execute(statement)
+    :return: the number of categories whose counter was updated
+    """
+    actual_count = (
+        select(func.count())
+        .select_from(ItemModel)
+        .where(ItemModel.category_id == CategoryModel.id)
+        .scalar_subquery()
+    )
+    statement = (
+        update(CategoryModel)
+        .where(CategoryModel.item_count != actual_count)
+        .values(item_count=actual_count)
+        .execution_options(synchronize_session=False)
+    )
+
+    result = cast(CursorResult, await db.session.execute(statement))
     await db.session.commit()
+
+    return result.rowcount
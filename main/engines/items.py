@@ -1,31 +1,125 @@
-from collections.abc import Sequence
+from collections.abc import Collection, Sequence
+from datetime import datetime
+from typing import cast
 
-from sqlalchemy import delete, desc, func, select
+from sqlalchemy import (
+    Row,
+    and_,
+    asc,
+    delete,
+    desc,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.exc import IntegrityError
 
 from main import db
+from main.engines.cache import entity_cache
+from main.models.category import CategoryModel
 from main.models.item import ItemModel
+from main.utils.common import is_duplicate_entry
 
+# Columns of the item listing, selected as plain rows rather than ORM instances
+ITEM_LIST_COLUMNS = (
+    ItemModel.id,
+    ItemModel.name,
+    ItemModel.description,
+    ItemModel.creator_id,
+    ItemModel.created_at,
+    ItemModel.updated_at,
+)
 
-async def count_items(category_id: int) -> int:
+
+async def get_items(category_id: int, offset: int, limit: int) -> Sequence[Row]:
     statement = (
-        select(func.count())
-        .select_from(ItemModel)
+        select(*ITEM_LIST_COLUMNS)
         .where(ItemModel.category_id == category_id)
+        .order_by(desc(ItemModel.created_at), desc(ItemModel.id))
+        .offset(offset)
+        .limit(limit)
     )
     result = await db.session.execute(statement)
-    return result.scalar() or 0
+    return result.all()
 
 
-async def get_items(category_id: int, offset: int, limit: int) -> Sequence[ItemModel]:
+async def get_items_after(
+    category_id: int,
+    created_at: datetime,
+    id: int,
+    limit: int,
+) -> Sequence[Row]:
+    """
+    Get the items that come after ``(created_at, id)`` in the listing order
+    (newest first), seeking on the ``(category_id, created_at, id)`` index.
+    """
     statement = (
-        select(ItemModel)
-        .where(ItemModel.category_id == category_id)
-        .order_by(desc(ItemModel.created_at))
-        .offset(offset)
+        select(*ITEM_LIST_COLUMNS)
+        .where(
+            ItemModel.category_id == category_id,
+            or_(
+                ItemModel.created_at < created_at,
+                and_(ItemModel.created_at == created_at, ItemModel.id < id),
+            ),
+        )
+        .order_by(desc(ItemModel.created_at), desc(ItemModel.id))
         .limit(limit)
     )
     result = await db.session.execute(statement)
-    return result.scalars().all()
+    return result.all()
+
+
+async def get_items_before(
+    category_id: int,
+    created_at: datetime,
+    id: int,
+    limit: int,
+) -> Sequence[Row]:
+    """
+    Get the items that come before ``(created_at, id)`` in the listing order.
+    Rows are returned nearest first, i.e. in reversed listing order.
+    """
+    statement = (
+        select(*ITEM_LIST_COLUMNS)
+        .where(
+            ItemModel.category_id == category_id,
+            or_(
+                ItemModel.created_at > created_at,
+                and_(ItemModel.created_at == created_at, ItemModel.id > id),
+            ),
+        )
+        .order_by(asc(ItemModel.created_at), asc(ItemModel.id))
+        .limit(limit)
+    )
+    result = await db.session.execute(statement)
+    return result.all()
+
+
+async def _increment_item_count(
+    category_id: int,
+    amount: int,
+) -> bool:
+    """
+    Bump the category's item counter, this also locks the category row until the
+    end of the transaction. The counter is not part of the category's
+    representation, so ``updated_at``, which its ETag and Last-Modified derive
+    from, is kept as it is rather than bumped by ``onupdate``.
+
+    :return: whether the category exists
+    """
+    statement = (
+        update(CategoryModel)
+        .where(CategoryModel.id == category_id)
+        .values(
+            item_count=CategoryModel.item_count + amount,
+            updated_at=CategoryModel.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = cast(CursorResult, await db.session.execute(statement))
+    return result.rowcount > 0
 
 
 async def add_item(
@@ -33,7 +127,15 @@ async def add_item(
     description: str,
     category_id: int,
     creator_id: int,
-) -> ItemModel:
+) -> ItemModel | None:
+    """
+    Add an item, a duplicate name surfaces as an ``IntegrityError``.
+
+    :return: the created item, None if the category does not exist
+    """
+    if not await _increment_item_count(category_id, 1):
+        return None
+
     item = ItemModel(
         name=name,
         description=description,
@@ -42,40 +144,212 @@ async def add_item(
     )
 
     db.session.add(item)
+    entity_cache.invalidate_category_items_on_commit(category_id)
     await db.session.commit()
 
     return item
 
 
+async def add_items(
+    items: Sequence[dict[str, str]],
+    category_id: int,
+    creator_id: int,
+) -> list[ItemModel | None] | None:
+    """
+    Add items to a category in one transaction, with a single multi-row INSERT
+    whatever the number of items. When the unique index rejects a name, e.g. one
+    only equal to another under its collation, the items are added one at a time
+    instead, leaving out those whose names are taken.
+
+    :param items: ``name`` and ``description`` of each item
+    :return: for each item, the created item or None if its name is taken. None
+        if the category does not exist
+    """
+    rows = [
+        {**item, "category_id": category_id, "creator_id": creator_id} for item in items
+    ]
+
+    if not await _increment_item_count(category_id, len(rows)):
+        return None
+
+    try:
+        # One statement of many VALUES, which fails as a whole, where an
+        # executemany may have inserted the rows before the failing one
+        await db.session.execute(insert(ItemModel).values(rows))
+        added = [True] * len(rows)
+    except IntegrityError as e:
+        if not is_duplicate_entry(e):
+            raise
+
+        # MySQL only undoes the failed statement, the transaction goes on
+        added = await _add_item_rows_one_by_one(rows, category_id)
+
+    added_names = [item["name"] for item, is_added in zip(items, added) if is_added]
+    created_items = {}
+    if added_names:
+        # IDs of a multi-row INSERT are not returned by MySQL, names are unique
+        result = await db.session.execute(
+            select(ItemModel).where(ItemModel.name.in_(added_names)),
+        )
+        created_items = {item.name: item for item in result.scalars()}
+    entity_cache.invalidate_category_items_on_commit(category_id)
+    await db.session.commit()
+
+    return [
+        created_items[item["name"]] if is_added else None
+        for item, is_added in zip(items, added)
+    ]
+
+
+async def _add_item_rows_one_by_one(
+    rows: Sequence[dict],
+    category_id: int,
+) -> list[bool]:
+    """
+    Insert each row in its own savepoint, so that a duplicate name only leaves
+    out its own row. The category's counter, already bumped for every row, is
+    then taken back down by the rows left out.
+
+    :return: whether each row was added
+    """
+    # A SAVEPOINT, the INSERT and its RELEASE or ROLLBACK per row, and the
+    # counter. This slow path grows with the batch, not with a bug
+    db.extend_query_budget(3 * len(rows) + 1)
+
+    added = []
+    for row in rows:
+        try:
+            async with db.session.begin_nested():
+                await db.session.execute(insert(ItemModel), [row])
+        except IntegrityError as e:
+            if not is_duplicate_entry(e):
+                raise
+            added.append(False)
+        else:
+            added.append(True)
+
+    if taken := added.count(False):
+        await _increment_item_count(category_id, -taken)
+
+    return added
+
+
 async def get_item_by_id(id: int) -> ItemModel | None:
     statement = select(ItemModel).where(ItemModel.id == id)
     result = await db.session.execute(statement)
     return result.scalar()
 
 
-async def get_item_by_name(name: str) -> ItemModel | None:
-    statement = select(ItemModel).where(ItemModel.name == name)
+async def get_cached_item_by_id(id: int) -> ItemModel | None:
+    return await entity_cache.get(ItemModel, id, get_item_by_id)
+
+
+async def get_existing_item_names(names: Collection[str]) -> set[str]:
+    statement = select(ItemModel.name).where(ItemModel.name.in_(names))
     result = await db.session.execute(statement)
-    return result.scalar()
+    return set(result.scalars())
 
 
-async def update_item(id: int, name: str, description: str) -> ItemModel | None:
-    item = await get_item_by_id(id)
+async def item_exists(id: int) -> bool:
+    statement = select(ItemModel.id).where(ItemModel.id == id)
+    result = await db.session.execute(statement)
+    return result.scalar() is not None
 
-    if not item:
-        return None
 
+async def update_item(
+    id: int,
+    creator_id: int,
+    name: str | None,
+    description: str | None,
+) -> ItemModel | None:
+    """
+    Update an item of the given creator in a single UPDATE, a duplicate name
+    surfaces as an ``IntegrityError``. The UPDATE returns the item where the
+    database supports it. MySQL has no UPDATE ... RETURNING, so there the item is
+    read back after, a second statement.
+
+    :return: the updated item, None if there is no such item of this creator
+    """
+    values = {}
     if name:
-        item.name = name
+        values["name"] = name
     if description:
-        item.description = description
+        values["description"] = description
+
+    statement = (
+        update(ItemModel)
+        .where(ItemModel.id == id, ItemModel.creator_id == creator_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    # Either way, refresh the instance the session may already hold. With
+    # RETURNING, "fetch" does it from the returned row without another query
+    if db.engine.dialect.update_returning:
+        returning = statement.returning(ItemModel).execution_options(
+            synchronize_session="fetch",
+        )
+        item = (await db.session.execute(returning)).scalar()
+        if item is None:
+            return None
+    else:
+        result = cast(CursorResult, await db.session.execute(statement))
+        if not result.rowcount:
+            return None
+
+        read_back = (
+            select(ItemModel)
+            .where(ItemModel.id == id)
+            .execution_options(populate_existing=True)
+        )
+        item = (await db.session.execute(read_back)).scalar_one()
 
+    entity_cache.invalidate_on_commit(ItemModel, id)
+    entity_cache.invalidate_category_items_on_commit(item.category_id)
     await db.session.commit()
+
     return item
 
 
-async def delete_item(id: int):
-    statement = delete(ItemModel).where(ItemModel.id == id)
+async def delete_item(id: int, creator_id: int) -> bool:
+    """
+    Delete an item of the given creator and take it off its category's counter,
+    two statements where the DELETE returns the category of the item. MySQL has
+    no DELETE ... RETURNING and a multi-table DELETE cannot update the counter,
+    so there the category is read before, a third statement.
 
-    await db.session.execute(statement)
+    :return: whether there was such an item of this creator
+    """
+    statement = delete(ItemModel).where(
+        ItemModel.id == id,
+        ItemModel.creator_id == creator_id,
+    )
+    # The category is needed for the counter and to invalidate its cached pages
+    if db.engine.dialect.delete_returning:
+        returning = statement.returning(ItemModel.category_id)
+        category_id = (await db.session.execute(returning)).scalar()
+        if category_id is None:
+            return False
+    else:
+        # The category of an item never changes, so it is read without a lock
+        category_id = (
+            await db.session.execute(
+                select(ItemModel.category_id).where(
+                    ItemModel.id == id,
+                    ItemModel.creator_id == creator_id,
+                ),
+            )
+        ).scalar()
+        if category_id is None:
+            return False
+
+        result = cast(CursorResult, await db.session.execute(statement))
+        # Of concurrent deletes of the item, only the one that deleted it decrements
+        if result.rowcount != 1:
+            return False
+
+    await _increment_item_count(category_id, -1)
+    entity_cache.invalidate_on_commit(ItemModel, id)
+    entity_cache.invalidate_category_items_on_commit(category_id)
     await db.session.commit()
+
+    return True
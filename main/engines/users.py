@@ -1,17 +1,31 @@
 import bcrypt
 from sqlalchemy import select
 
-from main import db
+from main import config, db
+from main.libs.worker_pool import WorkerPool
 from main.models.user import UserModel
 
+# bcrypt takes hundreds of milliseconds on purpose and releases the GIL meanwhile
+password_hashing = WorkerPool(
+    "password_hashing",
+    max_workers=config.PASSWORD_HASH_WORKERS,
+    max_backlog=config.PASSWORD_HASH_MAX_BACKLOG,
+)
+
+
+async def hash_password(password: str) -> str:
+    hashed_password = await password_hashing.run(
+        bcrypt.hashpw,
+        password.encode(),
+        bcrypt.gensalt(config.PASSWORD_HASH_ROUNDS),
+    )
+    return hashed_password.decode()
+
 
 async def add_user(email: str, password: str) -> UserModel:
     user = UserModel(
         email=email,
-        hashed_password=bcrypt.hashpw(
-            password.encode(),
-            bcrypt.gensalt(),
-        ),
+        hashed_password=await hash_password(password),
     )
 
     db.session.add(user)
@@ -20,15 +34,17 @@ async def add_user(email: str, password: str) -> UserModel:
     return user
 
 
-async def get_user_by_email(email: str) -> UserModel:
+async def get_user_by_email(email: str) -> UserModel | None:
     statement = select(UserModel).where(UserModel.email == email)
     result = await db.session.execute(statement)
 
     return result.scalar()
 
 
-def verify_password(password: str, hashed_password: str):
-    return bcrypt.checkpw(
-        password=password.encode(),
-        hashed_password=hashed_password.encode(),
+async def verify_password(password: str, hashed_password: str) -> bool:
+    # The work factor is read from the hash, older hashes keep theirs
+    return await password_hashing.run(
+        bcrypt.checkpw,
+        password.encode(),
+        hashed_password.encode(),
     )
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from .metrics import registry
+
+hits = registry.counter("cache_hits", "Cache lookups served from the cache.", ["cache"])
+misses = registry.counter("cache_misses", "Cache lookups that missed.", ["cache"])
+invalidations = registry.counter(
+    "cache_invalidations",
+    "Cache keys invalidated.",
+    ["cache"],
+)
+
+
+class LRUCache:
+    """
+    A thread-safe LRU cache whose entries also expire ``ttl`` seconds after they
+    were stored.
+
+    Every invalidation bumps ``generation``. A value loaded from the database is
+    only stored if no invalidation happened since the load started, which keeps a
+    slow reader from putting back a value that a concurrent writer just replaced.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        # key -> [value, expiry time, number of hits]
+        self._entries: OrderedDict[Hashable, list[Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                misses.inc(cache=self.name)
+                return None
+
+            self._entries.move_to_end(key)
+            entry[2] += 1
+            hits.inc(cache=self.name)
+            return entry[0]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        generation: int | None = None,
+        ttl: float | None = None,
+    ) -> bool:
+        """
+        :param generation: ``generation`` read before the value was loaded
+        :param ttl: seconds the value expires after, when sooner than ``ttl``
+        :return: whether the value was stored
+        """
+        if self.max_size <= 0:
+            return False
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+
+            lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+            self._entries[key] = [value, time.monotonic() + lifetime, 0]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return True
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+        invalidations.inc(cache=self.name)
+
+    def invalidate_matching(self, predicate: Callable[[Any], bool]):
+        """
+        Invalidate every entry whose value matches, this scans the whole cache.
+        """
+        with self._lock:
+            self.generation += 1
+            keys = [key for key, entry in self._entries.items() if predicate(entry[0])]
+            for key in keys:
+                del self._entries[key]
+
+        invalidations.inc(len(keys), cache=self.name)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def hottest(self, count: int) -> list[Hashable]:
+        with self._lock:
+            entries = list(self._entries.items())
+
+        entries.sort(key=lambda item: item[1][2], reverse=True)
+        return [key for key, _ in entries[:count]]
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "size": len(self._entries),
+            "hits": hits.get(cache=self.name),
+            "misses": misses.get(cache=self.name),
+            "invalidations": invalidations.get(cache=self.name),
+        }
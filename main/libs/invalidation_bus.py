@@ -0,0 +1,167 @@
+"""
+Broadcast cache invalidations to the other workers of the service.
+
+A bus is created from a URI with ``create_invalidation_bus``:
+
+- ``""`` (default): invalidations stay in the current process
+- ``sqlite:///path/to/bus.db``: invalidations are appended to a table of a SQLite
+  file shared by every worker of the host, which each worker polls
+"""
+
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+
+from main.libs.log import get_logger
+
+logger = get_logger(__name__)
+
+InvalidationCallback = Callable[[str], None]
+
+
+class InvalidationBus:
+    """
+    Deliver keys published by one worker to the callback of every other worker.
+    Publishing never blocks the caller.
+    """
+
+    def publish(self, key: str):
+        pass
+
+    def start(self, callback: InvalidationCallback):
+        pass
+
+    def stop(self):
+        pass
+
+
+class LocalInvalidationBus(InvalidationBus):
+    """
+    A bus for a single worker, there is nobody else to tell.
+    """
+
+
+class SQLiteInvalidationBus(InvalidationBus):
+    """
+    A bus backed by a table of a SQLite file, for workers sharing a host.
+
+    A background thread writes the published keys and polls for the keys other
+    workers wrote since the last poll. Rows older than ``retention`` seconds are
+    pruned, so a worker stalled for longer misses them and relies on the TTL.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        poll_interval: float = 0.1,
+        retention: float = 60,
+    ):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+
+        self._pending: queue.SimpleQueue[str] = queue.SimpleQueue()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def publish(self, key: str):
+        self._pending.put(key)
+
+    def start(self, callback: InvalidationCallback):
+        connection = self._connect()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS invalidation ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL,"
+            " origin TEXT NOT NULL,"
+            " created_at REAL NOT NULL)",
+        )
+        (last_seq,) = connection.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM invalidation",
+        ).fetchone()
+        connection.close()
+
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(callback, last_seq),
+            name="invalidation-bus",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _run(self, callback: InvalidationCallback, last_seq: int):
+        connection = self._connect()
+
+        while True:
+            stopping = self._stopped.is_set()
+            try:
+                self._flush(connection)
+                last_seq = self._poll(connection, callback, last_seq)
+            except sqlite3.Error:
+                logger.exception("Cache invalidation bus failed")
+
+            if stopping:
+                break
+            self._stopped.wait(self.poll_interval)
+
+        connection.close()
+
+    def _flush(self, connection: sqlite3.Connection):
+        rows = []
+        while not self._pending.empty():
+            rows.append((self._pending.get(), self.origin, time.time()))
+
+        if rows:
+            connection.executemany(
+                "INSERT INTO invalidation (key, origin, created_at) VALUES (?, ?, ?)",
+                rows,
+            )
+            connection.execute(
+                "DELETE FROM invalidation WHERE created_at < ?",
+                (time.time() - self.retention,),
+            )
+
+    def _poll(
+        self,
+        connection: sqlite3.Connection,
+        callback: InvalidationCallback,
+        last_seq: int,
+    ) -> int:
+        rows = connection.execute(
+            "SELECT seq, key, origin FROM invalidation WHERE seq > ? ORDER BY seq",
+            (last_seq,),
+        ).fetchall()
+
+        for seq, key, origin in rows:
+            if origin != self.origin:
+                callback(key)
+            last_seq = seq
+
+        return last_seq
+
+
+def create_invalidation_bus(uri: str) -> InvalidationBus:
+    if not uri:
+        return LocalInvalidationBus()
+
+    if uri.startswith("sqlite:///"):
+        return SQLiteInvalidationBus(uri.removeprefix("sqlite:///"))
+
+    raise ValueError(f"Unsupported cache invalidation bus: {uri}")
@@ -1,24 +1,205 @@
+import copy
 import json
 import logging
+import os
+import queue
 import sys
+import threading
+from typing import TextIO
 
-from main import config
+from main._config import config
+
+from .metrics import registry
+
+dropped_records = registry.counter(
+    "log_records_dropped",
+    "Log records dropped because the log queue was full.",
+    ["logger"],
+)
+queued_records = registry.gauge(
+    "log_records_queued",
+    "Log records waiting to be written.",
+)
+
+
+class DeferredArg:
+    """
+    Base of the logging arguments that are only rendered when their record is
+    formatted, on the log writer thread, e.g. to encode them. They must thus not
+    change after logging.
+    """
+
+    __slots__ = ()
+
+
+class DataFormatter(logging.Formatter):
+    """
+    Append the ``data`` passed to a logger call to the message, as JSON.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = getattr(record, "data", None)
+        if data:
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = f"{record.getMessage()} | {json.dumps(data, default=str)}"
+            record.args = None
+
+        return super().format(record)
+
+
+class LogPipeline:
+    """
+    Write log records to a stream from a background thread, so that logging
+    never waits for the stream.
+
+    Records are queued with their message merged with its arguments, unless
+    some are a ``DeferredArg``, and a copy of their data. They are formatted by
+    the writer thread, which encodes the data, and written in batches of up to
+    ``batch_size`` with one flush each. Values nested in the data must not be
+    changed after logging. Once ``max_size``
+    records are queued, new ones are dropped, or wait for room with the "block"
+    policy.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        max_size: int,
+        policy: str = "drop",
+        batch_size: int = 512,
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unsupported log queue policy: {policy}")
+
+        self.stream = stream
+        self.max_size = max_size
+        self.block = policy == "block"
+        self.batch_size = batch_size
+        self.start()
+
+    def start(self):
+        """
+        Start the writer thread, with an empty queue.
+        """
+        self._queue: queue.Queue[
+            tuple[logging.Handler, logging.LogRecord]
+        ] = queue.Queue(self.max_size)
+        self._writer = threading.Thread(
+            target=self._write,
+            name="log-writer",
+            daemon=True,
+        )
+        self._writer.start()
+
+    def handler(self, formatter: logging.Formatter) -> logging.Handler:
+        """
+        Create a handler queueing records to the pipeline, to be formatted by
+        ``formatter``.
+        """
+        handler = _QueueHandler(self)
+        handler.setFormatter(formatter)
+        return handler
+
+    def size(self) -> int:
+        return self._queue.qsize()
+
+    def put(self, handler: logging.Handler, record: logging.LogRecord):
+        try:
+            self._queue.put((handler, record), block=self.block)
+        except queue.Full:
+            dropped_records.inc(logger=record.name)
+
+    def flush(self):
+        """
+        Wait for the records queued so far to be written.
+        """
+        if self._writer.is_alive():
+            self._queue.join()
+
+    def _write(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            for handler, record in batch:
+                try:
+                    lines.append(handler.format(record) + "\n")
+                except Exception:
+                    handler.handleError(record)
+
+            try:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+            except Exception:
+                for handler, record in batch:
+                    handler.handleError(record)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+class _QueueHandler(logging.Handler):
+    def __init__(self, pipeline: LogPipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def emit(self, record: logging.LogRecord):
+        self.pipeline.put(self, self.prepare(record))
+
+    @staticmethod
+    def prepare(record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Copy a record with what may change after logging resolved, as
+        ``QueueHandler.prepare`` does, except for the formatting. A message with
+        ``DeferredArg`` arguments is merged on the writer thread, with copies of
+        its other arguments.
+        """
+        record = copy.copy(record)
+        args = record.args
+        if isinstance(args, tuple) and any(isinstance(a, DeferredArg) for a in args):
+            record.args = tuple(
+                arg if isinstance(arg, DeferredArg) else copy.copy(arg) for arg in args
+            )
+        else:
+            record.msg = record.getMessage()
+            record.args = None
+        data = getattr(record, "data", None)
+        if data:
+            record.data = copy.copy(data)
+        return record
+
+    def flush(self):
+        # Called by logging.shutdown, so that queued records are written on exit
+        self.pipeline.flush()
+
+
+log_pipeline = LogPipeline(
+    sys.stdout,
+    max_size=config.LOG_QUEUE_SIZE,
+    policy=config.LOG_QUEUE_POLICY,
+    batch_size=config.LOG_BATCH_SIZE,
+)
+queued_records.set_function(log_pipeline.size)
+# A forked child only inherits the thread that forked
+os.register_at_fork(after_in_child=log_pipeline.start)
 
 
 def get_logger(name: str):
     logger = logging.getLogger(name)
     logger.setLevel(config.LOGGING_LEVEL)
 
-    formatter = logging.Formatter(
+    formatter = DataFormatter(
         "[%(asctime)s][%(name)s][%(levelname)s]"
         " (%(module)s:%(funcName)s:%(lineno)d) %(message)s",
     )
 
-    handler = logging.StreamHandler(stream=sys.stdout)
-    handler.setFormatter(formatter)
-
     if not logger.hasHandlers():
-        logger.addHandler(handler)
+        logger.addHandler(log_pipeline.handler(formatter))
 
     logger.propagate = False
 
@@ -34,8 +215,9 @@ class _CustomLogger(logging.Logger):
         data=None,
         **kwargs,
     ):
+        # Encoded by DataFormatter, on the log writer thread
         if data:
-            msg = f"{msg} | {json.dumps(data, default=str)}"
+            kwargs["extra"] = {**(kwargs.get("extra") or {}), "data": data}
 
         # noinspection PyProtectedMember
         super()._log(level, msg, args, **kwargs)
@@ -0,0 +1,265 @@
+"""
+A minimal in-process metrics library rendering the Prometheus text format.
+
+Metrics are created through a ``MetricsRegistry`` and labelled with keyword
+arguments, e.g. ``counter.inc(engine="primary")``. Label names are fixed when the
+metric is declared.
+
+The samples of other processes, taken with ``MetricsRegistry.snapshot``, can be
+added to those of the current one when rendering, see ``multiprocess_metrics``.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+# Metric name -> type and samples
+Snapshot = dict[str, dict]
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels.items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, label_values: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, label_values, strict=True))
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        pass
+
+    def render(self, samples: Iterable[Sample] | None = None) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self.samples() if samples is None else samples:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def samples(self):
+        for label_values, value in list(self._values.items()):
+            yield f"{self.name}_total", self._labels(label_values), value
+
+
+class Gauge(Metric):
+    """
+    A gauge that is either set directly or read from callbacks at collection time.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._callbacks: dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str):
+        self._values[self._label_values(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels: str):
+        self._callbacks[self._label_values(labels)] = function
+
+    def get(self, **labels: str) -> float:
+        key = self._label_values(labels)
+        if key in self._callbacks:
+            return self._callbacks[key]()
+        return self._values.get(key, 0)
+
+    def samples(self):
+        for label_values, value in list(self._values.items()):
+            yield self.name, self._labels(label_values), value
+        for label_values, function in list(self._callbacks.items()):
+            yield self.name, self._labels(label_values), function()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+        # Per label values: the count of each bucket (not cumulative) and the sum
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0) + value
+
+    def get_count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._label_values(labels), ()))
+
+    def get_sum(self, **labels: str) -> float:
+        return self._sums.get(self._label_values(labels), 0)
+
+    def samples(self):
+        # Rendered in another thread than the observations, copy the counts and
+        # sum of each label values at once so that they match
+        with self._lock:
+            snapshot = [
+                (label_values, list(counts), self._sums[label_values])
+                for label_values, counts in self._counts.items()
+            ]
+
+        for label_values, counts, total in snapshot:
+            labels = self._labels(label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    {**labels, "le": _format_value(bound)},
+                    cumulative,
+                )
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, total
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Snapshot:
+        return {
+            name: {"type": metric.type, "samples": list(metric.samples())}
+            for name, metric in self._metrics.items()
+        }
+
+    def render(self, snapshots: Sequence[Snapshot] = ()) -> str:
+        """
+        :param snapshots: of other processes, whose samples are added to the
+            samples of this one
+        """
+        if not snapshots:
+            rendered = (metric.render() for metric in self._metrics.values())
+        else:
+            rendered = (
+                metric.render(
+                    _add_samples(
+                        metric.samples(),
+                        *(
+                            snapshot.get(name, {}).get("samples", ())
+                            for snapshot in snapshots
+                        ),
+                    ),
+                )
+                for name, metric in self._metrics.items()
+            )
+
+        return "\n".join(rendered) + "\n"
+
+
+def _add_samples(*samples: Iterable[Sample]) -> list[Sample]:
+    # (sample name, labels) -> labels, summed value
+    totals: dict[tuple[str, tuple], tuple[dict[str, str], float]] = {}
+    for name, labels, value in (sample for group in samples for sample in group):
+        key = (name, tuple(sorted(labels.items())))
+        previous = totals.get(key)
+        totals[key] = (labels, value + (previous[1] if previous else 0))
+
+    return [(name, labels, value) for (name, _), (labels, value) in totals.items()]
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,114 @@
+"""
+Aggregate the metrics of every worker process of a server.
+
+Each worker writes a snapshot of its registry to ``<directory>/<pid>.json``
+every ``interval`` seconds and when it stops. The worker answering a scrape
+renders its own samples added to the snapshots of the others, so the values of
+another worker are at most ``interval`` seconds old.
+
+Counters and histograms of workers that exited are kept, so that their totals
+never go down. Gauges are only summed across live workers. The directory should
+be emptied before the server starts, as a pid may be reused.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from .log import get_logger
+from .metrics import MetricsRegistry, Snapshot
+
+logger = get_logger(__name__)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiprocessMetrics:
+    """
+    Without a directory, only the metrics of the current process are rendered.
+    """
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float):
+        self.registry = registry
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._writer: threading.Thread | None = None
+
+    def start(self):
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stopped.clear()
+        self._writer = threading.Thread(
+            target=self._write_periodically,
+            name="metrics-writer",
+            daemon=True,
+        )
+        self._writer.start()
+
+    def stop(self):
+        if self._writer is None:
+            return
+
+        self._stopped.set()
+        self._writer.join()
+        self._writer = None
+        self.write()
+
+    def _write_periodically(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except Exception:
+                logger.exception("Failed to write the metrics snapshot")
+
+    def write(self):
+        assert self.directory is not None
+        path = self.directory / f"{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.registry.snapshot()))
+        # Readers never see a partly written snapshot
+        temporary.replace(path)
+
+    def read_others(self) -> list[Snapshot]:
+        """
+        Read the snapshots of the other processes, without the gauges of those
+        that exited.
+        """
+        if self.directory is None:
+            return []
+
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if not path.stem.isdigit() or int(path.stem) == os.getpid():
+                continue
+
+            try:
+                snapshot: Snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                logger.exception("Failed to read a metrics snapshot")
+                continue
+
+            if not _is_alive(int(path.stem)):
+                snapshot = {
+                    name: metric
+                    for name, metric in snapshot.items()
+                    if metric["type"] != "gauge"
+                }
+            snapshots.append(snapshot)
+
+        return snapshots
+
+    def render(self) -> str:
+        return self.registry.render(self.read_others())
@@ -0,0 +1,153 @@
+"""
+Connection-pool telemetry for SQLAlchemy engines.
+
+``instrument_engine`` hooks the pool events of an engine and labels everything
+with the engine name, so the primary and each replica are reported separately.
+"""
+
+import functools
+import time
+from collections.abc import Callable
+from typing import Any, cast
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .metrics import registry
+
+connections_size = registry.gauge(
+    "db_pool_size",
+    "Configured number of connections kept in the pool.",
+    ["engine"],
+)
+connections_checked_out = registry.gauge(
+    "db_pool_connections_checked_out",
+    "Connections currently checked out of the pool.",
+    ["engine"],
+)
+connections_checked_in = registry.gauge(
+    "db_pool_connections_checked_in",
+    "Idle connections currently in the pool.",
+    ["engine"],
+)
+connections_overflow = registry.gauge(
+    "db_pool_overflow",
+    "Connections open beyond the pool size (negative when below it).",
+    ["engine"],
+)
+checkouts = registry.counter(
+    "db_pool_checkouts",
+    "Connections checked out of the pool.",
+    ["engine"],
+)
+overflow_checkouts = registry.counter(
+    "db_pool_overflow_checkouts",
+    "Connections checked out while the pool was over its size.",
+    ["engine"],
+)
+connects = registry.counter(
+    "db_pool_connects",
+    "New DBAPI connections opened by the pool.",
+    ["engine"],
+)
+invalidations = registry.counter(
+    "db_pool_invalidations",
+    "Connections invalidated, kind is hard (closed now) or soft (at checkin).",
+    ["engine", "kind"],
+)
+checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent obtaining a connection from the pool, including connecting.",
+    ["engine"],
+)
+connection_age = registry.histogram(
+    "db_pool_connection_age_seconds",
+    "Age of connections when they are checked out.",
+    ["engine"],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200, 14400),
+)
+
+
+def timed_pool_class(name: str, base: type[QueuePool] = AsyncAdaptedQueuePool):
+    """
+    Build a pool class that records how long each checkout waits for a connection.
+
+    Pool events only fire once a connection has been obtained, so the wait is
+    measured by wrapping the pool's own getter. The engine name lives on the
+    class because ``engine.dispose()`` recreates the pool from its class.
+    """
+
+    class TimedPool(base):  # type: ignore[valid-type, misc]
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                checkout_wait.observe(time.perf_counter() - start, engine=name)
+
+    return TimedPool
+
+
+def _read_pool(engine: Engine, method: Callable[[QueuePool], int]) -> int:
+    return method(cast(QueuePool, engine.pool))
+
+
+def instrument_engine(engine: AsyncEngine, name: str):
+    sync_engine = engine.sync_engine
+
+    if isinstance(sync_engine.pool, QueuePool):
+        for gauge, method in (
+            (connections_size, QueuePool.size),
+            (connections_checked_out, QueuePool.checkedout),
+            (connections_checked_in, QueuePool.checkedin),
+            (connections_overflow, QueuePool.overflow),
+        ):
+            # Read from engine.pool each time as dispose() replaces the pool
+            gauge.set_function(
+                functools.partial(_read_pool, sync_engine, method),
+                engine=name,
+            )
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(*_: Any):
+        connects.inc(engine=name)
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(_, connection_record, __):
+        checkouts.inc(engine=name)
+        connection_age.observe(
+            time.time() - connection_record.starttime,
+            engine=name,
+        )
+
+        pool = sync_engine.pool
+        if isinstance(pool, QueuePool) and pool.overflow() > 0:
+            overflow_checkouts.inc(engine=name)
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(*_: Any):
+        invalidations.inc(engine=name, kind="hard")
+
+    @event.listens_for(sync_engine, "soft_invalidate")
+    def on_soft_invalidate(*_: Any):
+        invalidations.inc(engine=name, kind="soft")
+
+
+def get_pool_stats(name: str) -> dict[str, float]:
+    """
+    Snapshot of the pool telemetry of the engine instrumented as ``name``.
+    """
+    return {
+        "size": connections_size.get(engine=name),
+        "checked_out": connections_checked_out.get(engine=name),
+        "checked_in": connections_checked_in.get(engine=name),
+        "overflow": connections_overflow.get(engine=name),
+        "checkouts": checkouts.get(engine=name),
+        "overflow_checkouts": overflow_checkouts.get(engine=name),
+        "connects": connects.get(engine=name),
+        "hard_invalidations": invalidations.get(engine=name, kind="hard"),
+        "soft_invalidations": invalidations.get(engine=name, kind="soft"),
+        "checkout_wait_count": checkout_wait.get_count(engine=name),
+        "checkout_wait_seconds": checkout_wait.get_sum(engine=name),
+    }
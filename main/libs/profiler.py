@@ -0,0 +1,107 @@
+"""
+Profile single requests with cProfile and keep the captures as pstats files.
+
+A capture is named ``<milliseconds>_<request id>_<route>.pstats``, with the ``/``
+of the route template replaced by ``~``, so that it can be matched with the logs
+of its request. Load it with
+``python -m pstats <file>`` or a viewer like snakeviz.
+
+cProfile follows the thread, not the request: coroutines of other requests that
+run on the event loop meanwhile are part of the capture. Only one request is
+profiled at a time per process.
+"""
+
+import cProfile
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+_CAPTURE_NAME = re.compile(
+    r"(?P<created>\d+)_(?P<request_id>\w+)_(?P<route>[\w{}~.-]+)\.pstats",
+)
+
+
+class Profiler:
+    def __init__(self, directory: str, max_captures: int):
+        self.directory = Path(directory)
+        self.max_captures = max_captures
+        self._lock = threading.Lock()
+
+    def start(self) -> cProfile.Profile | None:
+        """
+        :return: the running profile, None if another request is being profiled
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler, e.g. a debugger, is active
+            self._lock.release()
+            return None
+
+        return profile
+
+    def stop(self, profile: cProfile.Profile):
+        profile.disable()
+        self._lock.release()
+
+    def save(self, profile: cProfile.Profile, request_id: str, route: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        created = int(time.time() * 1000)
+        route = route.replace("/", "~")
+        path = self.directory / f"{created}_{request_id}_{route}.pstats"
+        profile.dump_stats(path)
+
+        for capture in self.captures()[self.max_captures :]:
+            (self.directory / capture["name"]).unlink(missing_ok=True)
+
+        return path
+
+    def captures(self) -> list[dict]:
+        """
+        :return: name, request_id, route, created_at and size of the captures,
+            most recent first
+        """
+        if not self.directory.is_dir():
+            return []
+
+        captures = []
+        for path in self.directory.iterdir():
+            match = _CAPTURE_NAME.fullmatch(path.name)
+            if match is None:
+                continue
+
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+
+            created = int(match["created"]) / 1000
+            captures.append(
+                {
+                    "name": path.name,
+                    "request_id": match["request_id"],
+                    "route": match["route"].replace("~", "/"),
+                    "created_at": datetime.fromtimestamp(created, timezone.utc),
+                    "size": size,
+                },
+            )
+
+        captures.sort(key=lambda capture: capture["name"], reverse=True)
+        return captures
+
+    def path(self, name: str) -> Path | None:
+        """
+        :return: the file of a capture, None if there is no such capture
+        """
+        # Only names of captures, which cannot lead out of the directory
+        if _CAPTURE_NAME.fullmatch(name) is None:
+            return None
+
+        path = self.directory / name
+        return path if path.is_file() else None
@@ -0,0 +1,333 @@
+"""
+Cache built responses, grouped in namespaces that are invalidated as a whole.
+
+A backend is created from a URI with ``create_response_cache_backend``:
+
+- ``""``: nothing is cached
+- ``memory://``: an LRU in the memory of each worker, capped in bytes
+- ``redis://host:port/db``: a Redis server shared by every worker
+"""
+
+import asyncio
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .log import get_logger
+from .metrics import registry
+
+logger = get_logger(__name__)
+
+hits = registry.counter(
+    "response_cache_hits",
+    "Responses served from the cache, state is fresh, stale or coalesced.",
+    ["cache", "state"],
+)
+misses = registry.counter(
+    "response_cache_misses",
+    "Responses built because they were not cached.",
+    ["cache"],
+)
+
+# Entries start with the time they were stored at
+_HEADER = struct.Struct("!d")
+# Entries of the Redis backend start with the version of their namespace
+_VERSION = struct.Struct("!q")
+
+
+class ResponseCacheBackend:
+    """
+    Store bytes under ``(namespace, key)``. This base class caches nothing.
+
+    ``shared`` tells whether every worker sees the same entries, in which case an
+    invalidation only has to happen once.
+    """
+
+    shared = False
+
+    async def get(self, namespace: str, key: str) -> bytes | None:
+        return None
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float):
+        pass
+
+    def invalidate(self, namespace: str):
+        """
+        Drop every entry of the namespace. This must not block, it runs when a
+        transaction commits.
+        """
+
+    def clear(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    """
+    An LRU of the worker's memory, holding at most ``max_bytes`` of values.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        # (namespace, key) -> (value, expiry time)
+        self._entries: OrderedDict[tuple[str, str], tuple[bytes, float]] = OrderedDict()
+        self._keys: dict[str, set[str]] = {}
+        # Invalidations may come from the invalidation bus thread
+        self._lock = threading.Lock()
+
+    async def get(self, namespace: str, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(namespace, key)
+                return None
+
+            self._entries.move_to_end((namespace, key))
+            return entry[0]
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(namespace, key)
+            self._entries[(namespace, key)] = (value, time.monotonic() + ttl)
+            self._keys.setdefault(namespace, set()).add(key)
+            self.size += len(value)
+
+            while self.size > self.max_bytes:
+                self._remove(*next(iter(self._entries)))
+
+    def _remove(self, namespace: str, key: str):
+        entry = self._entries.pop((namespace, key), None)
+        if entry is None:
+            return
+
+        self.size -= len(entry[0])
+        keys = self._keys[namespace]
+        keys.discard(key)
+        if not keys:
+            del self._keys[namespace]
+
+    def invalidate(self, namespace: str):
+        with self._lock:
+            for key in list(self._keys.get(namespace, ())):
+                self._remove(namespace, key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.size = 0
+
+
+class RedisResponseCacheBackend(ResponseCacheBackend):
+    """
+    Entries live in a Redis server. Each namespace has a version, which an
+    invalidation increments at once, and entries are tagged with the version
+    they were stored under, so that older ones are ignored until they expire.
+
+    Invalidations are sent in the background, so a read racing a write may still
+    get the previous entry until the increment lands. Errors of the server are
+    logged and treated as misses, the cache never fails a request.
+    """
+
+    shared = True
+
+    def __init__(self, client: Redis, prefix: str = "response:"):
+        self.client = client
+        self.prefix = prefix
+        self._tasks: set[asyncio.Task] = set()
+
+    def _version_key(self, namespace: str) -> str:
+        return f"{self.prefix}{namespace}"
+
+    def _entry_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> bytes | None:
+        try:
+            version, entry = await self.client.mget(
+                self._version_key(namespace),
+                self._entry_key(namespace, key),
+            )
+        except RedisError:
+            logger.exception("Failed to read from the response cache")
+            return None
+
+        if entry is None or _VERSION.unpack_from(entry)[0] != int(version or 0):
+            return None
+        return entry[_VERSION.size :]
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float):
+        try:
+            version = await self.client.get(self._version_key(namespace))
+            await self.client.set(
+                self._entry_key(namespace, key),
+                _VERSION.pack(int(version or 0)) + value,
+                px=max(int(ttl * 1000), 1),
+            )
+        except RedisError:
+            logger.exception("Failed to write to the response cache")
+
+    async def _invalidate(self, namespace: str):
+        try:
+            await self.client.incr(self._version_key(namespace))
+        except RedisError:
+            logger.exception("Failed to invalidate the response cache")
+
+    def invalidate(self, namespace: str):
+        task = asyncio.get_running_loop().create_task(self._invalidate(namespace))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def wait_invalidations(self):
+        """
+        Wait for the invalidations sent so far to be applied.
+        """
+        await asyncio.gather(*self._tasks)
+
+
+def create_response_cache_backend(uri: str, max_bytes: int) -> ResponseCacheBackend:
+    if not uri:
+        return ResponseCacheBackend()
+
+    if uri == "memory://":
+        return MemoryResponseCacheBackend(max_bytes)
+
+    if uri.startswith("redis://"):
+        return RedisResponseCacheBackend(
+            Redis.from_url(uri, socket_timeout=1, socket_connect_timeout=1),
+        )
+
+    raise ValueError(f"Unsupported response cache: {uri}")
+
+
+class ResponseCache:
+    """
+    Serve responses from a backend, rebuilding each at most once at a time.
+
+    An entry is fresh for ``ttl`` seconds and then stale for ``stale_ttl`` more.
+    A stale entry is rebuilt by the first request that sees it while the others
+    keep being served the stale one. Requests missing an entry that is already
+    being built wait for that build instead of starting their own.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        backend: ResponseCacheBackend,
+        ttl: float,
+        stale_ttl: float = 0,
+    ):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._builds: dict[tuple[str, str], asyncio.Future[bytes]] = {}
+        # Bumped by invalidations, a build started before one is not stored
+        self._generations: dict[str, int] = {}
+        # Invalidations of other workers come from the invalidation bus thread
+        self._generations_lock = threading.Lock()
+
+    async def get(
+        self,
+        namespace: str,
+        key: str,
+        build: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        entry = await self.backend.get(namespace, key)
+        building = self._builds.get((namespace, key))
+
+        if entry is not None:
+            (stored_at,) = _HEADER.unpack_from(entry)
+            value = entry[_HEADER.size :]
+
+            if time.time() - stored_at < self.ttl:
+                hits.inc(cache=self.name, state="fresh")
+                return value
+            if building is not None:
+                hits.inc(cache=self.name, state="stale")
+                return value
+        elif building is not None:
+            hits.inc(cache=self.name, state="coalesced")
+            try:
+                return await asyncio.shield(building)
+            except asyncio.CancelledError:
+                # Unless the build was abandoned by its own request, e.g. when its
+                # client went away, then this request takes over
+                if not building.cancelled():
+                    raise
+
+        misses.inc(cache=self.name)
+        return await self._build(namespace, key, build)
+
+    async def _build(
+        self,
+        namespace: str,
+        key: str,
+        build: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        future: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+        self._builds[(namespace, key)] = future
+        generation = self._generations.get(namespace, 0)
+
+        try:
+            value = await build()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting, do not warn about an unretrieved exception
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self._builds[(namespace, key)]
+
+        if generation == self._generations.get(namespace, 0):
+            await self.backend.set(
+                namespace,
+                key,
+                _HEADER.pack(time.time()) + value,
+                self.ttl + self.stale_ttl,
+            )
+
+        return value
+
+    def invalidate(self, namespace: str, remote: bool = False):
+        """
+        Drop the entries of the namespace and keep the builds running from
+        storing theirs.
+
+        :param remote: whether the invalidation was made by another worker, which
+            already dropped the entries of a shared backend
+        """
+        with self._generations_lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+        if not (remote and self.backend.shared):
+            self.backend.invalidate(namespace)
+
+    def clear(self):
+        self._generations.clear()
+        self.backend.clear()
+
+    async def close(self):
+        await self.backend.close()
@@ -0,0 +1,101 @@
+"""
+Break the time spent on a request down into phases, for a ``Server-Timing``
+response header.
+
+A ``ServerTiming`` is made current for a request by ``ServerTimingMiddleware``.
+Code then measures its phases with ``timed``, or ``timed_phase`` for async
+functions, which cost a context variable lookup when no request is timed.
+Phases are exclusive: a phase does not count the phases nested in it, nor the
+time of ``excluded``, e.g. the time spent on SQL which is reported on its own.
+"""
+
+import functools
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class ServerTiming:
+    def __init__(self, excluded: Callable[[], float] = lambda: 0.0):
+        self.excluded = excluded
+        # Name -> seconds
+        self.phases: dict[str, float] = {}
+        # [elapsed, excluded] seconds of the phases nested in each running phase
+        self._nested: list[list[float]] = []
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        self._nested.append([0.0, 0.0])
+        excluded = self.excluded()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            excluded = self.excluded() - excluded
+            nested_elapsed, nested_excluded = self._nested.pop()
+            self.add(
+                name,
+                elapsed - nested_elapsed - (excluded - nested_excluded),
+            )
+            if self._nested:
+                self._nested[-1][0] += elapsed
+                self._nested[-1][1] += excluded
+
+    def header(self) -> str:
+        return ", ".join(
+            f"{name};dur={max(seconds, 0) * 1000:.2f}"
+            for name, seconds in self.phases.items()
+        )
+
+
+_current: ContextVar[ServerTiming | None] = ContextVar("server_timing", default=None)
+
+
+def get_server_timing() -> ServerTiming | None:
+    return _current.get()
+
+
+def set_server_timing(timing: ServerTiming | None):
+    _current.set(timing)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+
+    with timing.measure(name):
+        yield
+
+
+def timed_phase(
+    name: str,
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """
+    Measure the calls of an async function as a phase.
+    """
+
+    def decorate(function: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        @functools.wraps(function)
+        async def measured(*args: P.args, **kwargs: P.kwargs) -> T:
+            timing = _current.get()
+            if timing is None:
+                return await function(*args, **kwargs)
+
+            with timing.measure(name):
+                return await function(*args, **kwargs)
+
+        return measured
+
+    return decorate
@@ -0,0 +1,146 @@
+"""
+Keep the statements that took longer than a threshold, with what issued them.
+
+A slow SELECT can be explained on a separate connection while the slowness
+happens, so that its plan is captured along with it. A given statement is only
+explained once per ``explain_interval`` seconds, so that a regression does not
+double the load of the database.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .log import get_logger
+from .metrics import registry
+
+logger = get_logger(__name__)
+
+slow_statements = registry.counter(
+    "db_slow_statements",
+    "Statements slower than the slow query threshold.",
+    ["engine"],
+)
+
+# Execution option of the connections running EXPLAIN, never recorded themselves
+SKIP_OPTION = "skip_slow_query_log"
+
+_EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN "}
+# Bound parameters are cut to this many characters
+_MAX_PARAMETERS_LENGTH = 1000
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        threshold: float,
+        max_entries: int,
+        parameters: bool = False,
+        explain: bool = False,
+        explain_interval: float = 60,
+    ):
+        """
+        :param threshold: seconds from which a statement is slow, 0 disables the log
+        :param parameters: whether bound parameters are kept and logged
+        :param explain: whether slow SELECTs are explained
+        """
+        self.threshold = threshold
+        self.parameters = parameters
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._entries: deque[dict[str, Any]] = deque(maxlen=max_entries)
+        # Statement -> last time it was explained
+        self._explained_at: dict[str, float] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        engine: AsyncEngine,
+        engine_name: str,
+        statement: str,
+        parameters: Any,
+        duration: float,
+        rows: int | None,
+        request_id: str,
+        route: str | None,
+    ):
+        if not self.threshold or duration < self.threshold:
+            return
+
+        slow_statements.inc(engine=engine_name)
+        entry = {
+            "time": datetime.now(timezone.utc),
+            "engine": engine_name,
+            "statement": statement,
+            "parameters": (
+                repr(parameters)[:_MAX_PARAMETERS_LENGTH] if self.parameters else None
+            ),
+            "duration": duration,
+            "rows": rows,
+            "request_id": request_id,
+            "route": route,
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+        if self._should_explain(statement):
+            task = asyncio.get_running_loop().create_task(
+                self._explain(engine, entry, parameters),
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._log(entry)
+
+    def _should_explain(self, statement: str) -> bool:
+        if not self.explain or not statement.lstrip()[:6].upper() == "SELECT":
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(statement, -self.explain_interval) < (
+                self.explain_interval
+            ):
+                return False
+
+            if len(self._explained_at) >= 1000:
+                self._explained_at.clear()
+            self._explained_at[statement] = now
+
+        return True
+
+    async def _explain(self, engine: AsyncEngine, entry: dict[str, Any], parameters):
+        prefix = _EXPLAIN_PREFIXES.get(engine.dialect.name, "EXPLAIN ")
+        try:
+            async with engine.connect() as connection:
+                connection = await connection.execution_options(**{SKIP_OPTION: True})
+                result = await connection.exec_driver_sql(
+                    prefix + entry["statement"],
+                    parameters,
+                )
+                entry["plan"] = [dict(row._mapping) for row in result]
+        except Exception:
+            logger.exception("Failed to explain a slow statement")
+        finally:
+            self._log(entry)
+
+    @staticmethod
+    def _log(entry: dict[str, Any]):
+        logger.warning("Slow statement", data=entry)
+
+    def entries(self) -> list[dict[str, Any]]:
+        """
+        :return: the slow statements kept, most recent first
+        """
+        with self._lock:
+            return list(reversed(self._entries))
+
+    async def wait_explanations(self):
+        await asyncio.gather(*self._tasks)
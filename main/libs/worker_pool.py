@@ -0,0 +1,103 @@
+"""
+Run blocking functions on a bounded pool of threads, off the event loop.
+
+A ``WorkerPool`` refuses new work with ``WorkerPoolFull`` once ``max_backlog``
+calls are already waiting for a thread, so that a burst fails fast instead of
+piling up behind work that would time out anyway.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from .metrics import registry
+
+T = TypeVar("T")
+
+queued = registry.gauge(
+    "worker_pool_queued",
+    "Calls waiting for a thread of the pool.",
+    ["pool"],
+)
+running = registry.gauge(
+    "worker_pool_running",
+    "Calls running on a thread of the pool.",
+    ["pool"],
+)
+rejections = registry.counter(
+    "worker_pool_rejections",
+    "Calls refused because the backlog of the pool was full.",
+    ["pool"],
+)
+wait_time = registry.histogram(
+    "worker_pool_wait_seconds",
+    "Time calls waited for a thread of the pool.",
+    ["pool"],
+)
+
+
+class WorkerPoolFull(Exception):
+    pass
+
+
+class WorkerPool:
+    def __init__(self, name: str, max_workers: int, max_backlog: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_backlog = max_backlog
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        # Calls submitted and not finished yet, running or queued
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        queued.set_function(
+            lambda: max(self._pending - self.max_workers, 0),
+            pool=name,
+        )
+
+    def _call(self, submitted_at: float, function: Callable[..., Any], *args: Any):
+        wait_time.observe(time.perf_counter() - submitted_at, pool=self.name)
+        running.inc(pool=self.name)
+        try:
+            return function(*args)
+        finally:
+            running.dec(pool=self.name)
+
+    def _release(self, _: "Future[Any]"):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, function: Callable[..., T], *args: Any) -> T:
+        """
+        Run ``function(*args)`` on the pool and wait for its result.
+
+        :raise WorkerPoolFull: when ``max_backlog`` calls are already queued
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_backlog:
+                rejections.inc(pool=self.name)
+                raise WorkerPoolFull(self.name)
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(
+                self._call,
+                time.perf_counter(),
+                function,
+                *args,
+            )
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        # Also called when a cancelled request cancels its queued call. A call
+        # already running is not stopped and holds its slot until it finishes.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
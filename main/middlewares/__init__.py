@@ -1,2 +1,5 @@
 from .access_log import AccessLogMiddleware
-from .db import DBSessionMiddleware
+from .db import DBSessionMiddleware, no_db_session
+from .metrics import HTTPMetricsMiddleware
+from .profiler import ProfilerMiddleware
+from .server_timing import ServerTimingMiddleware
@@ -5,53 +5,105 @@ with some modifications
 """
 
 import http
+import json
 import logging
 import os
-import sys
+import random
+import re
 import time
-from typing import TYPE_CHECKING, TypedDict
+from collections.abc import Callable, Iterable
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, TypedDict
 
 from uvicorn.protocols.utils import get_client_addr, get_path_with_query_string
 
+from main.libs.log import DeferredArg
+
 if TYPE_CHECKING:
     from asgiref.typing import (
         ASGI3Application,
         ASGIReceiveCallable,
         ASGISendCallable,
         ASGISendEvent,
+        HTTPResponseStartEvent,
         HTTPScope,
     )
 
+    from main._db import QueryStats
+
 
 class AccessInfo(TypedDict, total=False):
-    response: "ASGISendEvent"
+    response: "HTTPResponseStartEvent"
     start_time: float
     end_time: float
+    query_stats: "QueryStats | None"
 
 
 class AccessLogMiddleware:
     # 127.0.0.6 - - [2023-06-16 05:20:48,983] "GET /ready HTTP/1.1"
-    # 200 2 "-" "kube-probe/1.22+" "1.2.3.4" 0.002
+    # 200 2 "-" "kube-probe/1.22+" "1.2.3.4" 0.002 0 0.000
     DEFAULT_FORMAT = (
         '%(h)s %(l)s %(u)s %(t)s "%(R)s" '
-        '%(s)d %(B)s "%(f)s" "%(a)s" "%(x_forwarded_for)s" %(L).3f'
+        '%(s)d %(B)s "%(f)s" "%(a)s" "%(x_forwarded_for)s" %(L).3f '
+        "%(db_statements)d %(db_time).3f"
     )
 
+    # Fields of a JSON line -> atoms they hold
+    JSON_FIELDS = {
+        "time": "timestamp",
+        "client": "h",
+        "method": "m",
+        "path": "U",
+        "query": "q",
+        "route": "route",
+        "protocol": "H",
+        "status": "s",
+        "bytes": "B",
+        "referer": "f",
+        "user_agent": "a",
+        "x_forwarded_for": "x_forwarded_for",
+        "duration": "L",
+        "db_statements": "db_statements",
+        "db_time": "db_time",
+    }
+
     def __init__(
         self,
         app: "ASGI3Application",
         log_format: str | None = None,
         logger: logging.Logger | None = None,
+        json_lines: bool = False,
+        sample_rate: float = 1.0,
+        sample_rates: dict[str, float] | None = None,
+        slow_threshold: float | None = None,
     ):
+        """
+        :param json_lines: log a JSON object per request instead of ``log_format``
+        :param sample_rate: share of successful requests that are logged
+        :param sample_rates: ``sample_rate`` of some paths, e.g. ``{"/pings": 0.01}``
+        :param slow_threshold: seconds after which a request is always logged, and
+            marked as slow
+        """
         self.app = app
-        self.format = log_format or self.DEFAULT_FORMAT
+        self.json_lines = json_lines
+        if json_lines:
+            self.format = "%s"
+            self.formatter = AccessLogFormatter(self.JSON_FIELDS.values())
+        else:
+            self.format = log_format or self.DEFAULT_FORMAT
+            self.formatter = AccessLogFormatter.from_format(self.format)
+
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates or {}
+        self.slow_threshold = slow_threshold
 
         if logger is None:
+            from main.libs.log import log_pipeline
+
             self.logger = logging.getLogger("http.access")
             self.logger.setLevel(logging.INFO)
-            handler = logging.StreamHandler(sys.stdout)
+            handler = log_pipeline.handler(logging.Formatter("%(message)s"))
             handler.setLevel(logging.INFO)
-            handler.setFormatter(logging.Formatter("%(message)s"))
             self.logger.addHandler(handler)
         else:
             self.logger = logger
@@ -68,12 +120,15 @@ class AccessLogMiddleware:
         if scope["type"] != "http":
             return await self.app(scope, receive, send)  # pragma: no cover
 
-        info = AccessInfo(response={})
+        from main import db
+
+        info = AccessInfo()
 
         async def wrapped_send(message: "ASGISendEvent"):
             if message["type"] == "http.response.start":
                 info["response"] = message
                 info["end_time"] = time.time()
+                info["query_stats"] = db.query_stats()
                 self.log(scope, info)
 
             await send(message)
@@ -81,83 +136,258 @@ class AccessLogMiddleware:
         info["start_time"] = time.time()
         await self.app(scope, receive, wrapped_send)
 
+    def is_slow(self, info: AccessInfo) -> bool:
+        return (
+            self.slow_threshold is not None
+            and _request_time(info) >= self.slow_threshold
+        )
+
+    def is_sampled(self, scope: "HTTPScope", info: AccessInfo) -> bool:
+        # Errors are always logged, only successful requests are sampled
+        if info["response"]["status"] >= 400:
+            return True
+
+        rate = self.sample_rates.get(scope["path"], self.sample_rate)
+        return rate >= 1 or random.random() < rate  # noqa: S311
+
     def log(self, scope: "HTTPScope", info: AccessInfo):
-        self.logger.info(self.format, AccessLogAtoms(scope, info))
-
-
-class AccessLogAtoms(dict):
-    def __init__(self, scope: "HTTPScope", info: AccessInfo):
-        super().__init__()
-
-        for name, value in scope["headers"]:
-            self[f"{{{name.decode('latin1').lower()}}}i"] = value.decode("latin1")
-        for name, value in info["response"].get("headers", []):
-            self[f"{{{name.decode('latin1').lower()}}}o"] = value.decode("latin1")
-        for name, value in os.environ.items():
-            self[f"{{{name.lower()!r}}}e"] = value
-
-        protocol = f"HTTP/{scope['http_version']}"
-
-        status = info["response"]["status"]
-        try:
-            status_phrase = http.HTTPStatus(status).phrase
-        except ValueError:
-            status_phrase = "-"
-
-        path = scope["root_path"] + scope["path"]
-        full_path = get_path_with_query_string(scope)
-        request_line = f"{scope['method']} {path} {protocol}"
-        full_request_line = f"{scope['method']} {full_path} {protocol}"
-
-        request_time = info["end_time"] - info["start_time"]
-        client_host = scope["client"][0]
-        client_addr = get_client_addr(scope)
-        self.update(
-            {
-                "h": client_host,
-                "client_addr": client_addr,
-                "l": "-",
-                "u": "-",  # Not available on ASGI.
-                "t": time.strftime("[%d/%b/%Y:%H:%M:%S %z]"),
-                "r": request_line,
-                "request_line": full_request_line,
-                "R": full_request_line,
-                "m": scope["method"],
-                "U": scope["path"],
-                "q": scope["query_string"].decode(),
-                "H": protocol,
-                "s": status,
-                "status_code": f"{status} {status_phrase}",
-                "st": status_phrase,
-                "B": self["{Content-Length}o"],
-                "b": self.get("{Content-Length}o", "-"),
-                "f": self["{Referer}i"],
-                "a": self["{User-Agent}i"],
-                "T": int(request_time),
-                "M": int(request_time * 1_000),
-                "D": int(request_time * 1_000_000),
-                "L": request_time,
-                "p": f"<{os.getpid()}>",
-                "x_forwarded_for": get_x_forwarded_for(scope) or "-",
-            },
+        slow = self.is_slow(info)
+        if not slow and not self.is_sampled(scope, info):
+            return
+
+        atoms = self.formatter(scope, info)
+        if self.json_lines:
+            self.logger.info(self.format, _JSONLine(atoms, slow))
+        else:
+            self.logger.info(self.format, atoms)
+
+
+class _JSONLine(DeferredArg):
+    """
+    Encode the atoms of a request as a JSON object when the line is written, on
+    the log writer thread.
+    """
+
+    __slots__ = ("atoms", "slow")
+
+    def __init__(self, atoms: dict[str, Any], slow: bool):
+        self.atoms = atoms
+        self.slow = slow
+
+    def fields(self) -> dict[str, Any]:
+        fields = {
+            name: None if self.atoms[key] == "-" else self.atoms[key]
+            for name, key in AccessLogMiddleware.JSON_FIELDS.items()
+        }
+        if fields["bytes"] is not None:
+            fields["bytes"] = int(fields["bytes"])
+        if self.slow:
+            fields["slow"] = True
+        return fields
+
+    def __str__(self) -> str:
+        return json.dumps(self.fields(), separators=(",", ":"))
+
+
+# Computes an atom from the scope, the access info and the picked request and
+# response headers
+Extract = Callable[["HTTPScope", AccessInfo, dict[str, str], dict[str, str]], Any]
+
+_ATOM = re.compile(r"%\(([^)]*)\)")
+_HEADER_ATOM = re.compile(r"\{(.*)\}([ioe])")
+
+_pid = f"<{os.getpid()}>"
+
+
+def _update_pid():
+    global _pid
+    _pid = f"<{os.getpid()}>"
+
+
+# Workers forked after the app was imported log their own pid
+os.register_at_fork(after_in_child=_update_pid)
+
+# (second, formatted time) of the last formatted timestamp
+_timestamp: tuple[int, str] = (0, "")
+
+
+def _format_time(now: float) -> str:
+    global _timestamp
+    second = int(now)
+    if _timestamp[0] != second:
+        _timestamp = (
+            second,
+            time.strftime("[%d/%b/%Y:%H:%M:%S %z]", time.localtime(second)),
         )
+    return _timestamp[1]
+
+
+def _protocol(scope: "HTTPScope") -> str:
+    return f"HTTP/{scope['http_version']}"
+
+
+def _status_phrase(info: AccessInfo) -> str:
+    try:
+        return http.HTTPStatus(info["response"]["status"]).phrase
+    except ValueError:
+        return "-"
+
+
+def _request_time(info: AccessInfo) -> float:
+    return info["end_time"] - info["start_time"]
+
+
+def _timestamp_iso(info: AccessInfo) -> str:
+    end_time = datetime.fromtimestamp(info["end_time"], timezone.utc)
+    return end_time.isoformat(timespec="milliseconds")
+
+
+def _route(scope: "HTTPScope") -> str:
+    # Set by the router on the scope once a route matched
+    route = scope.get("route")
+    return getattr(route, "path", "-")
+
+
+def _request_line(scope: "HTTPScope") -> str:
+    path = get_path_with_query_string(scope)
+    return f"{scope['method']} {path} {_protocol(scope)}"
+
 
-    def __getitem__(self, key: str) -> str:
-        try:
-            if key.startswith("{"):
-                return super().__getitem__(key.lower())
+def _last_host(x_forwarded_for: str | None) -> str:
+    if not x_forwarded_for:
+        return "-"
+    return x_forwarded_for.split(",")[-1].strip() or "-"
+
+
+_ATOMS: dict[str, Extract] = {
+    "h": lambda scope, *_: scope["client"][0],
+    "client_addr": lambda scope, *_: get_client_addr(scope),
+    "l": lambda *_: "-",
+    "u": lambda *_: "-",  # Not available on ASGI.
+    "t": lambda scope, info, *_: _format_time(info["end_time"]),
+    "timestamp": lambda scope, info, *_: _timestamp_iso(info),
+    "r": lambda scope, *_: (
+        f"{scope['method']} {scope['root_path']}{scope['path']} {_protocol(scope)}"
+    ),
+    "request_line": lambda scope, *_: _request_line(scope),
+    "R": lambda scope, *_: _request_line(scope),
+    "m": lambda scope, *_: scope["method"],
+    "U": lambda scope, *_: scope["path"],
+    "route": lambda scope, *_: _route(scope),
+    "q": lambda scope, *_: scope["query_string"].decode(),
+    "H": lambda scope, *_: _protocol(scope),
+    "s": lambda scope, info, *_: info["response"]["status"],
+    "status_code": lambda scope, info, *_: (
+        f"{info['response']['status']} {_status_phrase(info)}"
+    ),
+    "st": lambda scope, info, *_: _status_phrase(info),
+    "B": lambda scope, info, request, response: response.get("content-length", "-"),
+    "b": lambda scope, info, request, response: response.get("content-length", "-"),
+    "f": lambda scope, info, request, response: request.get("referer", "-"),
+    "a": lambda scope, info, request, response: request.get("user-agent", "-"),
+    "T": lambda scope, info, *_: int(_request_time(info)),
+    "M": lambda scope, info, *_: int(_request_time(info) * 1_000),
+    "D": lambda scope, info, *_: int(_request_time(info) * 1_000_000),
+    "L": lambda scope, info, *_: _request_time(info),
+    "p": lambda *_: _pid,
+    "x_forwarded_for": lambda scope, info, request, response: _last_host(
+        request.get("x-forwarded-for"),
+    ),
+    "db_statements": lambda scope, info, *_: (
+        info["query_stats"].statements if info.get("query_stats") else 0
+    ),
+    "db_time": lambda scope, info, *_: (
+        info["query_stats"].duration if info.get("query_stats") else 0.0
+    ),
+}
+
+# Headers read by the atoms above
+_ATOM_HEADERS = {
+    "B": ("o", "content-length"),
+    "b": ("o", "content-length"),
+    "f": ("i", "referer"),
+    "a": ("i", "user-agent"),
+    "x_forwarded_for": ("i", "x-forwarded-for"),
+}
+
+
+def _pick_headers(
+    headers: "Iterable[tuple[bytes, bytes]]",
+    names: frozenset[bytes],
+) -> dict[str, str]:
+    return {
+        name.decode("latin1").lower(): value.decode("latin1")
+        for name, value in headers
+        if name.lower() in names
+    }
+
+
+class AccessLogFormatter:
+    """
+    Compute the given atoms of a request.
+
+    The atoms are resolved once, so that a request only computes the atoms that
+    are used and only decodes the headers that they read. Atoms of the
+    environment, ``{NAME}e``, are read when the formatter is created. Unknown
+    atoms and missing headers are ``-``.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = tuple(dict.fromkeys(keys))
+        self._constants: dict[str, Any] = {}
+        self._atoms: list[tuple[str, Extract]] = []
+        request_headers: set[str] = set()
+        response_headers: set[str] = set()
+        environ = {name.lower(): value for name, value in os.environ.items()}
+
+        for key in self.keys:
+            header_atom = _HEADER_ATOM.fullmatch(key)
+            if header_atom:
+                name, kind = header_atom[1].lower(), header_atom[2]
+                if kind == "e":
+                    self._constants[key] = environ.get(name, "-")
+                else:
+                    headers = request_headers if kind == "i" else response_headers
+                    headers.add(name)
+                    self._atoms.append((key, _header_atom(name, kind)))
+            elif key in _ATOMS:
+                if key in _ATOM_HEADERS:
+                    kind, name = _ATOM_HEADERS[key]
+                    headers = request_headers if kind == "i" else response_headers
+                    headers.add(name)
+                self._atoms.append((key, _ATOMS[key]))
             else:
-                return super().__getitem__(key)
-        except KeyError:
-            return "-"
+                self._constants[key] = "-"
+
+        self._request_headers = frozenset(h.encode("latin1") for h in request_headers)
+        self._response_headers = frozenset(h.encode("latin1") for h in response_headers)
 
+    @classmethod
+    def from_format(cls, log_format: str) -> "AccessLogFormatter":
+        """
+        Create a formatter of the atoms used by a log format.
+        """
+        return cls(_ATOM.findall(log_format))
+
+    def __call__(self, scope: "HTTPScope", info: AccessInfo) -> dict[str, Any]:
+        request_headers = (
+            _pick_headers(scope["headers"], self._request_headers)
+            if self._request_headers
+            else {}
+        )
+        response_headers = (
+            _pick_headers(info["response"].get("headers", []), self._response_headers)
+            if self._response_headers
+            else {}
+        )
 
-def get_x_forwarded_for(scope: "HTTPScope") -> str | None:
-    headers = dict(scope["headers"])
-    if b"x-forwarded-for" not in headers:
-        return None
+        atoms = dict(self._constants)
+        for key, extract in self._atoms:
+            atoms[key] = extract(scope, info, request_headers, response_headers)
+        return atoms
 
-    x_forwarded_for = headers[b"x-forwarded-for"].decode("latin1")
-    x_forwarded_for_hosts = [item.strip() for item in x_forwarded_for.split(",")]
 
-    return x_forwarded_for_hosts[-1] if x_forwarded_for_hosts else None
+def _header_atom(name: str, kind: str) -> Extract:
+    if kind == "i":
+        return lambda scope, info, request, response: request.get(name, "-")
+    return lambda scope, info, request, response: response.get(name, "-")
@@ -1,4 +1,7 @@
-from typing import TYPE_CHECKING
+from collections.abc import Callable
+from typing import TYPE_CHECKING, TypeVar
+
+from starlette.routing import Route
 
 if TYPE_CHECKING:
     from asgiref.typing import (
@@ -8,10 +11,35 @@ if TYPE_CHECKING:
         HTTPScope,
     )
 
+F = TypeVar("F", bound=Callable)
+
+
+def no_db_session(endpoint: F) -> F:
+    """
+    Declare that a route never uses the database, so ``DBSessionMiddleware`` does
+    not open a session scope for it. Only routes without path parameters are
+    supported, which covers probes and other internal endpoints.
+    """
+    endpoint.__no_db_session__ = True  # type: ignore[attr-defined]
+    return endpoint
+
+
+def is_preflight(scope: "HTTPScope") -> bool:
+    """
+    Tell a CORS preflight, which CORSMiddleware answers, from other OPTIONS
+    requests, which reach their route.
+    """
+    if scope["method"] != "OPTIONS":
+        return False
+
+    names = {name for name, _ in scope["headers"]}
+    return b"origin" in names and b"access-control-request-method" in names
+
 
 class DBSessionMiddleware:
     def __init__(self, app: "ASGI3Application"):
         self.app = app
+        self.sessionless_paths: frozenset[str] | None = None
 
     async def __call__(
         self,
@@ -22,7 +50,24 @@ class DBSessionMiddleware:
         if scope["type"] != "http":
             return await self.app(scope, receive, send)  # pragma: no cover
 
+        # CORS preflights are answered without reaching any route
+        if is_preflight(scope) or self.is_sessionless(scope):
+            return await self.app(scope, receive, send)
+
         from main import db
 
-        async with db.scope():
+        async with db.scope(scope):  # type: ignore[arg-type]
             await self.app(scope, receive, send)
+
+    def is_sessionless(self, scope: "HTTPScope") -> bool:
+        if self.sessionless_paths is None:
+            # Routes are all registered by the time the first request comes in
+            self.sessionless_paths = frozenset(
+                route.path
+                for route in scope["app"].routes  # type: ignore[typeddict-item]
+                if isinstance(route, Route)
+                and not route.param_convertors
+                and getattr(route.endpoint, "__no_db_session__", False)
+            )
+
+        return scope["path"] in self.sessionless_paths
@@ -0,0 +1,131 @@
+import time
+from typing import TYPE_CHECKING
+
+from starlette.routing import Route
+
+from main.libs.metrics import registry
+
+if TYPE_CHECKING:
+    from asgiref.typing import (
+        ASGI3Application,
+        ASGIReceiveCallable,
+        ASGISendCallable,
+        ASGISendEvent,
+        HTTPScope,
+    )
+
+# Label of requests matching no route, whose paths are not bounded
+UNMATCHED = "unmatched"
+METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "Requests being handled.",
+    ["method", "route"],
+)
+responses = registry.counter(
+    "http_responses",
+    "Responses sent, by status code.",
+    ["method", "route", "status"],
+)
+time_to_first_byte = registry.histogram(
+    "http_time_to_first_byte_seconds",
+    "Time until the status and headers of the response were sent.",
+    ["method", "route"],
+)
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time until the whole body of the response was sent.",
+    ["method", "route"],
+)
+
+
+class HTTPMetricsMiddleware:
+    """
+    Measure requests, labelled by the template of the route they match, e.g.
+    ``/categories/{category_id}/items``, so that the number of series does not
+    grow with the ids requested.
+
+    The route is the one the router picked, read from ``scope["route"]`` as the
+    access log does. Only the in-flight gauge, which is raised before routing,
+    is labelled by matching the path against the route templates upfront.
+    """
+
+    def __init__(self, app: "ASGI3Application"):
+        self.app = app
+        self.routes: list[Route] | None = None
+        # Paths of the routes without parameters that were requested
+        self.static_paths: dict[str, str] = {}
+
+    async def __call__(
+        self,
+        scope: "HTTPScope",
+        receive: "ASGIReceiveCallable",
+        send: "ASGISendCallable",
+    ):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)  # pragma: no cover
+
+        method = scope["method"] if scope["method"] in METHODS else "OTHER"
+        in_flight_route = self.match_route_template(scope)
+        start = time.perf_counter()
+        status = 500
+
+        async def wrapped_send(message: "ASGISendEvent"):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                time_to_first_byte.observe(
+                    time.perf_counter() - start,
+                    method=method,
+                    route=routed_template(scope),
+                )
+
+            await send(message)
+
+        requests_in_flight.inc(method=method, route=in_flight_route)
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            route = routed_template(scope)
+            request_duration.observe(
+                time.perf_counter() - start,
+                method=method,
+                route=route,
+            )
+            responses.inc(method=method, route=route, status=str(status))
+            requests_in_flight.dec(method=method, route=in_flight_route)
+
+    def match_route_template(self, scope: "HTTPScope") -> str:
+        """
+        Guess the route of a request before it is routed, from its path alone.
+        """
+        path = scope["path"]
+        if path in self.static_paths:
+            return self.static_paths[path]
+
+        if self.routes is None:
+            # Routes are all registered by the time the first request comes in
+            self.routes = [
+                route
+                for route in scope["app"].routes  # type: ignore[typeddict-item]
+                if isinstance(route, Route)
+            ]
+
+        # The first route whose path matches, as the router picks it
+        for route in self.routes:
+            if route.path_regex.match(path):
+                if not route.param_convertors:
+                    self.static_paths[path] = route.path
+                return route.path
+
+        return UNMATCHED
+
+
+def routed_template(scope: "HTTPScope") -> str:
+    """
+    Get the template of the route the router picked, also set when the method is
+    not allowed.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED
@@ -0,0 +1,61 @@
+import asyncio
+import random
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from asgiref.typing import (
+        ASGI3Application,
+        ASGIReceiveCallable,
+        ASGISendCallable,
+        HTTPScope,
+    )
+
+
+class ProfilerMiddleware:
+    """
+    Profile the requests carrying a profiler token and a ``sample_rate`` share of
+    the others. The middleware is only added when profiling is enabled, so that
+    it costs nothing otherwise.
+
+    It must run within ``DBSessionMiddleware`` to name captures by request id.
+    """
+
+    def __init__(self, app: "ASGI3Application", sample_rate: float = 0.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(
+        self,
+        scope: "HTTPScope",
+        receive: "ASGIReceiveCallable",
+        send: "ASGISendCallable",
+    ):
+        if scope["type"] != "http" or not self.is_profiled(scope):
+            return await self.app(scope, receive, send)
+
+        from main import db
+        from main._db import generate_request_id
+        from main.utils.profiler import profiler
+
+        profile = profiler.start()
+        if profile is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop(profile)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            # Sessionless routes have no request id
+            request_id = db.request_id_context.get() or generate_request_id()
+            await asyncio.to_thread(profiler.save, profile, request_id, route)
+
+    def is_profiled(self, scope: "HTTPScope") -> bool:
+        from main.utils.profiler import PROFILER_TOKEN_HEADER, is_profiler_token
+
+        header = PROFILER_TOKEN_HEADER.lower().encode()
+        for name, value in scope["headers"]:
+            if name == header:
+                return is_profiler_token(value.decode("latin1"))
+
+        return random.random() < self.sample_rate  # noqa: S311
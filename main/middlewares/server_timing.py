@@ -0,0 +1,68 @@
+import time
+from typing import TYPE_CHECKING
+
+from main.libs.server_timing import ServerTiming, set_server_timing
+
+if TYPE_CHECKING:
+    from asgiref.typing import (
+        ASGI3Application,
+        ASGIReceiveCallable,
+        ASGISendCallable,
+        ASGISendEvent,
+        HTTPScope,
+    )
+
+
+class ServerTimingMiddleware:
+    """
+    Add a ``Server-Timing`` header breaking the time of a request down into the
+    phases measured while handling it, e.g.
+
+        Server-Timing: auth;dur=0.21, lookup;dur=0.05, build;dur=0.48,
+        serialize;dur=0.12, db;dur=1.93, middleware;dur=0.64, total;dur=3.43
+
+    ``db`` is the time spent on SQL, the other phases exclude it. ``middleware``
+    is what is left of ``total``: middlewares, routing, request validation, and
+    phases that are not measured.
+    """
+
+    def __init__(self, app: "ASGI3Application"):
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: "HTTPScope",
+        receive: "ASGIReceiveCallable",
+        send: "ASGISendCallable",
+    ):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)  # pragma: no cover
+
+        from main import db
+
+        def db_time() -> float:
+            query_stats = db.query_stats()
+            return query_stats.duration if query_stats else 0.0
+
+        timing = ServerTiming(excluded=db_time)
+        start = time.perf_counter()
+
+        async def wrapped_send(message: "ASGISendEvent"):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                measured = sum(timing.phases.values())
+                timing.add("db", db_time())
+                timing.add("middleware", total - measured - db_time())
+                timing.add("total", total)
+
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header().encode()))
+                message = {**message, "headers": headers}  # type: ignore[assignment]
+
+            await send(message)
+
+        set_server_timing(timing)
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            set_server_timing(None)
@@ -1,7 +1,8 @@
 from datetime import datetime
 
 from sqlalchemy import Column, DateTime, MetaData
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Mapped, declarative_base, mapped_column
 
 BaseModel = declarative_base(
     metadata=MetaData(
@@ -22,8 +23,9 @@ class TimestampMixin:
         default=datetime.utcnow,
         nullable=False,
     )
-    updated_at = Column(
-        DateTime,
+    # Microseconds keep two changes within a second apart, as ETags rely on it
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
         default=datetime.utcnow,
         onupdate=datetime.utcnow,
         nullable=False,
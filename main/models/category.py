@@ -16,6 +16,8 @@ class CategoryModel(BaseModel, TimestampMixin):
     name: Mapped[str] = mapped_column(String(255), unique=True)
     description: Mapped[str] = mapped_column(String(5000))
     creator_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
+    # Denormalized COUNT(*) of the category's items, maintained by the item engine
+    item_count: Mapped[int] = mapped_column(default=0, server_default="0")
     items: Mapped[list["ItemModel"]] = relationship(
         back_populates="category",
         lazy="raise",
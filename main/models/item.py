@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import BaseModel, TimestampMixin
@@ -11,6 +11,10 @@ if TYPE_CHECKING:
 
 class ItemModel(BaseModel, TimestampMixin):
     __tablename__ = "item"
+    __table_args__ = (
+        # Keyset pagination of a category's items seeks on this index
+        Index("ix_category_id_created_at_id", "category_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True)
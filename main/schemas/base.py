@@ -28,6 +28,11 @@ class Empty(BaseModel):
 
 
 class PaginationSchema(BaseModel):
-    total: int
-    page: PositiveInt
+    total: int | None = None
+    page: PositiveInt | None = None
     number_per_page: PositiveInt
+
+
+class CursorPaginationSchema(BaseModel):
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
@@ -1,4 +1,12 @@
-from .base import BaseResponseSchema, BaseValidationSchema, LongStr, ShortStr
+from pydantic import PositiveInt
+
+from .base import (
+    BaseResponseSchema,
+    BaseValidationSchema,
+    CursorPaginationSchema,
+    LongStr,
+    ShortStr,
+)
 
 
 class CategoryCreatePayloadSchema(BaseValidationSchema):
@@ -11,3 +19,8 @@ class CategorySchema(BaseResponseSchema):
     name: ShortStr
     description: LongStr
     is_creator: bool
+
+
+class CategoriesSchema(BaseResponseSchema, CursorPaginationSchema):
+    categories: list[CategorySchema]
+    number_per_page: PositiveInt
@@ -1,8 +1,11 @@
-from pydantic import model_validator
+from datetime import datetime
+
+from pydantic import Field, model_validator
 
 from .base import (
     BaseResponseSchema,
     BaseValidationSchema,
+    CursorPaginationSchema,
     LongStr,
     PaginationSchema,
     ShortStr,
@@ -14,6 +17,16 @@ class ItemCreatePayloadSchema(BaseValidationSchema):
     description: LongStr
 
 
+MAX_ITEMS_PER_BATCH = 1000
+
+
+class ItemBatchCreatePayloadSchema(BaseValidationSchema):
+    items: list[ItemCreatePayloadSchema] = Field(
+        min_length=1,
+        max_length=MAX_ITEMS_PER_BATCH,
+    )
+
+
 class ItemUpdatePayloadSchema(BaseValidationSchema):
     name: ShortStr | None = None
     description: LongStr | None = None
@@ -36,5 +49,40 @@ class ItemSchema(PlainItemSchema):
     category_id: int
 
 
-class CategoryItemsSchema(BaseResponseSchema, PaginationSchema):
+class CategoryItemsSchema(
+    BaseResponseSchema,
+    PaginationSchema,
+    CursorPaginationSchema,
+):
     items: list[PlainItemSchema]
+
+
+class CachedItemSchema(BaseResponseSchema):
+    id: int
+    name: str
+    description: str
+    creator_id: int
+    updated_at: datetime
+
+
+class CachedCategoryItemsSchema(BaseResponseSchema):
+    """
+    A page of a category's items as stored in the response cache, which is the
+    same for every viewer.
+    """
+
+    items: list[CachedItemSchema]
+    total: int | None = None
+    page: int | None = None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+class ItemBatchResultSchema(BaseResponseSchema):
+    item: ItemSchema | None = None
+    error_code: int | None = None
+    error_message: str | None = None
+
+
+class ItemBatchSchema(BaseResponseSchema):
+    items: list[ItemBatchResultSchema]
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from .base import BaseResponseSchema
+
+
+class ProfileSchema(BaseResponseSchema):
+    name: str
+    request_id: str
+    route: str
+    created_at: datetime
+    size: int
+
+
+class ProfilesSchema(BaseResponseSchema):
+    profiles: list[ProfileSchema]
@@ -1,13 +1,24 @@
 import datetime
+import time
 from typing import Annotated
 
 import jwt
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jwt import DecodeError
+from jwt import InvalidTokenError
 
 from main import config
 from main.commons.exceptions import Unauthorized
+from main.libs.cache import LRUCache
+from main.libs.server_timing import timed_phase
+
+# Verified token -> user id, an entry is dropped when its token expires
+_verified_tokens = LRUCache(
+    "access_token",
+    max_size=config.ACCESS_TOKEN_CACHE_SIZE,
+    ttl=config.JWT_LIFETIME,
+)
+_bearer = HTTPBearer(auto_error=False)
 
 
 def create_access_token_from_id(
@@ -26,21 +37,33 @@ def create_access_token_from_id(
 
 
 def get_id_from_access_token(token: str) -> int | None:
+    user_id = _verified_tokens.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
-        return jwt.decode(
+        claims = jwt.decode(
             token,
             config.JWT_SECRET,
-            algorithms="HS256",
-        ).get("sub")
-    except DecodeError:
+            algorithms=["HS256"],
+        )
+    except InvalidTokenError:
         return None
 
+    user_id = claims.get("sub")
+    if user_id and "exp" in claims:
+        _verified_tokens.set(token, user_id, ttl=claims["exp"] - time.time())
+
+    return user_id
+
+
+def clear_verified_tokens():
+    _verified_tokens.clear()
 
+
+@timed_phase("auth")
 async def get_user_id_from_request(
-    token: Annotated[
-        HTTPAuthorizationCredentials,
-        Depends(HTTPBearer(auto_error=False)),
-    ],
+    token: Annotated[HTTPAuthorizationCredentials, Depends(_bearer)],
 ) -> int | None:
     if not token:
         return None
@@ -53,15 +76,10 @@ async def get_user_id_from_request(
 
 
 async def require_authentication(
-    token: Annotated[
-        HTTPAuthorizationCredentials,
-        Depends(HTTPBearer(auto_error=False)),
-    ],
-) -> int | None:
-    if not token:
-        raise Unauthorized()
-
-    user_id = get_id_from_access_token(token.credentials)
+    # Shared with get_user_id_from_request, so that a request asking for both
+    # verifies its token once
+    user_id: Annotated[int | None, Depends(get_user_id_from_request)],
+) -> int:
     if not user_id:
         raise Unauthorized()
 
@@ -1,6 +1,9 @@
-from typing import Annotated
+from collections.abc import AsyncIterator, Sequence
+from typing import Annotated, NoReturn
 
 from fastapi import Depends
+from pydantic import TypeAdapter
+from sqlalchemy import Row
 
 from main.commons.exceptions import (
     BadRequest,
@@ -10,18 +13,35 @@ from main.commons.exceptions import (
     NotFound,
 )
 from main.engines.categories import (
+    category_exists,
+    get_cached_category_by_id,
+    get_categories_after,
+    get_categories_before,
     get_category_by_id,
-    get_category_by_name,
+    stream_categories,
 )
+from main.libs.server_timing import timed_phase
 from main.models.category import CategoryModel
 from main.schemas.category import CategorySchema
-from main.utils.auth import require_authentication
 
-from .common import PositiveIntPath
+from .common import PositiveIntPath, raise_on_duplicate_entry
+from .conditional import make_etag
+from .pagination import CursorDirection, decode_id_cursor, encode_id_cursor
 
+_category_list_adapter: TypeAdapter[list[CategorySchema]] = TypeAdapter(
+    list[CategorySchema],
+)
 
-async def get_category_from_request(category_id: PositiveIntPath) -> CategoryModel:
-    category = await get_category_by_id(category_id)
+
+async def get_category_or_404(category_id: int, cached: bool = True) -> CategoryModel:
+    """
+    :param cached: whether the category may come from the entity cache, whose
+        ``item_count`` can be stale
+    """
+    if cached:
+        category = await get_cached_category_by_id(category_id)
+    else:
+        category = await get_category_by_id(category_id)
 
     if not category:
         raise NotFound()
@@ -29,28 +49,35 @@ async def get_category_from_request(category_id: PositiveIntPath) -> CategoryMod
     return category
 
 
+@timed_phase("lookup")
+async def get_category_from_request(category_id: PositiveIntPath) -> CategoryModel:
+    return await get_category_or_404(category_id)
+
+
 RequestedCategory = Annotated[CategoryModel, Depends(get_category_from_request)]
 
 
-async def require_category_creator(
-    category: RequestedCategory,
-    user_id: Annotated[int, Depends(require_authentication)],
-):
-    if category.creator_id != user_id:
-        raise Forbidden(
-            error_message=ErrorMessage.NOT_CREATOR,
-            error_code=ErrorCode.NOT_CREATOR,
-        )
+async def raise_category_write_error(category_id: int) -> NoReturn:
+    """
+    Explain why a write restricted to the category's creator matched no row. This
+    only runs on the failure path, successful writes stay a single statement.
+    """
+    if not await category_exists(category_id):
+        raise NotFound()
 
+    raise Forbidden(
+        error_message=ErrorMessage.NOT_CREATOR,
+        error_code=ErrorCode.NOT_CREATOR,
+    )
 
-async def validate_category_name(name: str):
-    category = await get_category_by_name(name)
 
-    if category:
-        raise BadRequest(
+def raise_on_duplicate_category_name():
+    return raise_on_duplicate_entry(
+        BadRequest(
             error_message=ErrorMessage.CATEGORY_NAME_EXISTS,
             error_code=ErrorCode.CATEGORY_NAME_EXISTS,
-        )
+        ),
+    )
 
 
 def get_category_schema(category: CategoryModel, user_id: int | None):
@@ -58,3 +85,87 @@ def get_category_schema(category: CategoryModel, user_id: int | None):
         **category.__dict__,
         is_creator=category.creator_id == user_id,
     )
+
+
+def get_category_etag(category: CategoryModel, user_id: int | None) -> str:
+    return make_etag(
+        "category",
+        category.id,
+        category.updated_at,
+        category.creator_id == user_id,
+    )
+
+
+async def get_categories_page(
+    number_per_page: int,
+    cursor: str | None = None,
+) -> tuple[Sequence[Row], str | None, str | None]:
+    """
+    Get a page of categories by id, seeking from the cursor if there is one. One
+    extra row is fetched to know whether there is anything beyond the page.
+
+    :return: the categories, the next cursor and the previous cursor
+    """
+    if cursor is None:
+        direction, id = CursorDirection.NEXT, 0
+    else:
+        direction, id = decode_id_cursor(cursor)
+
+    if direction == CursorDirection.NEXT:
+        categories = await get_categories_after(id, number_per_page + 1)
+        has_next, has_prev = len(categories) > number_per_page, cursor is not None
+        categories = categories[:number_per_page]
+    else:
+        categories = await get_categories_before(id, number_per_page + 1)
+        has_next, has_prev = True, len(categories) > number_per_page
+        categories = categories[:number_per_page][::-1]
+
+    if not categories:
+        return categories, None, None
+
+    next_cursor = (
+        encode_id_cursor(CursorDirection.NEXT, categories[-1].id) if has_next else None
+    )
+    prev_cursor = (
+        encode_id_cursor(CursorDirection.PREV, categories[0].id) if has_prev else None
+    )
+    return categories, next_cursor, prev_cursor
+
+
+def get_category_list_schemas(
+    rows: Sequence[Row],
+    user_id: int | None,
+) -> list[CategorySchema]:
+    """
+    Build the schemas of listed categories from their rows, in one validation.
+    """
+    return _category_list_adapter.validate_python(
+        [
+            {
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "is_creator": row.creator_id == user_id,
+            }
+            for row in rows
+        ],
+    )
+
+
+async def stream_categories_json(user_id: int | None) -> AsyncIterator[bytes]:
+    """
+    Write every category as a JSON array, one batch of rows at a time, so that
+    memory does not grow with the table.
+    """
+    yield b"["
+
+    separator = b""
+    async for rows in stream_categories():
+        categories = _category_list_adapter.dump_json(
+            get_category_list_schemas(rows, user_id),
+        )
+        # Splice the batch's array into the streamed one
+        yield separator + categories[1:-1]
+        separator = b","
+
+    yield b"]"
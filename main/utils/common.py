@@ -1,6 +1,34 @@
-from typing import Annotated
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Annotated, Any
 
 from fastapi import Path, Query
+from sqlalchemy.exc import IntegrityError
+
+from main.commons.exceptions import BaseError
 
 PositiveIntPath = Annotated[int, Path(ge=1)]
 PositiveIntQuery = Annotated[int, Query(ge=1)]
+
+# MySQL's ER_DUP_ENTRY, raised when a unique constraint is violated
+DUPLICATE_ENTRY_ERROR_CODE = 1062
+
+
+def is_duplicate_entry(error: IntegrityError) -> bool:
+    args: tuple[Any, ...] = getattr(error.orig, "args", ())
+    return bool(args) and args[0] == DUPLICATE_ENTRY_ERROR_CODE
+
+
+@contextmanager
+def raise_on_duplicate_entry(error: BaseError) -> Iterator[None]:
+    """
+    Turn a unique constraint violation into ``error``, so that uniqueness is
+    enforced by the write itself instead of a SELECT before it.
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        if not is_duplicate_entry(e):
+            raise
+
+        raise error
@@ -0,0 +1,73 @@
+import hashlib
+from collections.abc import Callable
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from main.commons.responses import SchemaResponse
+
+# Responses tell whether the viewer is the creator, so they depend on the token
+VARY = "Authorization"
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong ETag from the values a representation is derived from.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _http_date(value: datetime) -> str:
+    # Timestamps are stored as naive UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: datetime | None,
+) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match uses the weak comparison and wins over If-Modified-Since
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+
+    # HTTP dates have no fraction of a second
+    modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return modified <= since
+
+
+def get_conditional_response(
+    request: Request,
+    build: Callable[[], BaseModel],
+    etag: str,
+    last_modified: datetime | None = None,
+) -> Response:
+    """
+    Answer with a 304 if the client already has the representation, so that it
+    is never built, otherwise with the schema returned by ``build``. Both carry
+    the validators of the representation.
+    """
+    headers = {"ETag": etag, "Vary": VARY, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    if _is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    return SchemaResponse(build(), headers=headers)
@@ -1,6 +1,9 @@
-from typing import Annotated
+from collections.abc import Sequence
+from typing import Annotated, NoReturn
 
 from fastapi import Depends
+from pydantic import TypeAdapter
+from sqlalchemy import Row
 
 from main.commons.exceptions import (
     BadRequest,
@@ -9,19 +12,37 @@ from main.commons.exceptions import (
     Forbidden,
     NotFound,
 )
+from main.engines.cache import category_items_cache
 from main.engines.items import (
-    get_item_by_id,
-    get_item_by_name,
+    get_cached_item_by_id,
+    get_existing_item_names,
+    get_items,
+    get_items_after,
+    get_items_before,
+    item_exists,
 )
+from main.libs.server_timing import timed_phase
 from main.models.item import ItemModel
-from main.schemas.item import ItemSchema
-from main.utils.auth import require_authentication
+from main.schemas.item import (
+    CachedCategoryItemsSchema,
+    CachedItemSchema,
+    ItemSchema,
+    PlainItemSchema,
+)
+
+from .category import get_category_or_404
+from .common import PositiveIntPath, raise_on_duplicate_entry
+from .conditional import make_etag
+from .pagination import CursorDirection, decode_cursor, encode_cursor
 
-from .common import PositiveIntPath
+_cached_item_list_adapter: TypeAdapter[list[CachedItemSchema]] = TypeAdapter(
+    list[CachedItemSchema],
+)
 
 
+@timed_phase("lookup")
 async def get_item_from_request(item_id: PositiveIntPath) -> ItemModel:
-    item = await get_item_by_id(item_id)
+    item = await get_cached_item_by_id(item_id)
 
     if not item:
         raise NotFound()
@@ -32,31 +53,201 @@ async def get_item_from_request(item_id: PositiveIntPath) -> ItemModel:
 RequestedItem = Annotated[ItemModel, Depends(get_item_from_request)]
 
 
-async def require_item_creator(
-    item: RequestedItem,
-    user_id: Annotated[int, Depends(require_authentication)],
-):
-    if item.creator_id != user_id:
-        raise Forbidden(
-            error_message=ErrorMessage.NOT_CREATOR,
-            error_code=ErrorCode.NOT_CREATOR,
-        )
+async def raise_item_write_error(item_id: int) -> NoReturn:
+    """
+    Explain why a write restricted to the item's creator matched no row. This
+    only runs on the failure path, successful writes stay a single statement.
+    """
+    if not await item_exists(item_id):
+        raise NotFound()
 
+    raise Forbidden(
+        error_message=ErrorMessage.NOT_CREATOR,
+        error_code=ErrorCode.NOT_CREATOR,
+    )
 
-async def validate_item_name(name: str):
-    item = await get_item_by_name(name)
 
-    if item:
-        raise BadRequest(
+def raise_on_duplicate_item_name():
+    return raise_on_duplicate_entry(
+        BadRequest(
             error_message=ErrorMessage.ITEM_NAME_EXISTS,
             error_code=ErrorCode.ITEM_NAME_EXISTS,
-        )
+        ),
+    )
 
 
-def get_item_schema(item: ItemModel | None, user_id: int | None) -> ItemSchema | None:
-    if not item:
-        return None
+async def get_taken_item_names(names: Sequence[str]) -> list[bool]:
+    """
+    Tell, for each name of a batch, whether it is already used by an item or by an
+    earlier entry of the same batch. Existing names are found with a single query.
+
+    Only exact spellings are marked, names that are merely equal under the
+    collation of the unique index are left out by ``add_items`` instead.
+    """
+    taken_names = await get_existing_item_names(set(names))
+
+    taken = []
+    for name in names:
+        taken.append(name in taken_names)
+        taken_names.add(name)
+
+    return taken
+
+
+def get_item_schema(item: ItemModel, user_id: int | None) -> ItemSchema:
     return ItemSchema(
         **item.__dict__,
         is_creator=item.creator_id == user_id,
     )
+
+
+def get_item_etag(item: ItemModel, user_id: int | None) -> str:
+    return make_etag("item", item.id, item.updated_at, item.creator_id == user_id)
+
+
+def get_item_list_etag(page: CachedCategoryItemsSchema, user_id: int | None) -> str:
+    """
+    Removing an item changes a page without any newer ``updated_at``, so a page
+    has no Last-Modified and this ETag of its content is its only validator.
+    """
+    return make_etag(
+        "items",
+        user_id,
+        [(item.id, item.updated_at) for item in page.items],
+        page.total,
+        page.page,
+        page.next_cursor,
+        page.prev_cursor,
+    )
+
+
+def get_plain_item_schema(
+    item: CachedItemSchema,
+    user_id: int | None,
+) -> PlainItemSchema:
+    return PlainItemSchema(
+        id=item.id,
+        name=item.name,
+        description=item.description,
+        is_creator=item.creator_id == user_id,
+    )
+
+
+def get_cached_item_schemas(rows: Sequence[Row]) -> list[CachedItemSchema]:
+    """
+    Build the schemas of listed items from their rows, in one validation.
+    """
+    return _cached_item_list_adapter.validate_python([row._asdict() for row in rows])
+
+
+def _encode_item_cursor(direction: CursorDirection, item: Row) -> str:
+    return encode_cursor(direction, item.created_at, item.id)
+
+
+async def get_category_items_page(
+    category_id: int,
+    number_per_page: int,
+    page: int = 1,
+    cursor: str | None = None,
+) -> tuple[Sequence[Row], str | None, str | None]:
+    """
+    Get a page of the category's items, newest first.
+
+    With a cursor, the page is located by seeking on ``(created_at, id)`` so its cost
+    does not depend on how deep it is. Without one, ``page`` is used as an offset.
+    One extra row is fetched to know whether there is anything beyond the page.
+
+    :return: the items, the next cursor and the previous cursor
+    """
+    if cursor is None:
+        items = await get_items(
+            category_id,
+            (page - 1) * number_per_page,
+            number_per_page + 1,
+        )
+        has_next, has_prev = len(items) > number_per_page, page > 1
+        items = items[:number_per_page]
+    else:
+        direction, (created_at, id) = decode_cursor(cursor)
+        if direction == CursorDirection.NEXT:
+            items = await get_items_after(
+                category_id,
+                created_at,
+                id,
+                number_per_page + 1,
+            )
+            has_next, has_prev = len(items) > number_per_page, True
+            items = items[:number_per_page]
+        else:
+            items = await get_items_before(
+                category_id,
+                created_at,
+                id,
+                number_per_page + 1,
+            )
+            has_next, has_prev = True, len(items) > number_per_page
+            items = items[:number_per_page][::-1]
+
+    if not items:
+        return items, None, None
+
+    next_cursor = (
+        _encode_item_cursor(CursorDirection.NEXT, items[-1]) if has_next else None
+    )
+    prev_cursor = (
+        _encode_item_cursor(CursorDirection.PREV, items[0]) if has_prev else None
+    )
+    return items, next_cursor, prev_cursor
+
+
+async def _build_category_items_page(
+    category_id: int,
+    number_per_page: int,
+    page: int,
+    cursor: str | None,
+    with_total: bool,
+) -> CachedCategoryItemsSchema:
+    # The total is the category's counter, which must not come from the cache
+    category = await get_category_or_404(category_id, cached=not with_total)
+    items, next_cursor, prev_cursor = await get_category_items_page(
+        category.id,
+        number_per_page,
+        page=page,
+        cursor=cursor,
+    )
+
+    return CachedCategoryItemsSchema(
+        items=get_cached_item_schemas(items),
+        total=category.item_count if with_total else None,
+        page=page if cursor is None else None,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
+
+
+async def get_cached_category_items_page(
+    category_id: int,
+    number_per_page: int,
+    page: int = 1,
+    cursor: str | None = None,
+    with_total: bool = True,
+) -> CachedCategoryItemsSchema:
+    """
+    Get a page of the category's items through the response cache. The page is
+    the same for every viewer, ``is_creator`` is left to the caller.
+    """
+    position = f"cursor={cursor}" if cursor is not None else f"page={page}"
+    key = f"{position}&number_per_page={number_per_page}&with_total={with_total}"
+
+    async def build() -> bytes:
+        items_page = await _build_category_items_page(
+            category_id,
+            number_per_page,
+            page,
+            cursor,
+            with_total,
+        )
+        return items_page.model_dump_json().encode()
+
+    data = await category_items_cache.get(str(category_id), key, build)
+    return CachedCategoryItemsSchema.model_validate_json(data)
@@ -0,0 +1,23 @@
+import secrets
+from typing import Annotated
+
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from main import config
+from main.commons.exceptions import NotFound, Unauthorized
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def require_metrics_token(
+    token: Annotated[HTTPAuthorizationCredentials | None, Depends(_bearer)],
+):
+    # Without a token, the metrics would be served to anyone
+    if not config.METRICS_ENABLED or not config.METRICS_TOKEN:
+        raise NotFound()
+    if not token or not secrets.compare_digest(
+        token.credentials.encode(),
+        config.METRICS_TOKEN.encode(),
+    ):
+        raise Unauthorized()
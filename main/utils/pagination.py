@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from main.commons.exceptions import BadRequest, ErrorCode, ErrorMessage
+from main.enums import BaseEnum
+
+CursorKey = tuple[datetime, int]
+
+
+class CursorDirection(BaseEnum):
+    NEXT = "next"
+    PREV = "prev"
+
+
+def _encode(payload: list) -> str:
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    """
+    :raise: ``BadRequest`` if the cursor is not one of ours
+    """
+    try:
+        payload = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)),
+        )
+    except (binascii.Error, TypeError, ValueError):
+        payload = None
+
+    if not isinstance(payload, list) or not payload:
+        raise _invalid_cursor()
+
+    return payload
+
+
+def _invalid_cursor() -> BadRequest:
+    return BadRequest(
+        error_message=ErrorMessage.INVALID_CURSOR,
+        error_code=ErrorCode.INVALID_CURSOR,
+    )
+
+
+def encode_cursor(direction: CursorDirection, created_at: datetime, id: int) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor.
+
+    The cursor points at the row ``(created_at, id)`` and tells the next request
+    whether to continue after (``next``) or before (``prev``) it.
+    """
+    return _encode([direction.value, created_at.isoformat(), id])
+
+
+def decode_cursor(cursor: str) -> tuple[CursorDirection, CursorKey]:
+    try:
+        direction, created_at, id = _decode(cursor)
+
+        if not isinstance(id, int):
+            raise ValueError
+
+        return CursorDirection(direction), (datetime.fromisoformat(created_at), id)
+    except (TypeError, ValueError):
+        raise _invalid_cursor()
+
+
+def encode_id_cursor(direction: CursorDirection, id: int) -> str:
+    """
+    Encode a position in a listing ordered by primary key alone.
+    """
+    return _encode([direction.value, id])
+
+
+def decode_id_cursor(cursor: str) -> tuple[CursorDirection, int]:
+    try:
+        direction, id = _decode(cursor)
+
+        if not isinstance(id, int):
+            raise ValueError
+
+        return CursorDirection(direction), id
+    except (TypeError, ValueError):
+        raise _invalid_cursor()
@@ -0,0 +1,48 @@
+import datetime
+from typing import Annotated
+
+import jwt
+from fastapi import Header
+from jwt import InvalidTokenError
+
+from main import config
+from main.commons.exceptions import NotFound, Unauthorized
+from main.libs.profiler import Profiler
+
+# Header of the requests to profile, and of the requests to the captures
+PROFILER_TOKEN_HEADER = "X-Profiler-Token"
+_PROFILER_SCOPE = "profiler"
+
+profiler = Profiler(config.PROFILER_DIR, config.PROFILER_MAX_CAPTURES)
+
+
+def create_profiler_token(lifetime: int) -> str:
+    return jwt.encode(
+        {
+            "scope": _PROFILER_SCOPE,
+            "exp": datetime.datetime.utcnow() + datetime.timedelta(seconds=lifetime),
+        },
+        config.PROFILER_SECRET,
+    )
+
+
+def is_profiler_token(token: str | None) -> bool:
+    # Without a secret, tokens would be signed with an empty key
+    if not token or not config.PROFILER_SECRET:
+        return False
+
+    try:
+        claims = jwt.decode(token, config.PROFILER_SECRET, algorithms=["HS256"])
+    except InvalidTokenError:
+        return False
+
+    return claims.get("scope") == _PROFILER_SCOPE
+
+
+async def require_profiler_token(
+    token: Annotated[str | None, Header(alias=PROFILER_TOKEN_HEADER)] = None,
+):
+    if not config.PROFILER_ENABLED:
+        raise NotFound()
+    if not is_profiler_token(token):
+        raise Unauthorized()
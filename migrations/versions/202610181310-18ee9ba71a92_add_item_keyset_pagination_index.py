@@ -0,0 +1,29 @@
+"""add item keyset pagination index
+
+Revision ID: 18ee9ba71a92
+Revises: ead0e63885ca
+Create Date: 2026-10-18 13:10:05.214337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "18ee9ba71a92"
+down_revision = "ead0e63885ca"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_category_id_created_at_id",
+        "item",
+        ["category_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_category_id_created_at_id", table_name="item")
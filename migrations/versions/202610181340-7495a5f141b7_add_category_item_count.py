@@ -0,0 +1,31 @@
+"""add category item_count
+
+Revision ID: 7495a5f141b7
+Revises: 18ee9ba71a92
+Create Date: 2026-10-18 13:40:22.603918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7495a5f141b7"
+down_revision = "18ee9ba71a92"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "category",
+        sa.Column("item_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        "UPDATE category SET item_count = "
+        "(SELECT COUNT(*) FROM item WHERE item.category_id = category.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("category", "item_count")
@@ -0,0 +1,41 @@
+"""store updated_at with microseconds
+
+Revision ID: c3d5e8f1a2b4
+Revises: 7495a5f141b7
+Create Date: 2026-10-18 14:20:41.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = "c3d5e8f1a2b4"
+down_revision = "7495a5f141b7"
+branch_labels = None
+depends_on = None
+
+TABLES = ("category", "item", "user")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "updated_at",
+            existing_type=mysql.DATETIME(),
+            type_=sa.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "updated_at",
+            existing_type=mysql.DATETIME(fsp=6),
+            type_=mysql.DATETIME(),
+            existing_nullable=False,
+        )
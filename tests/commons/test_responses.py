@@ -0,0 +1,71 @@
+import fastapi.routing
+from fastapi import APIRouter, FastAPI
+from httpx import AsyncClient
+from pydantic import BaseModel
+
+from main.commons.responses import SchemaResponse, SchemaRoute
+
+
+class PlainSchema(BaseModel):
+    id: int
+
+
+class DetailedSchema(PlainSchema):
+    note: str
+
+
+router = APIRouter(route_class=SchemaRoute)
+
+
+@router.get("/plain", response_model=PlainSchema)
+async def _get_plain():
+    return PlainSchema(id=1)
+
+
+@router.get("/detailed", response_model=PlainSchema)
+async def _get_detailed():
+    return DetailedSchema(id=1, note="Filtered out")
+
+
+@router.get("/dict", response_model=PlainSchema)
+async def _get_dict():
+    return {"id": 1}
+
+
+app = FastAPI()
+app.include_router(router)
+
+
+async def test_schema_route(monkeypatch):
+    serialized_paths = []
+    serialize_response = fastapi.routing.serialize_response
+
+    async def spy_serialize_response(**kwargs):
+        serialized_paths.append(path)
+        return await serialize_response(**kwargs)
+
+    monkeypatch.setattr(fastapi.routing, "serialize_response", spy_serialize_response)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        for path in ("/plain", "/detailed", "/dict"):
+            response = await client.get(path)
+
+            assert response.status_code == 200
+            assert response.json() == {"id": 1}
+            assert response.headers["content-type"] == "application/json"
+
+        # Only the exact response model skips FastAPI's serialization
+        assert serialized_paths == ["/detailed", "/dict"]
+
+        schema = (await client.get("/openapi.json")).json()
+        response_schema = schema["paths"]["/plain"]["get"]["responses"]["200"]
+        assert response_schema["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/PlainSchema",
+        }
+
+
+def test_schema_response():
+    response = SchemaResponse(PlainSchema(id=1), headers={"ETag": '"1"'})
+
+    assert response.body == b'{"id":1}'
+    assert response.headers["ETag"] == '"1"'
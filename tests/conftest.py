@@ -5,6 +5,7 @@ import pytest
 from httpx import AsyncClient
 
 from main import app, config, db
+from main.engines.cache import category_items_cache, entity_cache
 from main.libs.log import get_logger
 from main.models.base import BaseModel
 from main.models.category import CategoryModel
@@ -55,6 +56,9 @@ async def database():
     await db.scoped_session.remove()
     await transaction.rollback()
     await connection.close()
+    # Rolled back rows may get their ids reused by the next test
+    entity_cache.clear()
+    category_items_cache.clear()
 
 
 @pytest.fixture
@@ -81,3 +85,10 @@ async def item(user: UserModel, category: CategoryModel):
 @pytest.fixture
 def access_token(user: UserModel):
     return create_access_token_from_id(user.id)
+
+
+@pytest.fixture
+def metrics_headers(monkeypatch):
+    monkeypatch.setattr(config, "METRICS_ENABLED", True)
+    monkeypatch.setattr(config, "METRICS_TOKEN", "metrics token")
+    return {"Authorization": "Bearer metrics token"}
@@ -1,6 +1,9 @@
 import pytest
 
+from main import db
+from main.engines import users
 from main.engines.users import add_user
+from main.libs.worker_pool import WorkerPoolFull
 
 
 async def test_sign_up_successfully(client):
@@ -80,3 +83,44 @@ async def test_login_unsuccessfully_with_unmatched_credentials(client):
         json={"email": email, "password": "other_password"},
     )
     assert response.status_code == 401
+
+
+async def test_login_releases_the_connection_while_hashing(client, monkeypatch):
+    email = "email@gmail.com"
+    password = "test_password"
+    await add_user(email=email, password=password)
+
+    run = users.password_hashing.run
+    in_transaction = []
+
+    async def run_and_check_transaction(*args):
+        in_transaction.append(db.session.in_transaction())
+        return await run(*args)
+
+    monkeypatch.setattr(users.password_hashing, "run", run_and_check_transaction)
+
+    response = await client.post(
+        "/login",
+        json={"email": email, "password": password},
+    )
+    assert response.status_code == 200
+    assert in_transaction == [False]
+
+
+async def test_reject_when_password_hashing_is_busy(client, monkeypatch):
+    email = "email@gmail.com"
+    password = "test_password"
+    await add_user(email=email, password=password)
+
+    async def run(*_):
+        raise WorkerPoolFull("password_hashing")
+
+    monkeypatch.setattr(users.password_hashing, "run", run)
+
+    for path, payload in (
+        ("/register", {"email": "other@gmail.com", "password": "1234aA"}),
+        ("/login", {"email": email, "password": password}),
+    ):
+        response = await client.post(path, json=payload)
+        assert response.status_code == 503
+        assert response.json()["error_code"] == 503000
@@ -1,8 +1,14 @@
 import pytest
 
 from main.models.category import CategoryModel
+from main.models.user import UserModel
 from main.utils.auth import create_access_token_from_id
-from tests.helpers import generate_random_string, mock_password, prepare_user
+from tests.helpers import (
+    generate_random_string,
+    mock_password,
+    prepare_bulk_categories,
+    prepare_user,
+)
 
 
 class TestGetCategories:
@@ -15,6 +21,49 @@ class TestGetCategories:
         assert len(categories) == 1
         assert categories[0]["name"] == category.name
 
+    async def test_successfully_streamed(self, client, user: UserModel):
+        await prepare_bulk_categories(creator_id=user.id, count=3)
+
+        response = await client.get("/categories", params={"stream": True})
+
+        assert response.status_code == 200
+        ids = [category["id"] for category in response.json()]
+        assert len(ids) == 3
+        assert ids == sorted(ids)
+
+    async def test_successfully_with_cursor(self, client, user: UserModel):
+        await prepare_bulk_categories(creator_id=user.id, count=5)
+
+        response = await client.get("/categories", params={"number_per_page": 3})
+        assert response.status_code == 200
+        first_page = response.json()
+        assert len(first_page["categories"]) == 3
+        assert first_page["prev_cursor"] is None
+
+        response = await client.get(
+            "/categories",
+            params={"number_per_page": 3, "cursor": first_page["next_cursor"]},
+        )
+        second_page = response.json()
+        assert len(second_page["categories"]) == 2
+        assert second_page["next_cursor"] is None
+
+        response = await client.get(
+            "/categories",
+            params={"number_per_page": 3, "cursor": second_page["prev_cursor"]},
+        )
+        assert response.json() == first_page
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ["abc", "W10", "WyJuZXh0IiwgImEiXQ"],
+    )
+    async def test_unsuccessfully_invalid_cursor(self, client, cursor):
+        response = await client.get("/categories", params={"cursor": cursor})
+
+        assert response.status_code == 400
+        assert response.json()["error_code"] == 400005
+
 
 class TestGetCategory:
     async def test_successfully(self, client, category: CategoryModel):
@@ -25,6 +74,44 @@ class TestGetCategory:
 
         assert response_category["name"] == category.name
 
+    async def test_successfully_not_modified(self, client, category: CategoryModel):
+        response = await client.get(f"/categories/{category.id}")
+        assert response.headers["Cache-Control"] == "no-cache"
+
+        response = await client.get(
+            f"/categories/{category.id}",
+            headers={"If-None-Match": f'W/{response.headers["ETag"]}, "other"'},
+        )
+        assert response.status_code == 304
+
+        response = await client.get(
+            f"/categories/{category.id}",
+            headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"},
+        )
+        assert response.status_code == 200
+
+    async def test_successfully_not_modified_after_adding_item(
+        self,
+        client,
+        category: CategoryModel,
+        access_token: str,
+    ):
+        response = await client.get(f"/categories/{category.id}")
+        etag = response.headers["ETag"]
+
+        response = await client.post(
+            f"/categories/{category.id}/items",
+            json={"name": "New item", "description": "New description"},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == 200
+
+        response = await client.get(
+            f"/categories/{category.id}",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+
     async def test_unsuccessfully_not_found(
         self,
         client,
@@ -2,8 +2,10 @@ from urllib import parse
 
 import pytest
 
+from main.engines import items as items_engine
 from main.models.category import CategoryModel
 from main.models.item import ItemModel
+from main.utils import item as item_utils
 from main.utils.auth import create_access_token_from_id
 from tests.helpers import (
     generate_random_string,
@@ -24,6 +26,33 @@ class TestGetCategoryItems:
         assert len(data["items"]) == 1
         assert data["items"][0]["name"] == item.name
 
+    async def test_successfully_cached(
+        self,
+        client,
+        category: CategoryModel,
+        item: ItemModel,
+        access_token: str,
+    ):
+        url = f"/categories/{category.id}/items"
+        response = await client.get(url)
+        assert response.json()["items"][0]["is_creator"] is False
+
+        # The cached page is shared, is_creator still depends on the viewer
+        response = await client.get(
+            url,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.json()["items"][0]["is_creator"] is True
+
+        await client.put(
+            f"/items/{item.id}",
+            json={"name": "Updated"},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        response = await client.get(url)
+        assert response.json()["items"][0]["name"] == "Updated"
+
     @pytest.mark.parametrize(
         "page,number_per_page,assert_len",
         [
@@ -63,6 +92,98 @@ class TestGetCategoryItems:
         assert len(data["items"]) == assert_len
         assert data["total"] == total_items
 
+    async def test_successfully_with_cursor(
+        self,
+        client,
+        user,
+        category: CategoryModel,
+    ):
+        await prepare_bulk_items(category_id=category.id, creator_id=user.id, count=25)
+
+        response = await client.get(f"/categories/{category.id}/items")
+        first_page = response.json()
+        assert first_page["prev_cursor"] is None
+
+        response = await client.get(
+            f"/categories/{category.id}/items",
+            params={"cursor": first_page["next_cursor"]},
+        )
+        assert response.status_code == 200
+        second_page = response.json()
+
+        assert second_page["page"] is None
+        assert second_page["next_cursor"] is None
+        assert len(second_page["items"]) == 5
+        assert not {item["id"] for item in first_page["items"]} & {
+            item["id"] for item in second_page["items"]
+        }
+
+        response = await client.get(
+            f"/categories/{category.id}/items",
+            params={"cursor": second_page["prev_cursor"]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["items"] == first_page["items"]
+        assert data["prev_cursor"] is None
+        assert data["next_cursor"] == first_page["next_cursor"]
+
+    async def test_successfully_without_total(
+        self,
+        client,
+        category: CategoryModel,
+        item: ItemModel,
+    ):
+        response = await client.get(
+            f"/categories/{category.id}/items",
+            params={"with_total": "false"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["total"] is None
+        assert len(data["items"]) == 1
+
+    async def test_successfully_not_modified(
+        self,
+        client,
+        user,
+        category: CategoryModel,
+        item: ItemModel,
+    ):
+        url = f"/categories/{category.id}/items"
+        response = await client.get(url)
+        etag = response.headers["ETag"]
+
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        await prepare_bulk_items(category_id=category.id, creator_id=user.id)
+
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 2
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ["abc", "W10", "WyJuZXh0IiwgIjIwMjQiXQ"],
+    )
+    async def test_unsuccessfully_invalid_cursor(
+        self,
+        client,
+        cursor,
+        category: CategoryModel,
+    ):
+        response = await client.get(
+            f"/categories/{category.id}/items",
+            params={"cursor": cursor},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["error_code"] == 400005
+
     async def test_unsuccessfully_not_found(
         self,
         client,
@@ -109,6 +230,61 @@ class TestGetItem:
         assert response_item["name"] == item.name
         assert response_item["description"] == item.description
 
+    async def test_successfully_not_modified(
+        self,
+        client,
+        item: ItemModel,
+        access_token: str,
+    ):
+        response = await client.get(f"/items/{item.id}")
+        etag = response.headers["ETag"]
+
+        response = await client.get(
+            f"/items/{item.id}",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        response = await client.get(
+            f"/items/{item.id}",
+            headers={"If-Modified-Since": response.headers["Last-Modified"]},
+        )
+        assert response.status_code == 304
+
+        # The representation differs for the creator
+        response = await client.get(
+            f"/items/{item.id}",
+            headers={
+                "If-None-Match": etag,
+                "Authorization": f"Bearer {access_token}",
+            },
+        )
+        assert response.status_code == 200
+
+    async def test_successfully_modified_after_update(
+        self,
+        client,
+        item: ItemModel,
+        access_token: str,
+    ):
+        response = await client.get(f"/items/{item.id}")
+        etag = response.headers["ETag"]
+
+        await client.put(
+            f"/items/{item.id}",
+            json={"name": "Updated"},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        response = await client.get(
+            f"/items/{item.id}",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
     async def test_unsuccessfully_not_found(self, client, item: ItemModel):
         response = await client.get(f"/items/{item.id +1}")
 
@@ -180,6 +356,19 @@ class TestCreateItem:
         )
         assert response.status_code == 400
 
+    async def test_unsuccessfully_category_not_found(
+        self,
+        client,
+        access_token,
+        category: CategoryModel,
+    ):
+        response = await client.post(
+            f"/categories/{category.id + 1}/items",
+            json={"name": "New item", "description": "mock description"},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == 404
+
     async def test_unsuccessfully_name_exists(
         self,
         client,
@@ -196,6 +385,130 @@ class TestCreateItem:
         assert response.json()["error_code"] == 400004
 
 
+class TestCreateItemsBatch:
+    async def test_successfully(
+        self,
+        client,
+        category: CategoryModel,
+        access_token: str,
+        item: ItemModel,
+    ):
+        response = await client.post(
+            f"/categories/{category.id}/items:batch",
+            json={
+                "items": [
+                    {"name": "Batch item 1", "description": "mock description"},
+                    {"name": item.name, "description": "mock description"},
+                    {"name": "Batch item 2", "description": "mock description"},
+                    {"name": "Batch item 1", "description": "mock description"},
+                ],
+            },
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == 200
+
+        results = response.json()["items"]
+        assert [result["error_code"] for result in results] == [
+            None,
+            400004,
+            None,
+            400004,
+        ]
+        assert results[0]["item"]["name"] == "Batch item 1"
+        assert results[0]["item"]["category_id"] == category.id
+        assert results[2]["item"]["name"] == "Batch item 2"
+
+        response = await client.get(f"/categories/{category.id}/items")
+        assert response.json()["total"] == 3
+
+    async def test_successfully_with_names_missed_by_the_pre_check(
+        self,
+        client,
+        category: CategoryModel,
+        access_token: str,
+        item: ItemModel,
+        monkeypatch,
+    ):
+        # As a name only equal to an existing one under the collation would be
+        async def get_existing_item_names(names):
+            return set()
+
+        monkeypatch.setattr(
+            item_utils,
+            "get_existing_item_names",
+            get_existing_item_names,
+        )
+        # Duplicate entries are only told apart by their MySQL error code
+        monkeypatch.setattr(items_engine, "is_duplicate_entry", lambda _: True)
+
+        response = await client.post(
+            f"/categories/{category.id}/items:batch",
+            json={
+                "items": [
+                    {"name": "Batch item 1", "description": "mock description"},
+                    {"name": item.name, "description": "mock description"},
+                    {"name": "Batch item 2", "description": "mock description"},
+                ],
+            },
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == 200
+
+        results = response.json()["items"]
+        assert [result["error_code"] for result in results] == [None, 400004, None]
+        assert results[2]["item"]["name"] == "Batch item 2"
+
+        response = await client.get(f"/categories/{category.id}/items")
+        assert response.json()["total"] == 3
+
+    async def test_unsuccessfully_unauthorized(self, category: CategoryModel, client):
+        response = await client.post(
+            f"/categories/{category.id}/items:batch",
+            json={"items": [{"name": "New item", "description": "description"}]},
+        )
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {},
+            {"items": []},
+            {"items": [{"name": "New item"}]},
+            {
+                "items": [
+                    {"name": f"Item {i}", "description": "x"} for i in range(1001)
+                ],
+            },
+        ],
+    )
+    async def test_unsuccessfully_validation_error(
+        self,
+        client,
+        payload,
+        access_token,
+        category: CategoryModel,
+    ):
+        response = await client.post(
+            f"/categories/{category.id}/items:batch",
+            json=payload,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == 400
+
+    async def test_unsuccessfully_not_found(
+        self,
+        client,
+        access_token,
+        category: CategoryModel,
+    ):
+        response = await client.post(
+            f"/categories/{category.id + 1}/items:batch",
+            json={"items": [{"name": "New item", "description": "description"}]},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == 404
+
+
 class TestUpdateItem:
     new_name = generate_random_string(255)
     new_description = generate_random_string(5000)
@@ -218,6 +531,38 @@ class TestUpdateItem:
         assert response_item["name"] == self.new_name
         assert response_item["description"] == self.new_description
 
+    async def test_successfully_keep_name(
+        self,
+        client,
+        access_token: str,
+        item: ItemModel,
+    ):
+        response = await client.put(
+            f"/items/{item.id}",
+            json={"name": item.name, "description": self.new_description},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["description"] == self.new_description
+
+    async def test_unsuccessfully_name_exists(
+        self,
+        client,
+        access_token: str,
+        user,
+        item: ItemModel,
+    ):
+        await prepare_bulk_items(category_id=item.category_id, creator_id=user.id)
+
+        response = await client.put(
+            f"/items/{item.id + 1}",
+            json={"name": item.name},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == 400
+        assert response.json()["error_code"] == 400004
+
     async def test_unsuccessfully_not_found(
         self,
         client,
@@ -277,6 +622,7 @@ class TestUpdateItem:
 
         response = await client.put(
             f"/items/{item.id}",
+            json={"name": self.new_name, "description": self.new_description},
             headers={"Authorization": f"Bearer {access_token_2}"},
         )
         assert response.status_code == 403
@@ -295,6 +641,9 @@ class TestDeleteItem:
         )
         assert response.status_code == 200
 
+        response = await client.get(f"/categories/{item.category_id}/items")
+        assert response.json()["total"] == 0
+
     async def test_unsuccessfully_not_found(
         self,
         client,
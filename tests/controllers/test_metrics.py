@@ -0,0 +1,46 @@
+import pytest
+
+from main import config, db
+
+
+async def test_get_metrics(client, item, metrics_headers):
+    response = await client.get("/metrics", headers=metrics_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'db_pool_checkouts_total{engine="primary"}' in response.text
+    assert 'db_pool_connections_checked_out{engine="primary"}' in response.text
+
+
+async def test_metrics_need_a_token(client, metrics_headers):
+    response = await client.get("/metrics")
+    assert response.status_code == 401
+
+    response = await client.get(
+        "/metrics",
+        headers={"Authorization": "Bearer wrong token"},
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize(
+    "enabled, token",
+    [(False, "metrics token"), (True, "")],
+)
+async def test_metrics_disabled(client, monkeypatch, enabled, token):
+    monkeypatch.setattr(config, "METRICS_ENABLED", enabled)
+    monkeypatch.setattr(config, "METRICS_TOKEN", token)
+
+    response = await client.get(
+        "/metrics",
+        headers={"Authorization": "Bearer metrics token"},
+    )
+    assert response.status_code == 404
+
+
+async def test_pool_stats(item):
+    stats = db.pool_stats()["primary"]
+
+    assert stats["checkouts"] >= 1
+    assert stats["checked_out"] >= 1  # held by the test transaction
+    assert stats["checkout_wait_count"] >= 1
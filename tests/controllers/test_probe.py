@@ -1,6 +1,53 @@
+import pytest
+
+from main import db
+
+
 async def test_ping(client):
     response = await client.post("/pings")
     assert response.status_code == 405
 
     response = await client.get("/pings")
     assert response.status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/pings", "/ready"])
+async def test_probe_without_db_session(client, monkeypatch, path):
+    def scope():
+        raise AssertionError("A database scope should not be opened")
+
+    monkeypatch.setattr(db, "scope", scope)
+
+    response = await client.get(path)
+    assert response.status_code == 200
+
+
+async def test_cors_preflight_without_db_session(client, monkeypatch):
+    def scope():
+        raise AssertionError("A database scope should not be opened")
+
+    monkeypatch.setattr(db, "scope", scope)
+
+    response = await client.options(
+        "/categories",
+        headers={
+            "Origin": "http://example.com",
+            "Access-Control-Request-Method": "GET",
+        },
+    )
+    assert response.status_code == 200
+
+
+async def test_other_options_requests_have_a_db_session(client, monkeypatch):
+    scopes = []
+    db_scope = db.scope
+
+    def scope(request=None):
+        scopes.append(request)
+        return db_scope(request)
+
+    monkeypatch.setattr(db, "scope", scope)
+
+    response = await client.options("/categories")
+    assert response.status_code == 405
+    assert len(scopes) == 1
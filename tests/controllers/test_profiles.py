@@ -0,0 +1,80 @@
+import pstats
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from httpx import AsyncClient
+
+from main import app, config
+from main.middlewares import ProfilerMiddleware
+from main.models.item import ItemModel
+from main.utils import profiler as profiler_utils
+from main.utils.profiler import PROFILER_TOKEN_HEADER, create_profiler_token
+
+if TYPE_CHECKING:
+    from asgiref.typing import ASGI3Application
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILER_SECRET", "profiler secret")
+    monkeypatch.setattr(profiler_utils.profiler, "directory", tmp_path)
+    return profiler_utils.profiler
+
+
+@pytest.fixture
+async def profiled_client(profiler):
+    async with AsyncClient(
+        app=ProfilerMiddleware(cast("ASGI3Application", app)),
+        base_url="http://test",
+    ) as client:
+        yield client
+
+
+async def test_profile_requests_with_token(profiled_client, profiler, item: ItemModel):
+    token = create_profiler_token(60)
+
+    await profiled_client.get(f"/items/{item.id}")
+    assert profiler.captures() == []
+
+    await profiled_client.get(
+        f"/items/{item.id}",
+        headers={PROFILER_TOKEN_HEADER: token},
+    )
+    (capture,) = profiler.captures()
+    assert capture["route"] == "/items/{item_id}"
+
+    response = await profiled_client.get(
+        "/admin/profiles",
+        headers={PROFILER_TOKEN_HEADER: token},
+    )
+    assert response.status_code == 200
+    assert response.json()["profiles"][0]["name"] == capture["name"]
+
+    response = await profiled_client.get(
+        f"/admin/profiles/{capture['name']}",
+        headers={PROFILER_TOKEN_HEADER: token},
+    )
+    assert response.status_code == 200
+    stats_path = profiler.directory / "downloaded.pstats"
+    stats_path.write_bytes(response.content)
+    assert pstats.Stats(str(stats_path)).get_stats_profile().func_profiles
+
+
+async def test_require_token_for_captures(client, profiler):
+    response = await client.get("/admin/profiles")
+    assert response.status_code == 401
+
+    response = await client.get(
+        "/admin/profiles",
+        headers={PROFILER_TOKEN_HEADER: "not a token"},
+    )
+    assert response.status_code == 401
+
+
+async def test_hide_captures_when_disabled(client):
+    response = await client.get(
+        "/admin/profiles",
+        headers={PROFILER_TOKEN_HEADER: create_profiler_token(60)},
+    )
+    assert response.status_code == 404
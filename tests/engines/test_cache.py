@@ -0,0 +1,117 @@
+import logging
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from main import config, db
+from main._db import ReplicaSet
+from main.engines.cache import entity_cache, warn_about_unshared_caches
+from main.engines.categories import delete_category, get_cached_category_by_id
+from main.engines.items import get_cached_item_by_id, update_item
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+from main.models.user import UserModel
+
+
+async def _rename_behind_the_cache(item_id: int, name: str):
+    await db.session.execute(
+        update(ItemModel)
+        .where(ItemModel.id == item_id)
+        .values(name=name)
+        .execution_options(synchronize_session=False),
+    )
+    db.session.expire_all()
+
+
+async def test_get_from_cache(item: ItemModel):
+    item_id = item.id
+    cached_item = await get_cached_item_by_id(item_id)
+    assert cached_item is not None
+    assert cached_item.name == "Item 1"
+
+    await _rename_behind_the_cache(item_id, "Renamed")
+
+    cached_item = await get_cached_item_by_id(item_id)
+    assert cached_item is not None
+    assert cached_item.name == "Item 1"
+    assert cached_item is not await get_cached_item_by_id(item_id)
+    assert entity_cache.stats()["item"]["size"] == 1
+
+
+@pytest.fixture
+async def replica_set(monkeypatch):
+    engine = create_async_engine(config.SQLALCHEMY_DATABASE_URI)
+    replica_set = ReplicaSet([engine], cooldown=30)
+    monkeypatch.setattr(db.session.sync_session, "replica_set", replica_set)
+
+    yield replica_set
+
+    await engine.dispose()
+
+
+async def test_load_from_primary(item: ItemModel, replica_set: ReplicaSet):
+    # The replica's own connection does not see the test's uncommitted rows, as
+    # one lagging behind would not see the latest commits. The item is added
+    # before there is a replica, so that the session does not stick to the primary
+    cached_item = await get_cached_item_by_id(item.id)
+    assert cached_item is not None
+
+
+async def test_invalidate_on_commit(user: UserModel, item: ItemModel):
+    item_id = item.id
+    await get_cached_item_by_id(item_id)
+
+    await update_item(item_id, user.id, "Updated", None)
+
+    cached_item = await get_cached_item_by_id(item_id)
+    assert cached_item is not None
+    assert cached_item.name == "Updated"
+
+
+async def test_invalidate_items_of_deleted_category(
+    user: UserModel,
+    category: CategoryModel,
+    item: ItemModel,
+):
+    category_id, item_id = category.id, item.id
+    await get_cached_category_by_id(category_id)
+    await get_cached_item_by_id(item_id)
+
+    assert await delete_category(category_id, user.id)
+
+    assert entity_cache.stats()["category"]["size"] == 0
+    assert entity_cache.stats()["item"]["size"] == 0
+
+
+async def test_warm_from_file(monkeypatch, tmp_path, item: ItemModel):
+    monkeypatch.setattr(config, "ENTITY_CACHE_WARM_FILE", str(tmp_path / "warm.json"))
+    item_id = item.id
+    await get_cached_item_by_id(item_id)
+
+    await entity_cache.stop()
+    entity_cache.clear()
+    await entity_cache.start()
+
+    await _rename_behind_the_cache(item_id, "Renamed")
+    cached_item = await get_cached_item_by_id(item_id)
+    assert cached_item is not None
+    assert cached_item.name == "Item 1"
+
+
+def test_warn_about_unshared_caches(monkeypatch, caplog):
+    # The logger does not propagate to the handler of caplog
+    logger = logging.getLogger("main.engines.cache")
+    logger.addHandler(caplog.handler)
+    try:
+        warn_about_unshared_caches()
+        monkeypatch.setattr(config, "ENTITY_CACHE_BUS_URI", "sqlite:///bus.db")
+        warn_about_unshared_caches()
+    finally:
+        logger.removeHandler(caplog.handler)
+
+    stale_seconds = [record.data["max_stale_seconds"] for record in caplog.records]
+    assert stale_seconds == [
+        config.ENTITY_CACHE_TTL,
+        config.RESPONSE_CACHE_TTL + config.RESPONSE_CACHE_STALE_TTL,
+    ]
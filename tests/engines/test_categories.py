@@ -0,0 +1,26 @@
+from sqlalchemy import update
+
+from main import db
+from main.engines.categories import get_category_by_id, reconcile_item_counts
+from main.models.category import CategoryModel
+from main.models.user import UserModel
+from tests.helpers import prepare_bulk_items
+
+
+async def test_reconcile_item_counts(user: UserModel, category: CategoryModel):
+    await prepare_bulk_items(category_id=category.id, creator_id=user.id, count=3)
+    await db.session.execute(
+        update(CategoryModel)
+        .where(CategoryModel.id == category.id)
+        .values(item_count=10),
+    )
+
+    assert await reconcile_item_counts() == 1
+
+    category_id = category.id
+    db.session.expire_all()
+    reconciled_category = await get_category_by_id(category_id)
+    assert reconciled_category is not None
+    assert reconciled_category.item_count == 3
+
+    assert await reconcile_item_counts() == 0
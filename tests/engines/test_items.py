@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import delete
+
+from main import db
+from main.engines.categories import get_category_by_id
+from main.engines.items import delete_item, update_item
+from main.models.item import ItemModel
+
+
+@pytest.mark.parametrize("delete_returning", [True, False])
+async def test_delete_item_decrements_once(
+    item: ItemModel,
+    monkeypatch,
+    delete_returning: bool,
+):
+    monkeypatch.setattr(db.engine.dialect, "delete_returning", delete_returning)
+    item_id, category_id = item.id, item.category_id
+    execute = db.session.execute
+
+    async def execute_after_another_delete(statement, *args, **kwargs):
+        # Another request deletes the item just before this DELETE
+        if statement.is_delete:
+            await execute(delete(ItemModel).where(ItemModel.id == item_id))
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db.session, "execute", execute_after_another_delete)
+    assert not await delete_item(item_id, creator_id=item.creator_id)
+    monkeypatch.undo()
+
+    db.session.expire_all()
+    category = await get_category_by_id(category_id)
+    assert category is not None
+    assert category.item_count == 1
+
+
+@pytest.mark.parametrize("update_returning, statements", [(True, 1), (False, 2)])
+async def test_update_item_reads_the_item_back(
+    item: ItemModel,
+    monkeypatch,
+    update_returning: bool,
+    statements: int,
+):
+    monkeypatch.setattr(db.engine.dialect, "update_returning", update_returning)
+
+    async with db.scope():
+        updated_item = await update_item(item.id, item.creator_id, "Updated", None)
+
+        stats = db.query_stats()
+        assert stats is not None
+        assert stats.statements == statements
+
+    assert updated_item is not None
+    assert updated_item.name == "Updated"
+    assert updated_item.description == item.description
+    assert updated_item.updated_at > item.updated_at
+
+
+async def test_update_item_of_another_creator(item: ItemModel):
+    assert await update_item(item.id, item.creator_id + 1, "Updated", None) is None
+
+
+@pytest.mark.parametrize("delete_returning, statements", [(True, 2), (False, 3)])
+async def test_delete_item_reads_the_category(
+    item: ItemModel,
+    monkeypatch,
+    delete_returning: bool,
+    statements: int,
+):
+    monkeypatch.setattr(db.engine.dialect, "delete_returning", delete_returning)
+
+    async with db.scope():
+        assert await delete_item(item.id, item.creator_id)
+
+        stats = db.query_stats()
+        assert stats is not None
+        assert stats.statements == statements
+
+    category = await get_category_by_id(item.category_id)
+    assert category is not None
+    assert category.item_count == 0
@@ -48,3 +48,13 @@ async def prepare_bulk_items(category_id: int, creator_id: int, count: int = 1):
             creator_id=creator_id,
             category_id=category_id,
         )
+
+
+async def prepare_bulk_categories(creator_id: int, count: int = 1):
+    key = datetime.now()
+    for i in range(count):
+        await add_category(
+            name=f"Mock category - {key} - {i}",
+            description="Mock description",
+            creator_id=creator_id,
+        )
@@ -0,0 +1,88 @@
+"""
+An in-process stand-in for a Redis server, speaking just enough of the protocol
+for the response cache.
+"""
+
+import asyncio
+import time
+from typing import Any
+
+# What a command replies, a list being an array of replies
+Reply = bytes | int | list[Any] | None
+
+
+def _encode_reply(reply: Reply | str | Exception) -> bytes:
+    if isinstance(reply, Exception):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(map(_encode_reply, reply))
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+class RedisServer:
+    def __init__(self):
+        self.data: dict[bytes, bytes] = {}
+        self.expiry: dict[bytes, float] = {}
+        self.commands: list[bytes] = []
+        self.uri = ""
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.uri = f"redis://127.0.0.1:{port}/0"
+        return self.uri
+
+    async def stop(self):
+        assert self._server is not None
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _get(self, key: bytes):
+        if key in self.expiry and self.expiry[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.expiry.pop(key)
+        return self.data.get(key)
+
+    def _execute(self, name: bytes, args: list[bytes]) -> Reply | str | Exception:
+        self.commands.append(name)
+
+        if name in (b"PING", b"SELECT", b"AUTH", b"CLIENT"):
+            return "OK"
+        if name == b"GET":
+            return self._get(args[0])
+        if name == b"MGET":
+            return [self._get(key) for key in args]
+        if name == b"SET":
+            self.data[args[0]] = args[1]
+            self.expiry.pop(args[0], None)
+            if len(args) == 4 and args[2].upper() == b"PX":
+                self.expiry[args[0]] = time.monotonic() + int(args[3]) / 1000
+            return "OK"
+        if name == b"INCRBY":
+            value = int(self._get(args[0]) or 0) + int(args[1])
+            self.data[args[0]] = b"%d" % value
+            return value
+
+        return Exception(f"unknown command {name.decode()}")
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+
+                writer.write(_encode_reply(self._execute(args[0].upper(), args[1:])))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,49 @@
+from main.libs.cache import LRUCache
+
+
+def test_evict_least_recently_used():
+    cache = LRUCache("test", max_size=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(1) == "a"
+    assert cache.get(2) is None
+    assert cache.get(3) == "c"
+
+
+def test_expire():
+    cache = LRUCache("test", max_size=2, ttl=0)
+    cache.set(1, "a")
+
+    assert cache.get(1) is None
+
+
+def test_refuse_value_loaded_before_invalidation():
+    cache = LRUCache("test", max_size=2, ttl=60)
+    generation = cache.generation
+    cache.invalidate(1)
+
+    assert not cache.set(1, "stale", generation)
+    assert cache.get(1) is None
+    assert cache.set(1, "fresh", cache.generation)
+
+
+def test_hottest():
+    cache = LRUCache("test", max_size=3, ttl=60)
+    for key in (1, 2, 3):
+        cache.set(key, str(key))
+    for key in (2, 2, 3):
+        cache.get(key)
+
+    assert cache.hottest(2) == [2, 3]
+
+
+def test_expire_entry_sooner():
+    cache = LRUCache("test", max_size=2, ttl=60)
+    cache.set(1, "a", ttl=0)
+    cache.set(2, "b", ttl=120)
+
+    assert cache.get(1) is None
+    assert cache.get(2) == "b"
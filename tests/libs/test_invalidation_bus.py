@@ -0,0 +1,21 @@
+import time
+
+from main.libs.invalidation_bus import SQLiteInvalidationBus
+
+
+def test_sqlite_bus(tmp_path):
+    path = str(tmp_path / "bus.db")
+    received: dict[str, list[str]] = {"a": [], "b": []}
+    buses = {name: SQLiteInvalidationBus(path, poll_interval=0.01) for name in received}
+    for name, bus in buses.items():
+        bus.start(received[name].append)
+
+    buses["a"].publish("item:1")
+
+    deadline = time.monotonic() + 5
+    while not received["b"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for bus in buses.values():
+        bus.stop()
+
+    assert received == {"a": [], "b": ["item:1"]}
@@ -0,0 +1,107 @@
+import io
+import logging
+import threading
+
+from main.libs.log import DataFormatter, DeferredArg, LogPipeline, dropped_records
+
+
+class BlockingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writing.set()
+        self.release.wait()
+        self.writes += 1
+        return super().write(text)
+
+
+# Returns a _CustomLogger, whose methods also take ``data`` unlike logging.Logger
+def make_logger(name: str, handler: logging.Handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_write_batches_in_the_background():
+    stream = BlockingStream()
+    pipeline = LogPipeline(stream, max_size=10)
+    logger = make_logger("test_log.batches", pipeline.handler(DataFormatter()))
+
+    logger.info("first")
+    stream.writing.wait()
+    # Logging does not wait for the stream
+    for i in range(3):
+        logger.info("record %d", i, data={"index": i})
+
+    stream.release.set()
+    pipeline.flush()
+
+    assert stream.getvalue().splitlines() == [
+        "first",
+        'record 0 | {"index": 0}',
+        'record 1 | {"index": 1}',
+        'record 2 | {"index": 2}',
+    ]
+    assert stream.writes == 2
+
+
+def test_drop_records_when_full():
+    stream = BlockingStream()
+    pipeline = LogPipeline(stream, max_size=2)
+    logger = make_logger("test_log.drop", pipeline.handler(logging.Formatter()))
+
+    logger.info("written")
+    stream.writing.wait()
+    for i in range(4):
+        logger.info("queued %d", i)
+
+    stream.release.set()
+    pipeline.flush()
+
+    assert stream.getvalue().splitlines() == ["written", "queued 0", "queued 1"]
+    assert dropped_records.get(logger="test_log.drop") == 2
+
+
+def test_resolve_records_when_logging():
+    stream = BlockingStream()
+    pipeline = LogPipeline(stream, max_size=10)
+    logger = make_logger("test_log.resolve", pipeline.handler(DataFormatter()))
+    names = ["first"]
+    data = {"count": 1}
+
+    logger.info("names: %s", names, data=data)
+    names.append("second")
+    data["count"] = 2
+
+    stream.release.set()
+    pipeline.flush()
+
+    assert stream.getvalue().splitlines() == [
+        "names: ['first'] | {\"count\": 1}",
+    ]
+
+
+class ThreadName(DeferredArg):
+    def __str__(self) -> str:
+        return threading.current_thread().name
+
+
+def test_render_deferred_args_on_the_writer_thread():
+    stream = BlockingStream()
+    pipeline = LogPipeline(stream, max_size=10)
+    logger = make_logger("test_log.deferred", pipeline.handler(DataFormatter()))
+    names = ["first"]
+
+    logger.info("%s, %s", ThreadName(), names)
+    names.append("second")
+
+    stream.release.set()
+    pipeline.flush()
+
+    assert stream.getvalue().splitlines() == ["log-writer, ['first']"]
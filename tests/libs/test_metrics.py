@@ -0,0 +1,51 @@
+import threading
+
+from main.libs.metrics import Histogram, MetricsRegistry
+
+
+def test_render():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "Requests.", ["route"])
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    gauge = registry.gauge("in_flight", "In flight.")
+
+    counter.inc(route="/items/{item_id}")
+    counter.inc(2, route="/items/{item_id}")
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    gauge.set_function(lambda: 3)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests Requests.",
+        "# TYPE requests counter",
+        'requests_total{route="/items/{item_id}"} 3',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        "latency_seconds_count 2",
+        "latency_seconds_sum 0.55",
+        "# HELP in_flight In flight.",
+        "# TYPE in_flight gauge",
+        "in_flight 3",
+    ]
+
+
+def test_histogram_samples_wait_for_an_observation():
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(1,))
+    samples: list = []
+    collect = threading.Thread(target=lambda: samples.extend(histogram.samples()))
+
+    with histogram._lock:
+        # Half way through an observation, counted but not summed yet
+        histogram._counts[()] = [1, 0]
+        collect.start()
+        collect.join(0.05)
+        histogram._sums[()] = 0.5
+
+    collect.join()
+    assert samples[-2:] == [
+        ("latency_seconds_count", {}, 1),
+        ("latency_seconds_sum", {}, 0.5),
+    ]
@@ -0,0 +1,72 @@
+import json
+import os
+
+from main.libs.metrics import MetricsRegistry
+from main.libs.multiprocess_metrics import MultiprocessMetrics
+
+
+def dead_pid() -> int:
+    pid = 4_000_000
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid += 1
+
+
+def test_add_the_metrics_of_other_processes(tmp_path):
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "Requests.", ["route"])
+    gauge = registry.gauge("in_flight", "In flight.")
+    counter.inc(route="/items")
+    gauge.set(1)
+
+    metrics = MultiprocessMetrics(registry, str(tmp_path), interval=60)
+    metrics.write()
+    own_snapshot = (tmp_path / f"{os.getpid()}.json").read_text()
+
+    # The same values, from a live process and from one that exited
+    for pid in (os.getppid(), dead_pid()):
+        (tmp_path / f"{pid}.json").write_text(own_snapshot)
+    (tmp_path / f"{dead_pid() + 1}.tmp").write_text("{")
+
+    counter.inc(route="/categories")
+
+    assert metrics.render().splitlines() == [
+        "# HELP requests Requests.",
+        "# TYPE requests counter",
+        'requests_total{route="/items"} 3',
+        'requests_total{route="/categories"} 1',
+        "# HELP in_flight In flight.",
+        "# TYPE in_flight gauge",
+        "in_flight 2",
+    ]
+
+
+def test_render_own_metrics_without_directory():
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests.").inc()
+    metrics = MultiprocessMetrics(registry, "", interval=60)
+
+    metrics.start()
+    metrics.stop()
+
+    assert metrics.render() == registry.render()
+
+
+def test_write_snapshot_on_stop(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests.").inc(3)
+    metrics = MultiprocessMetrics(registry, str(tmp_path / "metrics"), interval=60)
+
+    metrics.start()
+    metrics.stop()
+
+    snapshot = json.loads((tmp_path / "metrics" / f"{os.getpid()}.json").read_text())
+    assert snapshot["requests"] == {
+        "type": "counter",
+        "samples": [["requests_total", {}, 3]],
+    }
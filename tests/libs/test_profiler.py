@@ -0,0 +1,37 @@
+import cProfile
+
+from main.libs.profiler import Profiler
+
+
+def test_keep_most_recent_captures(tmp_path):
+    profiler = Profiler(str(tmp_path), max_captures=2)
+    for request_id in ("first", "second", "third"):
+        profile = profiler.start()
+        assert profile is not None
+        profiler.stop(profile)
+        profiler.save(profile, request_id, "/items/{item_id}")
+
+    captures = profiler.captures()
+    assert [capture["request_id"] for capture in captures] == ["third", "second"]
+    assert captures[0]["route"] == "/items/{item_id}"
+    assert profiler.path(captures[0]["name"]) == tmp_path / captures[0]["name"]
+
+
+def test_profile_one_request_at_a_time(tmp_path):
+    profiler = Profiler(str(tmp_path), max_captures=2)
+    profile = profiler.start()
+    assert profile is not None
+
+    assert profiler.start() is None
+    profiler.stop(profile)
+    other = profiler.start()
+    assert isinstance(other, cProfile.Profile)
+    profiler.stop(other)
+
+
+def test_only_give_capture_paths(tmp_path):
+    (tmp_path / "secret.txt").write_text("")
+    profiler = Profiler(str(tmp_path / "profiles"), max_captures=2)
+
+    assert profiler.path("../secret.txt") is None
+    assert profiler.path("1_abc_..~secret.txt.pstats") is None
@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+from redis.asyncio import Redis
+
+from main.libs.response_cache import (
+    MemoryResponseCacheBackend,
+    RedisResponseCacheBackend,
+    ResponseCache,
+    create_response_cache_backend,
+)
+
+from .redis_server import RedisServer
+
+
+class Builder:
+    def __init__(self, value: bytes = b"page"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+        await self.release.wait()
+        return self.value + b"%d" % self.calls
+
+
+async def test_memory_backend_evicts_over_max_bytes():
+    backend = MemoryResponseCacheBackend(max_bytes=10)
+    await backend.set("1", "a", b"12345", ttl=60)
+    await backend.set("1", "b", b"12345", ttl=60)
+    await backend.get("1", "a")
+    await backend.set("2", "a", b"12345", ttl=60)
+
+    assert await backend.get("1", "a") == b"12345"
+    assert await backend.get("1", "b") is None
+    assert backend.size == 10
+
+    backend.invalidate("1")
+    assert await backend.get("1", "a") is None
+    assert await backend.get("2", "a") == b"12345"
+
+
+async def test_coalesce_concurrent_builds():
+    cache = ResponseCache("test", MemoryResponseCacheBackend(1024), ttl=60)
+    build = Builder()
+    build.release.clear()
+
+    requests = [asyncio.create_task(cache.get("1", "a", build)) for _ in range(3)]
+    await asyncio.sleep(0)
+    build.release.set()
+
+    assert await asyncio.gather(*requests) == [b"page1"] * 3
+    assert build.calls == 1
+    assert await cache.get("1", "a", build) == b"page1"
+
+
+async def test_serve_stale_while_one_request_rebuilds():
+    cache = ResponseCache("test", MemoryResponseCacheBackend(1024), ttl=0, stale_ttl=60)
+    build = Builder()
+    await cache.get("1", "a", build)
+
+    build.release.clear()
+    rebuild = asyncio.create_task(cache.get("1", "a", build))
+    await asyncio.sleep(0)
+
+    assert await cache.get("1", "a", build) == b"page1"
+
+    build.release.set()
+    assert await rebuild == b"page2"
+    assert build.calls == 2
+
+
+async def test_skip_store_invalidated_during_build():
+    cache = ResponseCache("test", MemoryResponseCacheBackend(1024), ttl=60)
+    build = Builder()
+    build.release.clear()
+
+    request = asyncio.create_task(cache.get("1", "a", build))
+    await asyncio.sleep(0)
+    cache.invalidate("1")
+    build.release.set()
+
+    assert await request == b"page1"
+    assert await cache.get("1", "a", build) == b"page2"
+
+
+@pytest.fixture
+async def redis_server():
+    server = RedisServer()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+async def test_redis_backend(redis_server: RedisServer):
+    backend = create_response_cache_backend(redis_server.uri, max_bytes=0)
+    assert isinstance(backend, RedisResponseCacheBackend)
+    cache = ResponseCache("test", backend, ttl=60)
+    build = Builder()
+
+    assert await cache.get("1", "a", build) == b"page1"
+    assert await cache.get("1", "a", build) == b"page1"
+    assert await cache.get("1", "b", build) == b"page2"
+
+    cache.invalidate("1")
+    await backend.wait_invalidations()
+
+    assert await cache.get("1", "a", build) == b"page3"
+    assert await cache.get("1", "b", build) == b"page4"
+    await backend.close()
+
+
+async def test_redis_backend_skip_store_invalidated_by_another_worker(
+    redis_server: RedisServer,
+):
+    backend = create_response_cache_backend(redis_server.uri, max_bytes=0)
+    cache = ResponseCache("test", backend, ttl=60)
+    build = Builder()
+    build.release.clear()
+
+    request = asyncio.create_task(cache.get("1", "a", build))
+    while not build.calls:
+        await asyncio.sleep(0)
+    # The other worker already incremented the version, before this build stores
+    cache.invalidate("1", remote=True)
+    build.release.set()
+
+    assert await request == b"page1"
+    assert b"INCRBY" not in redis_server.commands
+    assert await cache.get("1", "a", build) == b"page2"
+    await backend.close()
+
+
+async def test_redis_backend_misses_when_unreachable(redis_server: RedisServer):
+    backend = create_response_cache_backend(redis_server.uri, max_bytes=0)
+    await redis_server.stop()
+    await redis_server.start()
+    cache = ResponseCache("test", backend, ttl=60)
+
+    assert await cache.get("1", "a", Builder()) == b"page1"
+    await backend.close()
+
+
+async def test_redis_backend_misses_when_connecting_times_out(monkeypatch):
+    async def open_connection(*_, **__):
+        # A blackholed host never answers the SYN
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(asyncio, "open_connection", open_connection)
+    backend = RedisResponseCacheBackend(Redis(socket_connect_timeout=0.01))
+    cache = ResponseCache("test", backend, ttl=60)
+
+    assert await asyncio.wait_for(cache.get("1", "a", Builder()), 1) == b"page1"
+    await backend.close()
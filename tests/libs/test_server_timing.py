@@ -0,0 +1,27 @@
+import time
+
+from main.libs.server_timing import ServerTiming
+
+
+def test_measure_exclusive_phases(monkeypatch):
+    now = 0.0
+    excluded = 0.0
+    monkeypatch.setattr(time, "perf_counter", lambda: now)
+    timing = ServerTiming(excluded=lambda: excluded)
+
+    with timing.measure("outer"):
+        now += 1
+        with timing.measure("inner"):
+            now += 2
+            excluded += 1.5
+
+    assert timing.phases == {"outer": 1, "inner": 0.5}
+
+
+def test_header():
+    timing = ServerTiming()
+    timing.add("auth", 0.0012)
+    timing.add("db", 0.0034)
+    timing.add("auth", 0.001)
+
+    assert timing.header() == "auth;dur=2.20, db;dur=3.40"
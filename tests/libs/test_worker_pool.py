@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+
+from main.libs.worker_pool import WorkerPool, WorkerPoolFull, queued, rejections
+
+
+async def test_run_off_the_event_loop():
+    pool = WorkerPool("test_run", max_workers=1, max_backlog=0)
+
+    assert await pool.run(threading.get_ident) != threading.get_ident()
+    pool.shutdown()
+
+
+async def test_reject_over_backlog():
+    pool = WorkerPool("test_backlog", max_workers=1, max_backlog=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(pool.run(release.wait))
+    waiting = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0)
+
+    assert queued.get(pool="test_backlog") == 1
+    with pytest.raises(WorkerPoolFull):
+        await pool.run(release.wait)
+    assert rejections.get(pool="test_backlog") == 1
+
+    release.set()
+    assert await asyncio.gather(running, waiting) == [True, True]
+    assert queued.get(pool="test_backlog") == 0
+
+    # Slots are given back once calls finish
+    assert await pool.run(release.wait)
+    pool.shutdown()
+
+
+async def test_give_back_the_slots_of_cancelled_calls():
+    pool = WorkerPool("test_cancel", max_workers=1, max_backlog=2)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(pool.run(release.wait))
+    waiting = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    # Requests cancelled while their calls are still queued
+    for task in waiting:
+        task.cancel()
+    await asyncio.gather(*waiting, return_exceptions=True)
+
+    release.set()
+    assert await running
+    assert pool._pending == 0
+    assert queued.get(pool="test_cancel") == 0
+    pool.shutdown()
@@ -0,0 +1,163 @@
+import io
+import json
+import logging
+import threading
+from logging.handlers import BufferingHandler
+from typing import TYPE_CHECKING, cast
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+
+from main.libs.log import LogPipeline
+from main.middlewares import access_log
+from main.middlewares.access_log import (
+    AccessInfo,
+    AccessLogFormatter,
+    AccessLogMiddleware,
+)
+from main.models.item import ItemModel
+
+if TYPE_CHECKING:
+    from asgiref.typing import ASGI3Application, HTTPScope
+
+
+async def test_log_query_stats(client, item: ItemModel, caplog):
+    with caplog.at_level(logging.INFO, logger="http.access"):
+        await client.get(f"/items/{item.id}")
+
+    (record,) = (r for r in caplog.records if r.name == "http.access")
+    assert record.args["db_statements"] == 1
+    assert record.args["db_time"] > 0
+    assert record.getMessage().endswith(f" 1 {record.args['db_time']:.3f}")
+
+
+def test_compute_used_atoms_only(monkeypatch):
+    monkeypatch.setenv("SERVICE_NAME", "catalog")
+    formatter = AccessLogFormatter.from_format(
+        '%(h)s "%({x-request-id}i)s" %({content-type}o)s %({SERVICE_NAME}e)s '
+        "%(x_forwarded_for)s %(a)s %(unknown)s %(s)d",
+    )
+    scope = cast(
+        "HTTPScope",
+        {
+            "client": ("127.0.0.1", 5000),
+            "headers": [
+                (b"x-request-id", b"abc"),
+                (b"x-forwarded-for", b"1.2.3.4, 5.6.7.8"),
+                (b"cookie", b"ignored"),
+            ],
+        },
+    )
+    info = AccessInfo(
+        response={
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain")],
+            "trailers": False,
+        },
+    )
+
+    assert formatter(scope, info) == {
+        "h": "127.0.0.1",
+        "{x-request-id}i": "abc",
+        "{content-type}o": "text/plain",
+        "{SERVICE_NAME}e": "catalog",
+        "x_forwarded_for": "5.6.7.8",
+        "a": "-",
+        "unknown": "-",
+        "s": 200,
+    }
+
+
+sampled_app = FastAPI()
+
+
+@sampled_app.get("/pings")
+async def _ping():
+    return {}
+
+
+@sampled_app.get("/items/{item_id}")
+async def _get_item(item_id: int):
+    return {"id": item_id}
+
+
+@sampled_app.get("/failing")
+async def _fail():
+    return JSONResponse({}, status_code=503)
+
+
+async def log_requests(paths: list[str], **options) -> list[dict]:
+    logger = logging.getLogger("test_access_log.json")
+    logger.setLevel(logging.INFO)
+    middleware = AccessLogMiddleware(
+        cast("ASGI3Application", sampled_app),
+        logger=logger,
+        json_lines=True,
+        sample_rates={"/pings": 0},
+        **options,
+    )
+    # Keeps the records, it never fills up with the few requests of a test
+    logger.addHandler(handler := BufferingHandler(capacity=100))
+
+    try:
+        async with AsyncClient(app=middleware, base_url="http://test") as client:
+            for path in paths:
+                await client.get(path, headers={"User-Agent": "tests"})
+    finally:
+        logger.removeHandler(handler)
+
+    return [json.loads(record.getMessage()) for record in handler.buffer]
+
+
+async def test_log_json_lines():
+    (line,) = await log_requests(["/items/7?expand=1", "/pings"])
+
+    assert line["path"] == "/items/7"
+    assert line["query"] == "expand=1"
+    assert line["route"] == "/items/{item_id}"
+    assert line["status"] == 200
+    assert line["bytes"] == 8
+    assert line["user_agent"] == "tests"
+    assert line["referer"] is None
+    assert line["db_statements"] == 0
+    assert "slow" not in line
+
+
+async def test_log_errors_and_slow_requests_despite_sampling():
+    lines = await log_requests(["/failing", "/pings"], sample_rate=0, slow_threshold=0)
+
+    assert [(line["path"], line["status"]) for line in lines] == [
+        ("/failing", 503),
+        ("/pings", 200),
+    ]
+    assert all(line["slow"] for line in lines)
+
+
+async def test_encode_json_lines_on_the_log_writer_thread(monkeypatch):
+    stream = io.StringIO()
+    pipeline = LogPipeline(stream, max_size=10)
+    logger = logging.getLogger("test_access_log.writer")
+    logger.handlers = [pipeline.handler(logging.Formatter())]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    threads = []
+    encode = access_log._JSONLine.__str__
+
+    def encode_on_thread(line) -> str:
+        threads.append(threading.current_thread().name)
+        return encode(line)
+
+    monkeypatch.setattr(access_log._JSONLine, "__str__", encode_on_thread)
+    middleware = AccessLogMiddleware(
+        cast("ASGI3Application", sampled_app),
+        logger=logger,
+        json_lines=True,
+    )
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        await client.get("/items/7")
+    pipeline.flush()
+
+    assert threads == ["log-writer"]
+    assert json.loads(stream.getvalue())["path"] == "/items/7"
@@ -0,0 +1,59 @@
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from main.middlewares.metrics import (
+    HTTPMetricsMiddleware,
+    request_duration,
+    requests_in_flight,
+    responses,
+    time_to_first_byte,
+)
+from main.models.item import ItemModel
+
+
+async def test_label_requests_by_route(client, item: ItemModel, metrics_headers):
+    labels = {"method": "GET", "route": "/items/{item_id}"}
+    count = request_duration.get_count(**labels)
+    first_byte_count = time_to_first_byte.get_count(**labels)
+    not_found = responses.get(**labels, status="404")
+
+    await client.get(f"/items/{item.id}")
+    await client.get(f"/items/{item.id + 1}")
+    await client.get("/not/a/route")
+
+    assert request_duration.get_count(**labels) == count + 2
+    assert time_to_first_byte.get_count(**labels) == first_byte_count + 2
+    assert responses.get(**labels, status="404") == not_found + 1
+    assert responses.get(method="GET", route="unmatched", status="404") >= 1
+    assert requests_in_flight.get(**labels) == 0
+
+    response = await client.get("/metrics", headers=metrics_headers)
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"}'
+        in response.text
+    )
+
+
+mounted_app = FastAPI()
+mounted_app.mount("/v2", sub_app := FastAPI())
+mounted_app.add_middleware(HTTPMetricsMiddleware)
+
+
+@sub_app.get("/things/{thing_id}")
+async def _get_thing(thing_id: int):
+    return {"id": thing_id}
+
+
+async def test_label_requests_by_the_route_routed():
+    # Mounted routes are not matched upfront, only by the router
+    labels = {"method": "GET", "route": "/things/{thing_id}"}
+    count = request_duration.get_count(**labels)
+    ok = responses.get(**labels, status="200")
+
+    async with AsyncClient(app=mounted_app, base_url="http://test") as client:
+        response = await client.get("/v2/things/7")
+
+    assert response.status_code == 200
+    assert request_duration.get_count(**labels) == count + 1
+    assert responses.get(**labels, status="200") == ok + 1
+    assert requests_in_flight.get(method="GET", route="unmatched") == 0
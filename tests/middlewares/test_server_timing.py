@@ -0,0 +1,49 @@
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from main.middlewares import ServerTimingMiddleware
+from main.models.item import ItemModel
+
+if TYPE_CHECKING:
+    from asgiref.typing import ASGI3Application
+
+
+async def test_add_server_timing_header(item: ItemModel, access_token: str):
+    async with AsyncClient(
+        app=ServerTimingMiddleware(cast("ASGI3Application", app)),
+        base_url="http://test",
+    ) as client:
+        response = await client.get(
+            f"/items/{item.id}",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    assert response.status_code == 200
+    phases = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, duration = entry.split(";dur=")
+        phases[name] = float(duration)
+
+    assert set(phases) == {
+        "auth",
+        "lookup",
+        "build",
+        "serialize",
+        "db",
+        "middleware",
+        "total",
+    }
+    assert phases["db"] > 0
+    assert sum(phases.values()) - phases["total"] == pytest.approx(
+        phases["total"],
+        abs=0.05,
+    )
+
+
+async def test_no_header_by_default(client, item: ItemModel):
+    response = await client.get(f"/items/{item.id}")
+
+    assert "server-timing" not in response.headers
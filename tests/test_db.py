@@ -0,0 +1,144 @@
+from collections import deque
+
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from main import config, db
+from main._db import ReplicaSet, RoutingSession
+from main.commons.exceptions import InternalServerError
+from main.engines.items import get_item_by_id
+from main.models.item import ItemModel
+
+
+async def test_db_scope_is_lazy():
+    async with db.scope():
+        assert not db.scoped_session.registry.has()
+        assert db.session is db.session
+        assert db.scoped_session.registry.has()
+
+    assert db.scoped_session.registry.has()  # the test's own session
+
+
+class TestRoutingSession:
+    @pytest.fixture
+    async def replica(self):
+        engine = create_async_engine(config.SQLALCHEMY_DATABASE_URI)
+        yield engine
+        await engine.dispose()
+
+    @pytest.fixture
+    def session(self, replica):
+        class Session(RoutingSession):
+            replica_set = ReplicaSet([replica], cooldown=30)
+
+        return Session(bind=db.engine.sync_engine)
+
+    def test_reads_go_to_replica(self, session, replica):
+        assert session.get_bind(clause=select(ItemModel)) is replica.sync_engine
+
+    def test_writes_go_to_primary_and_stick(self, session):
+        assert session.get_bind(clause=update(ItemModel)) is db.engine.sync_engine
+        assert session.get_bind(clause=select(ItemModel)) is db.engine.sync_engine
+
+    def test_locking_reads_go_to_primary(self, session):
+        statement = select(ItemModel).with_for_update()
+        assert session.get_bind(clause=statement) is db.engine.sync_engine
+
+    def test_reads_go_to_primary_when_asked(self, session):
+        with db.reading_primary():
+            assert session.get_bind(clause=select(ItemModel)) is db.engine.sync_engine
+        assert not session.info.get("sticky")
+
+    def test_unhealthy_replica_falls_back_to_primary(self, session, replica):
+        session.replica_set.mark_unhealthy(replica)
+        assert session.get_bind(clause=select(ItemModel)) is db.engine.sync_engine
+
+
+class TestQueryStats:
+    async def test_statements_are_counted(self, item):
+        async with db.scope():
+            await get_item_by_id(item.id)
+            await get_item_by_id(item.id)
+
+            stats = db.query_stats()
+            assert stats is not None
+            assert stats.statements == 2
+            assert stats.duration > 0
+
+        assert db.query_stats() is None
+
+    async def test_failed_statements_leave_no_start_time(self):
+        async with db.scope():
+            with pytest.raises(DBAPIError):
+                await db.session.execute(text("SELECT * FROM missing_table"))
+
+            connection = await db.session.connection()
+            assert connection.sync_connection is not None
+            assert "query_start_time" not in connection.sync_connection.info
+            stats = db.query_stats()
+            assert stats is not None
+            assert stats.statements == 1
+
+    async def test_budget_exceeded(self, item):
+        async with db.scope():
+            await db.query_budget(1)()
+            await get_item_by_id(item.id)
+
+            with pytest.raises(InternalServerError):
+                await get_item_by_id(item.id)
+
+
+class TestSlowQueryLog:
+    @pytest.fixture(autouse=True)
+    def slow_query_log(self, monkeypatch):
+        monkeypatch.setattr(db.slow_query_log, "threshold", 1e-9)
+        monkeypatch.setattr(db.slow_query_log, "_entries", deque(maxlen=10))
+        monkeypatch.setattr(db.slow_query_log, "_explained_at", {})
+        return db.slow_query_log
+
+    async def test_slow_statements_are_kept_with_their_route(
+        self,
+        client,
+        category,
+        slow_query_log,
+        monkeypatch,
+    ):
+        monkeypatch.setattr(slow_query_log, "parameters", True)
+        response = await client.get(f"/categories/{category.id}/items")
+        assert response.status_code == 200
+
+        entries = slow_query_log.entries()
+        assert entries
+        assert all(
+            entry["route"] == "/categories/{category_id}/items"
+            and entry["request_id"]
+            and entry["plan"] is None
+            for entry in entries
+        )
+        assert str(category.id) in entries[-1]["parameters"]
+
+    async def test_slow_selects_are_explained_once(
+        self,
+        item,
+        slow_query_log,
+        monkeypatch,
+    ):
+        monkeypatch.setattr(slow_query_log, "explain", True)
+        async with db.scope():
+            await get_item_by_id(item.id)
+            await get_item_by_id(item.id)
+            await slow_query_log.wait_explanations()
+
+        explained, not_explained = slow_query_log.entries()[::-1]
+        assert explained["plan"]
+        assert not_explained["plan"] is None
+        # The EXPLAIN statement itself is not recorded
+        assert len(slow_query_log.entries()) == 2
+
+    async def test_parameters_are_left_out_by_default(self, item, slow_query_log):
+        async with db.scope():
+            await get_item_by_id(item.id)
+
+        assert slow_query_log.entries()[0]["parameters"] is None
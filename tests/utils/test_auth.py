@@ -0,0 +1,79 @@
+import datetime
+from typing import Annotated
+
+import jwt
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+
+from main import config
+from main.utils import auth
+from main.utils.auth import (
+    RequestedUserId,
+    create_access_token_from_id,
+    get_id_from_access_token,
+    require_authentication,
+)
+
+app = FastAPI()
+
+
+@app.get("/both")
+async def _get_both(
+    user_id: RequestedUserId,
+    required_user_id: Annotated[int, Depends(require_authentication)],
+):
+    return {"user_id": user_id, "required_user_id": required_user_id}
+
+
+def count_decodes(monkeypatch) -> list[str]:
+    decoded = []
+    decode = jwt.decode
+
+    def spy(token, *args, **kwargs):
+        decoded.append(token)
+        return decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", spy)
+    return decoded
+
+
+async def test_decode_token_once_per_request(monkeypatch):
+    auth.clear_verified_tokens()
+    decoded = count_decodes(monkeypatch)
+    token = create_access_token_from_id(1)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(
+            "/both",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"user_id": 1, "required_user_id": 1}
+    assert decoded == [token]
+
+
+def test_cache_verified_token(monkeypatch):
+    auth.clear_verified_tokens()
+    decoded = count_decodes(monkeypatch)
+    token = create_access_token_from_id(1)
+
+    assert get_id_from_access_token(token) == 1
+    assert get_id_from_access_token(token) == 1
+    assert decoded == [token]
+
+
+def test_reject_invalid_tokens(monkeypatch):
+    auth.clear_verified_tokens()
+    decoded = count_decodes(monkeypatch)
+    expired = jwt.encode(
+        {"sub": 1, "exp": datetime.datetime.utcnow() - datetime.timedelta(1)},
+        config.JWT_SECRET,
+    )
+    forged = jwt.encode({"sub": 1}, "not the secret")
+
+    for token in (expired, forged, expired):
+        assert get_id_from_access_token(token) is None
+
+    # Rejected tokens are not cached
+    assert decoded == [expired, forged, expired]
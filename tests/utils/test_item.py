@@ -0,0 +1,23 @@
+from main.utils import item as item_utils
+
+
+async def test_taken_item_names(monkeypatch):
+    async def get_existing_item_names(names):
+        return {"Foo"}
+
+    monkeypatch.setattr(item_utils, "get_existing_item_names", get_existing_item_names)
+
+    taken = await item_utils.get_taken_item_names(["Foo", "Bar", "Bar", "baz"])
+    assert taken == [True, False, True, False]
+
+
+async def test_taken_item_names_only_match_exact_spellings(monkeypatch):
+    async def get_existing_item_names(names):
+        # A case-insensitive collation returns the stored spelling
+        return {"foo"}
+
+    monkeypatch.setattr(item_utils, "get_existing_item_names", get_existing_item_names)
+
+    # Whether "Foo" equals "foo" is left to the unique index, through add_items
+    taken = await item_utils.get_taken_item_names(["Foo", "foo"])
+    assert taken == [False, True]